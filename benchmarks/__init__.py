@@ -0,0 +1 @@
+"""Offline benchmarks of the client side hot paths of neo4j_tools."""
@@ -0,0 +1,266 @@
+"""Benchmarks of neo4j_tools against the in-process stand-in driver of the tests.
+
+No Neo4J server is needed: queries are recorded by the fake driver of
+`neo4j_tools.testing`, which answers with synthetic records. Every benchmark
+processes `rows` rows; the best of `repeat` runs gives the throughput, a
+separate run traced with `tracemalloc` gives the peak memory.
+
+Example
+-------
+Run from the repository root, save a baseline and compare a later run::
+
+    python -m benchmarks.bench_neo4j_tools --sizes 1000,100000 --save baseline.json
+    python -m benchmarks.bench_neo4j_tools --sizes 1000,100000 --compare baseline.json
+
+Sizes up to 10M rows (`--sizes 1000,10000,100000,1000000,10000000`) are
+possible, but need several GB of memory for the synthetic input.
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Callable, Iterable
+
+import click
+
+from neo4j_tools import neo4j_tools
+from neo4j_tools.neo4j_tools import Db, Node, get_cypher_props, get_standard_name
+from neo4j_tools.testing import FakeGraphDatabase, FakeResult
+
+BenchmarkResult = namedtuple(
+    "BenchmarkResult", ["benchmark", "rows", "seconds", "rows_per_second", "peak_mib"]
+)
+
+default_sizes = (1000, 10000, 100000)
+
+
+class FakeCursor:
+    """DB-API cursor yielding `rows` synthetic tuples with `fetchmany`."""
+
+    description = [("id",), ("name",), ("score",)]
+
+    def __init__(self, rows: int):
+        self.__rows = iter(range(rows))
+
+    def execute(self, sql: str):
+        pass
+
+    def fetchmany(self, size: int):
+        return [(i, f"name_{i}", i * 0.5) for _, i in zip(range(size), self.__rows)]
+
+
+def get_rows(rows: int) -> List[dict]:
+    return [{"id": i, "name": f"name_{i}", "score": i * 0.5} for i in range(rows)]
+
+
+@contextmanager
+def fake_db():
+    """Yield a `Db` using the fake driver, queries are not kept."""
+    graph_database = neo4j_tools.GraphDatabase
+    neo4j_tools.GraphDatabase = FakeGraphDatabase
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "config.ini")
+            with open(path, "w") as f:
+                f.write(
+                    "[NEO4J]\nuri = bolt://localhost:7687\nuser = neo4j\n"
+                    f"password = secret\nimport_folder = {tmp_dir}/\ndatabase = neo4j\n"
+                )
+            db = Db(path)
+            # keep only the last query, recorded parameters would add to the peak memory
+            db.driver.queries = deque(maxlen=1)
+            yield db
+            db.close()
+    finally:
+        neo4j_tools.GraphDatabase = graph_database
+
+
+def setup_get_cypher_props(db: Db, rows: int) -> Callable[[], None]:
+    props = [dict(row, tags=["a", "b"]) for row in get_rows(rows)]
+
+    def run():
+        for p in props:
+            get_cypher_props(p)
+
+    return run
+
+
+def setup_get_standard_name(db: Db, rows: int) -> Callable[[], None]:
+    names = [f"GeneSymbol{i} Name-Part" for i in range(rows)]
+
+    def run():
+        for name in names:
+            get_standard_name(name)
+
+    return run
+
+
+def setup_graph_element(db: Db, rows: int) -> Callable[[], None]:
+    nodes = [Node({"Gene", "Protein"}, row) for row in get_rows(rows)]
+
+    def run():
+        for node in nodes:
+            node.cypher_labels
+            node.get_where("n")
+
+    return run
+
+
+def setup_exec_df(db: Db, rows: int) -> Callable[[], None]:
+    result = FakeResult(get_rows(rows))
+    db.driver.responder = lambda query, params: result
+
+    def run():
+        db.exec_df("MATCH (n:Gene) RETURN n.id AS id, n.name AS name, n.score AS score")
+
+    return run
+
+
+def setup_bulk_merge_nodes(db: Db, rows: int) -> Callable[[], None]:
+    data = get_rows(rows)
+    db.driver.responder = lambda query, params: []
+
+    def run():
+        db.bulk_merge_nodes("Gene", data, key="id")
+
+    return run
+
+
+def setup_import_nodes_from_mysql(db: Db, rows: int) -> Callable[[], None]:
+    db.driver.responder = lambda query, params: []
+
+    def run():
+        db.import_nodes_from_mysql("Gene", FakeCursor(rows), "SELECT id, name, score FROM gene")
+
+    return run
+
+
+benchmarks: Dict[str, Callable[[Db, int], Callable[[], None]]] = {
+    "get_cypher_props": setup_get_cypher_props,
+    "get_standard_name": setup_get_standard_name,
+    "graph_element": setup_graph_element,
+    "exec_df": setup_exec_df,
+    "bulk_merge_nodes": setup_bulk_merge_nodes,
+    "import_nodes_from_mysql": setup_import_nodes_from_mysql,
+}
+
+
+def measure(run: Callable[[], None], repeat: int = 3):
+    """Return the best time of `repeat` runs and the peak traced memory in MiB."""
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), peak / 2**20
+
+
+def run_benchmarks(
+    sizes: Iterable[int] = default_sizes,
+    names: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+) -> List[BenchmarkResult]:
+    """Run the benchmarks `names` (all by default) for each number of rows in `sizes`."""
+    results = []
+    for name in names or benchmarks:
+        for rows in sizes:
+            with fake_db() as db:
+                seconds, peak_mib = measure(benchmarks[name](db, rows), repeat)
+            results.append(
+                BenchmarkResult(name, rows, seconds, rows / seconds if seconds else 0.0, peak_mib)
+            )
+    return results
+
+
+def save_results(results: List[BenchmarkResult], path: str):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [r._asdict() for r in results],
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    with open(path) as f:
+        return [BenchmarkResult(**r) for r in json.load(f)["results"]]
+
+
+def compare(
+    results: List[BenchmarkResult], baseline: List[BenchmarkResult], tolerance: float = 0.25
+) -> List[str]:
+    """Return the regressions of `results` compared with `baseline`.
+
+    A benchmark regressed if its throughput dropped or its peak memory grew
+    by more than `tolerance` (relative). Benchmarks missing in `baseline`
+    are ignored.
+    """
+    expected = {(r.benchmark, r.rows): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = expected.get((r.benchmark, r.rows))
+        if base is None:
+            continue
+        if r.rows_per_second < base.rows_per_second * (1 - tolerance):
+            regressions.append(
+                f"{r.benchmark}[{r.rows}]: {r.rows_per_second:,.0f} rows/s "
+                f"(baseline {base.rows_per_second:,.0f} rows/s)"
+            )
+        if r.peak_mib > base.peak_mib * (1 + tolerance) and r.peak_mib - base.peak_mib > 1:
+            regressions.append(
+                f"{r.benchmark}[{r.rows}]: {r.peak_mib:,.1f} MiB peak "
+                f"(baseline {base.peak_mib:,.1f} MiB)"
+            )
+    return regressions
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    lines = [f"{'benchmark':<26}{'rows':>12}{'seconds':>12}{'rows/s':>16}{'peak MiB':>12}"]
+    for r in results:
+        lines.append(
+            f"{r.benchmark:<26}{r.rows:>12,}{r.seconds:>12.4f}"
+            f"{r.rows_per_second:>16,.0f}{r.peak_mib:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+@click.command(help="Benchmark neo4j_tools against an in-process fake driver")
+@click.option("--sizes", default=",".join(map(str, default_sizes)),
+              help="Comma separated numbers of rows")
+@click.option("--only", "names", multiple=True, type=click.Choice(list(benchmarks)),
+              help="Benchmark to run, can be repeated (default all)")
+@click.option("--repeat", default=3, help="Timed runs per benchmark, the best is reported")
+@click.option("--save", type=click.Path(), help="Save the results as JSON baseline")
+@click.option("--compare", "baseline", type=click.Path(exists=True),
+              help="Compare with a saved baseline, exit with 1 on regressions")
+@click.option("--tolerance", default=0.25, help="Relative slowdown/memory growth tolerated")
+def main(sizes: str, names: List[str], repeat: int, save: str, baseline: str, tolerance: float):
+    results = run_benchmarks([int(x) for x in sizes.split(",")], names, repeat)
+    click.echo(format_results(results))
+    if save:
+        save_results(results, save)
+    if baseline:
+        regressions = compare(results, load_results(baseline), tolerance)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
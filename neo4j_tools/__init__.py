@@ -4,4 +4,21 @@ __author__ = """Christian.Ebeling"""
 __email__ = 'Christian.Ebeling@SCAI.Fraunhofer.de'
 __version__ = '0.1.4'
 
-from neo4j_tools.neo4j_tools import Db, Node, Edge
+# The classes are imported on first access, so e.g. the command line
+# interface starts without loading the driver and pandas.
+lazy_imports = {
+    "Db": "neo4j_tools.neo4j_tools",
+    "Node": "neo4j_tools.neo4j_tools",
+    "Edge": "neo4j_tools.neo4j_tools",
+    "AsyncDb": "neo4j_tools.async_db",
+}
+
+__all__ = list(lazy_imports)
+
+
+def __getattr__(name):
+    if name in lazy_imports:
+        import importlib
+
+        return getattr(importlib.import_module(lazy_imports[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
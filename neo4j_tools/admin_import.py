@@ -0,0 +1,406 @@
+"""Write files for the offline `neo4j-admin database import` of full graphs.
+
+Transactional writes are much slower than `neo4j-admin database import` for
+initial loads. `AdminImport` writes nodes and relationships from the same
+sources the `Db` importers accept into sharded (optionally gzip compressed)
+CSV files with typed headers and returns the matching import command.
+
+Example
+-------
+>>> exporter = AdminImport("import")
+>>> exporter.write_nodes("Person", people_df, id_key="id", id_space="Person")
+>>> exporter.write_relationships("KNOWS", knows_df, start_space="Person", end_space="Person")
+>>> print(exporter.command("neo4j"))
+"""
+import csv
+import gzip
+import io
+import logging
+import os
+import re
+from itertools import islice
+from queue import Queue
+from threading import Thread
+from typing import Optional, List, Dict, Iterable, Union, Any
+
+import pandas as pd
+
+from neo4j_tools import defaults
+from neo4j_tools.compiler import get_param_props, get_param_value
+from neo4j_tools.neo4j_tools import Node, Edge, get_batches, fetch_batches
+
+logger = logging.getLogger(__name__)
+
+admin_types = {bool: "boolean", int: "long", float: "double", str: "string"}
+
+
+def get_admin_type(value) -> str:
+    """Return the header type of a value, e.g. "long" or "string[]"."""
+    if isinstance(value, (list, tuple)):
+        values = [v for v in value if v is not None]
+        return (get_admin_type(values[0]) if values else "string") + "[]"
+    for python_type, admin_type in admin_types.items():
+        if type(value) is python_type:
+            return admin_type
+    return "string"
+
+
+def get_admin_value(value, array_delimiter: str = ";") -> str:
+    """Format a property value as CSV field, None as empty field."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return array_delimiter.join(
+            get_admin_value(v, array_delimiter) for v in value if v is not None
+        )
+    return str(value)
+
+
+def get_file_name(name: str) -> str:
+    """Return a file name friendly version of a label or type."""
+    return re.sub(r"[^0-9A-Za-z_-]+", "_", name).strip("_").lower() or "default"
+
+
+def iter_source_batches(source, batch_size: int):
+    """Yield lists of items from a DataFrame, a DB-API cursor or an iterable.
+
+    DataFrame rows are converted to dictionaries, cursor rows to dictionaries
+    by column name, items of other iterables are yielded unchanged.
+    """
+    if isinstance(source, pd.DataFrame):
+        yield from get_batches(source, batch_size)
+    elif hasattr(source, "fetchmany"):
+        yield from fetch_batches(source, batch_size)
+    else:
+        iterator = iter(source)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            yield batch
+
+
+class ShardWriter:
+    """Write rows to numbered files, starting a new file every `shard_size` rows."""
+
+    def __init__(
+        self,
+        prefix: str,
+        columns: List[str],
+        shard_size: int,
+        compress: bool,
+        delimiter: str,
+        array_delimiter: str,
+    ):
+        self.prefix = prefix
+        self.columns = columns
+        self.shard_size = shard_size
+        self.compress = compress
+        self.delimiter = delimiter
+        self.array_delimiter = array_delimiter
+        self.files: List[str] = []
+        self.__file = None
+        self.__writer = None
+        self.__rows = 0
+
+    def __open(self):
+        path = f"{self.prefix}-{len(self.files):05d}.csv" + (".gz" if self.compress else "")
+        if self.compress:
+            self.__file = io.TextIOWrapper(
+                gzip.open(path, "wb", compresslevel=1), newline="", encoding="utf-8"
+            )
+        else:
+            self.__file = open(path, "w", newline="", encoding="utf-8")
+        self.__writer = csv.writer(self.__file, delimiter=self.delimiter)
+        self.files.append(path)
+        self.__rows = 0
+
+    def write(self, rows: List[dict]):
+        for row in rows:
+            if self.__file is None or self.__rows >= self.shard_size:
+                self.close()
+                self.__open()
+            self.__writer.writerow(
+                [get_admin_value(row.get(c), self.array_delimiter) for c in self.columns]
+            )
+            self.__rows += 1
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class AdminImport:
+    """Write node and relationship files for `neo4j-admin database import full`.
+
+    Every `write_nodes`/`write_relationships` call writes one header file and
+    data shards of at most `shard_size` rows. Rows are read in batches and
+    distributed round robin to `workers` threads, each writing its own shards,
+    so memory is bounded by `batch_size` and not by the size of the source.
+
+    Property types in the header are inferred from the first batch (Python
+    `bool`, `int`, `float`, `str` and lists of them), use `types` to declare
+    them. Properties not found in the first batch are skipped with a warning.
+
+    Parameters
+    ----------
+    directory : str
+        Folder of the written files, created if it does not exist
+    shard_size : int, optional
+        Maximum number of rows per data file, by default `defaults.shard_size`
+    compress : bool, optional
+        Write gzip compressed data files, by default True
+    workers : int, optional
+        Number of writing threads, by default `defaults.workers`
+    batch_size : int, optional
+        Number of rows read from the source at once, by default `defaults.batch_size`
+    delimiter : str, optional
+        Field delimiter, by default ","
+    array_delimiter : str, optional
+        Delimiter of array values, by default ";"
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        shard_size: int = defaults.shard_size,
+        compress: bool = True,
+        workers: int = defaults.workers,
+        batch_size: int = defaults.batch_size,
+        delimiter: str = ",",
+        array_delimiter: str = ";",
+    ):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.compress = compress
+        self.workers = workers
+        self.batch_size = batch_size
+        self.delimiter = delimiter
+        self.array_delimiter = array_delimiter
+        self.node_files: List[List[str]] = []
+        self.relationship_files: List[List[str]] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def __write(
+        self,
+        name: str,
+        id_columns: Dict[str, str],
+        batches: Iterable[List[dict]],
+        types: Optional[Dict[str, str]],
+    ) -> List[str]:
+        """Write header and shards of `batches`, return [header, shard, ...].
+
+        `id_columns` maps row keys to their header field (e.g. ":LABEL"),
+        all other keys are properties.
+        """
+        prefix = os.path.join(self.directory, name)
+        if os.path.exists(f"{prefix}-header.csv"):
+            raise FileExistsError(f"{prefix}-header.csv already exists.")
+        batches = iter(batches)
+        first_batch = next(batches, [])
+
+        props: Dict[str, str] = {}
+        for row in first_batch:
+            for k, v in row.items():
+                if k not in id_columns and (k not in props or props[k] is None):
+                    props[k] = None if v is None else get_admin_type(v)
+        props = {k: v or "string" for k, v in props.items()}
+        props.update({k: v for k, v in (types or {}).items() if k not in id_columns})
+        columns = list(id_columns) + list(props)
+
+        header = os.path.join(self.directory, f"{name}-header.csv")
+        with open(header, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f, delimiter=self.delimiter).writerow(
+                list(id_columns.values()) + [f"{k}:{v}" for k, v in props.items()]
+            )
+
+        writers = [
+            ShardWriter(
+                f"{prefix}-{i:02d}",
+                columns,
+                self.shard_size,
+                self.compress,
+                self.delimiter,
+                self.array_delimiter,
+            )
+            for i in range(self.workers)
+        ]
+        queues = [Queue(maxsize=2) for _ in range(self.workers)]
+        errors = []
+        done = object()
+
+        def worker(i: int):
+            while True:
+                rows = queues[i].get()
+                if rows is done:
+                    break
+                if not errors:
+                    try:
+                        writers[i].write(rows)
+                    except BaseException as e:
+                        errors.append(e)
+            writers[i].close()
+
+        threads = [Thread(target=worker, args=(i,), daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        skipped = set()
+        try:
+            if first_batch:
+                queues[0].put(first_batch)
+            for i, rows in enumerate(batches, start=1):
+                if errors:
+                    break
+                skipped.update(k for row in rows for k in row.keys() - columns)
+                queues[i % self.workers].put(rows)
+        finally:
+            for q in queues:
+                q.put(done)
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+        if skipped:
+            logger.warning(f"Skipped properties not in the first batch of {name}: {skipped}")
+        return [header] + sorted(path for w in writers for path in w.files)
+
+    def write_nodes(
+        self,
+        labels: Union[str, set[str]],
+        source: Union[pd.DataFrame, Iterable[dict], Iterable[Node], Any],
+        id_key: str,
+        id_space: Optional[str] = None,
+        types: Optional[Dict[str, str]] = None,
+    ) -> List[str]:
+        """Write node files.
+
+        Parameters
+        ----------
+        labels : Union[str, set[str]]
+            Label(s) of all nodes; `Node` objects additionally keep their own labels
+        source : Union[pd.DataFrame, Iterable[dict], Iterable[Node], Any]
+            DataFrame, iterable of property dictionaries or `Node` objects, or
+            an executed DB-API cursor (like in `Db.import_nodes_from_mysql`)
+        id_key : str
+            Property used as node ID, relationships refer to it
+        id_space : Optional[str], optional
+            ID space of the nodes, by default None (global)
+        types : Optional[Dict[str, str]], optional
+            Header types by property name, e.g. {"tags": "string[]"}
+
+        Returns
+        -------
+        List[str]
+            Header file followed by the data files
+        """
+        labels = Node(labels).labels
+
+        def batches():
+            for rows in iter_source_batches(source, self.batch_size):
+                yield [self.__get_node_row(row, labels) for row in rows]
+
+        id_field = f"{id_key}:ID({id_space})" if id_space else f"{id_key}:ID"
+        name = "nodes-" + get_file_name("_".join(sorted(labels)))
+        files = self.__write(name, {id_key: id_field, ":LABEL": ":LABEL"}, batches(), types)
+        self.node_files.append(files)
+        return files
+
+    def __get_node_row(self, row: Union[dict, Node], labels: set[str]) -> dict:
+        if isinstance(row, Node):
+            node_labels = labels | row.labels
+            row = get_param_props(row.props)
+        else:
+            node_labels = labels
+            row = get_param_props(row)
+        row[":LABEL"] = sorted(node_labels)
+        return row
+
+    def write_relationships(
+        self,
+        rel_type: Optional[str],
+        source: Union[pd.DataFrame, Iterable[dict], Iterable[tuple[Node, Edge, Node]], Any],
+        start_space: Optional[str] = None,
+        end_space: Optional[str] = None,
+        subj_key: Optional[str] = None,
+        obj_key: Optional[str] = None,
+        types: Optional[Dict[str, str]] = None,
+    ) -> List[str]:
+        """Write relationship files.
+
+        Parameters
+        ----------
+        rel_type : Optional[str]
+            Type of all relationships, None to use the `rel_type` column or
+            the type of the `Edge` objects
+        source : Union[pd.DataFrame, Iterable[dict], Iterable[tuple[Node, Edge, Node]], Any]
+            DataFrame, iterable of dictionaries or DB-API cursor with the
+            columns `subj` and `obj` (IDs of the nodes) and optionally
+            `rel_type`; all other columns are properties (`subj_labels` and
+            `obj_labels` of `Db.bulk_merge_edges` DataFrames are ignored).
+            Alternatively (subject, edge, object) triples.
+        start_space : Optional[str], optional
+            ID space of the start nodes, by default None (global)
+        end_space : Optional[str], optional
+            ID space of the end nodes, by default None (global)
+        subj_key : Optional[str], optional
+            ID property of the subject nodes of triples
+        obj_key : Optional[str], optional
+            ID property of the object nodes of triples
+        types : Optional[Dict[str, str]], optional
+            Header types by property name
+
+        Returns
+        -------
+        List[str]
+            Header file followed by the data files
+        """
+
+        def batches():
+            for rows in iter_source_batches(source, self.batch_size):
+                yield [
+                    self.__get_relationship_row(row, rel_type, subj_key, obj_key)
+                    for row in rows
+                ]
+
+        id_columns = {
+            ":START_ID": f":START_ID({start_space})" if start_space else ":START_ID",
+            ":END_ID": f":END_ID({end_space})" if end_space else ":END_ID",
+            ":TYPE": ":TYPE",
+        }
+        name = "relationships-" + get_file_name(rel_type or "mixed")
+        files = self.__write(name, id_columns, batches(), types)
+        self.relationship_files.append(files)
+        return files
+
+    @staticmethod
+    def __get_relationship_row(row, rel_type, subj_key, obj_key) -> dict:
+        if isinstance(row, tuple):
+            subj, edge, obj = row
+            props = get_param_props(edge.props)
+            props[":START_ID"] = get_param_value(subj.props[subj_key])
+            props[":END_ID"] = get_param_value(obj.props[obj_key])
+            props[":TYPE"] = rel_type or next(iter(edge.labels))
+            return props
+        row = get_param_props(row)
+        row.pop("subj_labels", None)
+        row.pop("obj_labels", None)
+        row[":START_ID"] = row.pop("subj", None)
+        row[":END_ID"] = row.pop("obj", None)
+        row[":TYPE"] = row.pop("rel_type", None) or rel_type
+        return row
+
+    def command(self, database: str = "neo4j") -> str:
+        """Return the `neo4j-admin database import full` command for the written files."""
+        args = ["neo4j-admin", "database", "import", "full"]
+        args += [f"--nodes={','.join(files)}" for files in self.node_files]
+        args += [f"--relationships={','.join(files)}" for files in self.relationship_files]
+        delimiter = "TAB" if self.delimiter == "\t" else self.delimiter
+        args += [
+            f"--delimiter={delimiter}",
+            f"--array-delimiter={self.array_delimiter}",
+            database,
+        ]
+        return " \\\n    ".join(args)
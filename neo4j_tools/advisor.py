@@ -0,0 +1,101 @@
+"""Record the label/property shapes `Db` looks up and find missing indexes."""
+from collections import Counter, namedtuple
+from threading import Lock
+from typing import Optional, List, Dict, Iterable
+
+import pandas as pd
+
+from neo4j_tools.compiler import get_labels_key
+
+Shape = namedtuple("Shape", ["entity", "labels", "properties"])
+
+# index types usable for equality lookups of MATCH/MERGE
+lookup_index_types = ("RANGE", "BTREE", "TEXT")
+
+
+def get_covering_index(shape: Shape, indexes: Iterable[dict]) -> Optional[str]:
+    """Return the name of an index usable to look up `shape`, None if missing.
+
+    An index on one of the labels is usable if all its properties are part of
+    the shape (composite indexes need all properties in the predicate).
+    """
+    for index in indexes:
+        if (
+            index.get("entityType") == shape.entity
+            and index.get("type") in lookup_index_types
+            and index.get("state") != "FAILED"
+            and set(index.get("labelsOrTypes") or []) & set(shape.labels)
+            and set(index.get("properties") or []) <= set(shape.properties)
+        ):
+            return index.get("name")
+    return None
+
+
+class IndexAdvisor:
+    """Count the (labels, properties) shapes used to look up nodes/relationships.
+
+    `Db` records the shapes of MATCH/MERGE patterns (e.g. `merge_node`,
+    `get_node`, `bulk_merge_nodes`), `report` compares them with the indexes.
+    """
+
+    def __init__(self):
+        self.__calls: Counter = Counter()
+        self.__lock = Lock()
+
+    def record(
+        self,
+        labels: Iterable[str],
+        properties: Iterable[str],
+        calls: int = 1,
+        entity: str = "NODE",
+    ):
+        """Record `calls` lookups of `labels` by `properties`."""
+        labels = get_labels_key(labels)
+        properties = tuple(sorted(set(properties)))
+        if labels and properties:
+            with self.__lock:
+                self.__calls[Shape(entity, labels, properties)] += calls
+
+    @property
+    def shapes(self) -> Dict[Shape, int]:
+        """Number of calls by shape."""
+        with self.__lock:
+            return dict(self.__calls)
+
+    def reset(self):
+        with self.__lock:
+            self.__calls.clear()
+
+    def report(self, indexes: List[dict], missing_only: bool = False) -> pd.DataFrame:
+        """Return the shapes ranked by calls with their covering index.
+
+        Parameters
+        ----------
+        indexes : List[dict]
+            Result of `SHOW INDEXES` (`Db.show_indexes(as_df=False)`); indexes
+            backing constraints are part of it
+        missing_only : bool, optional
+            Only return shapes without index, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns `entity`, `labels`, `properties`, `calls` and `index`
+        """
+        rows = []
+        for shape, calls in self.shapes.items():
+            index = get_covering_index(shape, indexes)
+            if missing_only and index:
+                continue
+            rows.append(
+                {
+                    "entity": shape.entity,
+                    "labels": list(shape.labels),
+                    "properties": list(shape.properties),
+                    "calls": calls,
+                    "index": index,
+                }
+            )
+        columns = ["entity", "labels", "properties", "calls", "index"]
+        df = pd.DataFrame(rows, columns=columns)
+        return df.sort_values("calls", ascending=False, ignore_index=True)
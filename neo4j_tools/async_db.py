@@ -0,0 +1,408 @@
+"""Asyncio counterpart of `neo4j_tools.neo4j_tools.Db`."""
+import asyncio
+from typing import Optional, List, Dict, Iterable, Union, Awaitable, Tuple
+
+import pandas as pd
+from neo4j import AsyncGraphDatabase
+from typing_extensions import LiteralString
+
+from neo4j_tools import defaults
+from neo4j_tools.compiler import compile_element
+from neo4j_tools.neo4j_tools import (
+    BatchResult,
+    Edge,
+    Node,
+    Relationship,
+    get_batches,
+    get_bulk_create_nodes_cypher,
+    get_bulk_merge_edges_cypher,
+    get_bulk_merge_nodes_cypher,
+    get_config,
+    get_cypher_labels,
+    get_counters,
+    get_df,
+    get_rows_with_keys,
+    iter_edge_batches,
+)
+
+
+class AsyncDb:
+    """Neo4J database access with coroutines.
+
+    Each query runs in its own session from the driver pool, so independent
+    coroutines can have queries in flight at the same time (see `gather`).
+    Methods which return a `neo4j.Result` in `Db` return the update counters
+    here, because the result is consumed before the session is closed.
+    """
+
+    def __init__(
+        self,
+        config_file=defaults.config_file_path,
+        database: Optional[str] = None,
+        max_concurrency: int = defaults.max_concurrency,
+    ):
+        self.__config = get_config(config_file)
+        self.database = database if database else self.__config.database
+        self.max_concurrency = max_concurrency
+        self.driver = AsyncGraphDatabase.driver(
+            self.__config.uri,
+            auth=(self.__config.user, self.__config.password),
+            **self.__config.driver_config,
+        )
+
+    def __str__(self):
+        return f"<neo4j_tools:AsyncDb {{user:{self.__config.user}, database:{self.database}, uri: {self.__config.uri} }}>"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.driver.close()
+
+    async def __run(
+        self, cypher: LiteralString, params: Optional[dict] = None
+    ) -> Tuple[List[dict], Dict[str, int]]:
+        """Run a query in a new session, return data and update counters."""
+        async with self.driver.session(database=self.database) as session:
+            result = await session.run(cypher, parameters=params)
+            data = await result.data()
+            summary = await result.consume()
+        return data, get_counters(summary)
+
+    async def __write(self, cypher: LiteralString, params: Optional[dict] = None):
+        return (await self.__run(cypher, params))[1]
+
+    async def gather(
+        self, aws: Iterable[Awaitable], limit: Optional[int] = None
+    ) -> list:
+        """Await many independent coroutines with bounded concurrency.
+
+        Like `asyncio.gather`, but at most `limit` (by default
+        `max_concurrency`) awaitables run at the same time. Results are
+        returned in the order of `aws`.
+
+        Example
+        -------
+        >>> counts = await db.gather(db.count_nodes(Node(x)) for x in labels)
+        """
+        semaphore = asyncio.Semaphore(limit or self.max_concurrency)
+
+        async def run(aw: Awaitable):
+            async with semaphore:
+                return await aw
+
+        return await asyncio.gather(*[run(aw) for aw in aws])
+
+    async def exec_data(self, cypher: LiteralString, params: Optional[dict] = None):
+        return (await self.__run(cypher, params))[0]
+
+    async def exec_df(self, cypher: LiteralString, params: Optional[dict] = None):
+        return get_df(await self.exec_data(cypher, params))
+
+    async def show_databases(self):
+        return await self.exec_data("SHOW DATABASES")
+
+    async def databases(self):
+        return [
+            x["name"] for x in await self.show_databases() if x["type"] == "standard"
+        ]
+
+    async def schema(self):
+        """Get the database schema."""
+        return await self.exec_data("CALL db.schema.visualization()")
+
+    async def node_labels(self) -> List[str]:
+        """Returns list of all node labels."""
+        data = await self.exec_data("CALL db.labels() YIELD label")
+        return [x["label"] for x in data]
+
+    async def relationship_types(self) -> List[str]:
+        """Returns list of all edge/relationship types."""
+        data = await self.exec_data("CALL db.relationshipTypes")
+        return [x["relationshipType"] for x in data]
+
+    async def show_indexes(self, as_df=True):
+        cypher = "SHOW INDEXES"
+        return await (self.exec_df(cypher) if as_df else self.exec_data(cypher))
+
+    async def show_unique_constraints(self, as_df=True):
+        cypher = "SHOW UNIQUE CONSTRAINTS"
+        return await (self.exec_df(cypher) if as_df else self.exec_data(cypher))
+
+    async def get_number_of_nodes(self, node: Optional[Node] = None) -> int:
+        c = compile_element(node or Node(set()), "n")
+        where = f" WHERE {c.where}" if c.where else ""
+        cypher = f"MATCH (n{c.labels}) {where} RETURN count(n) AS num"
+        return (await self.exec_data(cypher, c.params))[0]["num"]
+
+    async def get_number_of_edges(self, edge: Optional[Edge] = None) -> int:
+        c = compile_element(edge or Edge(set()), "e")
+        where = f" WHERE {c.where}" if c.where else ""
+        cypher = f"MATCH ()-[e{c.labels}]->() {where} RETURN count(e) AS num"
+        return (await self.exec_data(cypher, c.params))[0]["num"]
+
+    async def count_nodes(self, node: Node) -> int:
+        cypher = f"match (n{get_cypher_labels(node.labels)}) return count(n) as num"
+        return (await self.exec_data(cypher))[0]["num"]
+
+    async def count_edges(self, edge: Edge) -> int:
+        cypher = f"match ()-[r{get_cypher_labels(edge.labels)}]->() return count(r) as num"
+        return (await self.exec_data(cypher))[0]["num"]
+
+    async def nodes_by_label(
+        self, labels: Union[set[str], str], limit: Optional[int] = None
+    ):
+        cypher_limit = "LIMIT $limit" if limit else ""
+        cypher = f"MATCH (n{get_cypher_labels(Node(labels).labels)}) RETURN n {cypher_limit}"
+        return [x["n"] for x in await self.exec_data(cypher, {"limit": limit})]
+
+    async def create_node(self, node: Node) -> int:
+        """Create a node with label and properties."""
+        c = compile_element(node, "n")
+        cypher = f"CREATE (n{c.labels} {c.props}) return ID(n) as nid"
+        return (await self.exec_data(cypher, c.params))[0]["nid"]
+
+    async def merge_node(self, node: Node) -> int:
+        """Creates a node with props if not exists"""
+        c = compile_element(node, "n")
+        cypher = f"MERGE (n{c.labels} {c.props}) return ID(n) as id"
+        return (await self.exec_data(cypher, c.params))[0]["id"]
+
+    async def create_edge(self, subj: Node, edge: Edge, obj: Node) -> Relationship:
+        s, e, o = (
+            compile_element(subj, "subj"),
+            compile_element(edge, "edge"),
+            compile_element(obj, "obj"),
+        )
+        cypher = f"CREATE (subj{s.labels} {s.props})"
+        cypher += f"-[edge{e.labels} {e.props}]->"
+        cypher += f"(obj{o.labels} {o.props})"
+        cypher += " RETURN ID(subj) as subj_id, ID(edge) as edge_id, ID(obj) as obj_id"
+        params = dict(**s.params, **e.params, **o.params)
+        return Relationship(**(await self.exec_data(cypher, params))[0])
+
+    async def merge_edge(self, subj: Node, rel: Edge, obj: Node):
+        """MERGE finds or creates a relationship between the nodes."""
+        s, r, o = (
+            compile_element(subj, "subject"),
+            compile_element(rel, "relation"),
+            compile_element(obj, "object"),
+        )
+        cypher = f"""
+            MERGE (subject{s.labels} {s.props})
+            MERGE (object{o.labels} {o.props})
+            MERGE (subject)-[relation{r.labels} {r.props}]->(object)
+            RETURN subject, relation, object"""
+        return await self.exec_data(cypher, dict(**s.params, **r.params, **o.params))
+
+    async def get_node(self, node: Node):
+        c = compile_element(node, "n")
+        where = f"where {c.where}" if c.where else ""
+        cypher = f"MATCH (n{c.labels}) {where} return n"
+        return [x["n"] for x in await self.exec_data(cypher, c.params)]
+
+    async def get_node_by_id(self, node_id: int):
+        cypher = "MATCH (n) WHERE ID(n) = $node_id RETURN n LIMIT 1"
+        data = await self.exec_data(cypher, {"node_id": node_id})
+        if data:
+            return data[0]["n"]
+
+    async def get_edge_by_id(self, edge_id: int):
+        cypher = "MATCH (n)-[r]->(m) WHERE ID(r) = $edge_id RETURN n,r,m LIMIT 1"
+        data = await self.exec_data(cypher, {"edge_id": edge_id})
+        if data:
+            return list(data[0].values())
+
+    async def add_node_label(self, label: str, props: dict):
+        """Add a label to a node."""
+        c = compile_element(Node(set(), props), "n")
+        cypher = f"""MATCH (n)
+            WHERE {c.where}
+            SET n{get_cypher_labels([label])}"""
+        return await self.__write(cypher, c.params)
+
+    async def remove_node_label(self, labels: Union[set[str], str], node_id):
+        """Remove a label(s) from a node."""
+        cypher_labels = get_cypher_labels(Node(labels).labels)
+        cypher = f"""MATCH (n{cypher_labels})
+            WHERE ID(n) = $node_id
+            REMOVE n{cypher_labels}"""
+        return await self.__write(cypher, {"node_id": node_id})
+
+    async def __delete_in_batches(
+        self, match: str, var: str, params: dict, batch_size: int, concurrency: int
+    ) -> int:
+        """Delete the nodes (`var` "n") or relationships of `match` in batches, see `Db`."""
+        is_node = var == "n"
+        delete = f"DETACH DELETE {var}" if is_node else f"DELETE {var}"
+        concurrent = f"{int(concurrency)} CONCURRENT " if concurrency > 1 else ""
+        cypher = f"""{match}
+            CALL {{ WITH {var} {delete} }}
+            IN {concurrent}TRANSACTIONS OF {int(batch_size)} ROWS"""
+        counters = await self.__write(cypher, params)
+        return counters["nodes_deleted" if is_node else "relationships_deleted"]
+
+    async def delete_nodes(
+        self,
+        node: Node,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+    ) -> int:
+        """Delete all nodes (and connected edges) with a specific label in batches.
+
+        Like `Db.delete_nodes`, `batch_size` nodes are deleted per transaction,
+        with `concurrency` > 1 in concurrent transactions on the server.
+        """
+        c = compile_element(node, "n")
+        where = f"WHERE {c.where}" if c.where else ""
+        match = f"MATCH (n{c.labels}) {where}"
+        return await self.__delete_in_batches(match, "n", c.params, batch_size, concurrency)
+
+    async def delete_edges(
+        self,
+        edge: Edge,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+    ) -> int:
+        """Delete edges by Edge class in batches, see `delete_nodes`."""
+        c = compile_element(edge, "r")
+        where = f"WHERE {c.where}" if c.where else ""
+        match = f"MATCH ()-[r{c.labels}]->() {where}"
+        return await self.__delete_in_batches(match, "r", c.params, batch_size, concurrency)
+
+    async def create_node_index(
+        self, label: str, prop_name: str, index_name: Optional[str] = None
+    ):
+        if index_name is None:
+            index_name = f"ix_{label}__{prop_name}"
+        cypher = f"CREATE INDEX {index_name} IF NOT EXISTS FOR (p:{label}) ON (p.{prop_name})"
+        return await self.__write(cypher)
+
+    async def create_edge_index(
+        self, label: str, prop_name: str, index_name: Optional[str] = None
+    ):
+        if index_name is None:
+            index_name = f"ix_{label}__{prop_name}"
+        cypher = f"CREATE INDEX {index_name} IF NOT EXISTS FOR ()-[k:{label}]-() ON (k.{prop_name})"
+        return await self.__write(cypher)
+
+    async def drop_node_index(self, index_name: str):
+        return await self.__write(f"DROP INDEX {index_name} IF EXISTS")
+
+    async def drop_constraint(self, constraint_name):
+        return await self.__write(f"DROP CONSTRAINT {constraint_name} IF EXISTS")
+
+    async def create_unique_constraint(
+        self, label: str, prop_name: str, constraint_name: Optional[str] = None
+    ):
+        if constraint_name is None:
+            constraint_name = f"uid_{label}__{prop_name}"
+        cypher = f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop_name} IS UNIQUE"
+        return await self.__write(cypher)
+
+    async def delete_unique_constraint(
+        self, label, prop_name, constraint_name: Optional[str] = None
+    ):
+        if constraint_name is None:
+            constraint_name = f"uid_{label}__{prop_name}"
+        return await self.__write(f"DROP CONSTRAINT {constraint_name} IF EXISTS")
+
+    async def __write_rows(self, cypher: LiteralString, rows: List[dict]) -> BatchResult:
+        data, counters = await self.__run(cypher, {"rows": rows})
+        return BatchResult([x["eid"] for x in data], counters)
+
+    async def __write_batches(
+        self, batches: Iterable[Tuple[LiteralString, List[dict]]], concurrency: int
+    ) -> list:
+        """Write (cypher, rows) batches with at most `concurrency` in flight.
+
+        Batches are pulled from `batches` only when a slot is free, so a
+        generator input is never fully materialized. Results are returned in
+        the order of `batches`.
+        """
+        results = {}
+        pending = set()
+
+        async def write(i: int, cypher: LiteralString, rows: List[dict]):
+            results[i] = await self.__write_rows(cypher, rows)
+
+        try:
+            for i, (cypher, rows) in enumerate(batches):
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()
+                pending.add(asyncio.ensure_future(write(i, cypher, rows)))
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+        return [results[i] for i in sorted(results)]
+
+    async def bulk_create_nodes(
+        self,
+        labels: Union[str, set[str]],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        batch_size: int = defaults.batch_size,
+        concurrency: int = 1,
+    ) -> List[BatchResult]:
+        """Create nodes in batches, see `Db.bulk_create_nodes`.
+
+        Up to `concurrency` batches are written at the same time.
+        """
+        cypher = get_bulk_create_nodes_cypher(labels)
+        batches = ((cypher, batch) for batch in get_batches(rows, batch_size))
+        return await self.__write_batches(batches, concurrency)
+
+    async def bulk_merge_nodes(
+        self,
+        labels: Union[str, set[str]],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        key: Union[str, List[str]],
+        batch_size: int = defaults.batch_size,
+        concurrency: int = 1,
+    ) -> List[BatchResult]:
+        """Merge nodes in batches, see `Db.bulk_merge_nodes`.
+
+        Up to `concurrency` batches are written at the same time. Batches with
+        the same key values in flight at once can lead to deadlocks, keep
+        `concurrency=1` if keys are not unique in `rows`.
+        """
+        keys = [key] if isinstance(key, str) else list(key)
+        cypher = get_bulk_merge_nodes_cypher(labels, keys)
+
+        def get_key_batches():
+            for batch in get_batches(rows, batch_size):
+                key_rows = get_rows_with_keys(batch, keys)
+                if key_rows:
+                    yield cypher, key_rows
+
+        return await self.__write_batches(get_key_batches(), concurrency)
+
+    async def bulk_merge_edges(
+        self,
+        triples_or_df: Union[Iterable[tuple[Node, Edge, Node]], pd.DataFrame],
+        subj_key: str,
+        obj_key: str,
+        batch_size: int = defaults.batch_size,
+        concurrency: int = 1,
+    ) -> List[Dict[str, int]]:
+        """Merge edges between existing nodes in batches, see `Db.bulk_merge_edges`.
+
+        Up to `concurrency` batches are written at the same time. Batches
+        touching the same nodes can deadlock if written concurrently.
+        """
+        batches = (
+            (get_bulk_merge_edges_cypher(group, subj_key, obj_key), rows)
+            for group, rows in iter_edge_batches(
+                triples_or_df, subj_key, obj_key, batch_size
+            )
+        )
+        results = await self.__write_batches(batches, concurrency)
+        return [x.counters for x in results]
@@ -0,0 +1,62 @@
+"""Small time-to-live cache for metadata and statistics queries."""
+import time
+from threading import Lock
+from typing import Optional, Callable, Any, Hashable
+
+
+class TTLCache:
+    """Cache values for `ttl` seconds.
+
+    A `ttl` of None or 0 disables caching, every `get` loads the value.
+
+    Parameters
+    ----------
+    ttl : Optional[float], optional
+        Default time to live in seconds, by default None
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.__values = {}
+        self.__lock = Lock()
+
+    def get(self, key: Hashable, load: Callable[[], Any], ttl: Optional[float] = None):
+        """Return the cached value of `key` or load and cache it.
+
+        Parameters
+        ----------
+        key : Hashable
+            Cache key
+        load : Callable[[], Any]
+            Function returning the value if not cached or expired
+        ttl : Optional[float], optional
+            Time to live for this call, by default the cache `ttl`
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl:
+            with self.__lock:
+                cached = self.__values.get(key)
+            if cached and time.monotonic() - cached[0] < ttl:
+                return cached[1]
+        value = load()
+        if ttl:
+            with self.__lock:
+                self.__values[key] = (time.monotonic(), value)
+        return value
+
+    def peek(self, key: Hashable, ttl: Optional[float] = None):
+        """Return the cached value of `key` without loading, None if not cached."""
+        ttl = self.ttl if ttl is None else ttl
+        with self.__lock:
+            cached = self.__values.get(key)
+        if ttl and cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+    def invalidate(self, *keys: Hashable):
+        """Remove `keys` from the cache, all entries if no key is given."""
+        with self.__lock:
+            if keys:
+                for key in keys:
+                    self.__values.pop(key, None)
+            else:
+                self.__values.clear()
@@ -0,0 +1,82 @@
+"""Local checkpoint files to resume long running imports."""
+import json
+import os
+from threading import Lock
+from typing import Optional, Iterable, Any
+
+import pandas as pd
+
+
+class Checkpoint:
+    """Number of committed rows of an import, persisted in a JSON file.
+
+    The file is written after every committed batch and removed when the
+    import finished. Rerunning an interrupted import with the same source
+    (in the same order) skips the committed rows.
+
+    Parameters
+    ----------
+    path : str
+        Path of the checkpoint file
+    import_id : str
+        Identifies the import (e.g. label and SQL query); a checkpoint file
+        of another import raises a ValueError instead of skipping rows.
+    """
+
+    def __init__(self, path: str, import_id: str):
+        self.path = path
+        self.import_id = import_id
+        self.rows = 0
+        self.batches = 0
+        self.key = None
+        self.__lock = Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("import_id") != import_id:
+                raise ValueError(
+                    f"Checkpoint {path} belongs to import {data.get('import_id')!r}, "
+                    "remove it to start a new import."
+                )
+            self.rows = data["rows"]
+            self.batches = data["batches"]
+            self.key = data.get("key")
+
+    def __str__(self):
+        return f"<neo4j_tools:Checkpoint {{rows: {self.rows}, batches: {self.batches}, key: {self.key}}}>"
+
+    def skip(self, batches: Iterable[Any]):
+        """Yield the batches (lists or DataFrames) without the committed rows."""
+        committed = self.rows
+        skipped = 0
+        for batch in batches:
+            if skipped + len(batch) <= committed:
+                skipped += len(batch)
+                continue
+            if skipped < committed:
+                start = committed - skipped
+                batch = batch.iloc[start:] if isinstance(batch, pd.DataFrame) else batch[start:]
+                skipped = committed
+            yield batch
+
+    def commit(self, rows: int, key: Optional[Any] = None):
+        """Add `rows` committed rows and write the checkpoint file atomically."""
+        with self.__lock:
+            self.rows += rows
+            self.batches += 1
+            self.key = key
+            data = {
+                "import_id": self.import_id,
+                "rows": self.rows,
+                "batches": self.batches,
+                "key": key,
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """Remove the checkpoint file after the import finished."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -21,7 +21,15 @@ def main():
 @click.option('-s', '--server', default='localhost', help="Server name")
 @click.option('-o', '--port', default='7687', help="Server port")
 @click.option('-i', '--import_folder', default="/opt/neo4j/import/", help="Path to import folder")
-def set_neo_config(user: str, password: str, database: str, server: str, port: str, import_folder: str):
+@click.option('--max_connection_pool_size', type=int, help="Maximum number of connections per host")
+@click.option('--connection_acquisition_timeout', type=float,
+              help="Seconds to wait for a connection from the pool")
+@click.option('--max_transaction_retry_time', type=float,
+              help="Seconds managed transactions are retried")
+@click.option('--fetch_size', type=int, help="Number of records fetched per round trip")
+def set_neo_config(user: str, password: str, database: str, server: str, port: str, import_folder: str,
+                   max_connection_pool_size: int, connection_acquisition_timeout: float,
+                   max_transaction_retry_time: float, fetch_size: int):
     """Set Neo4J tools settings."""
     config.set_neo_config(
         user=user,
@@ -29,5 +37,9 @@ def set_neo_config(user: str, password: str, database: str, server: str, port: s
         database=database,
         server=server,
         port=int(port),
-        import_folder=import_folder
+        import_folder=import_folder,
+        max_connection_pool_size=max_connection_pool_size,
+        connection_acquisition_timeout=connection_acquisition_timeout,
+        max_transaction_retry_time=max_transaction_retry_time,
+        fetch_size=fetch_size,
     )
\ No newline at end of file
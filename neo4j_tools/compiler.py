@@ -0,0 +1,118 @@
+"""Compile Node/Edge filters to stable Cypher templates with parameters.
+
+Values are never written into the query text. A query only depends on the
+labels and the property names (and which of them are null) of an element, so
+Neo4J can reuse the cached query plan for all values and the templates are
+cached on the client.
+
+Example
+-------
+>>> c = compile_element(Node("Person", {"name": "Ada"}), "n")
+>>> f"MATCH (n{c.labels}) WHERE {c.where} RETURN n", c.params
+('MATCH (n:`Person`) WHERE n.`name` = $n_0 RETURN n', {'n_0': 'Ada'})
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional, Iterable, Tuple
+
+import numpy as np
+
+CompiledElement = namedtuple("CompiledElement", ["labels", "props", "where", "params"])
+
+
+def quote_name(name: str) -> str:
+    """Quote a label, type or property name with backticks."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def get_param_value(value):
+    """Convert a value to a type the Bolt driver accepts as parameter.
+
+    numpy scalars and arrays are converted to Python types, NaN to None.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    elif isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def get_param_props(props: Optional[dict]) -> dict:
+    """Convert dictionary to properties usable as query parameter.
+
+    In contrast to `get_cypher_props` no string is built, values are only
+    converted and None/NaN values are dropped.
+    """
+    param_props = {}
+    if props:
+        for k, v in props.items():
+            v = get_param_value(v)
+            if v is not None:
+                param_props[k] = v
+    return param_props
+
+
+@lru_cache(maxsize=4096)
+def get_labels_template(labels: Tuple[str, ...]) -> str:
+    """Return `:`A`:`B`` for labels/types, an empty string for no labels."""
+    return "".join([f":{quote_name(x)}" for x in labels])
+
+
+@lru_cache(maxsize=4096)
+def get_props_template(var: str, shape: Tuple[Tuple[str, bool], ...]) -> str:
+    """Return `{`a`: $n_0, ...}` for the not null properties of `shape`."""
+    props = [
+        f"{quote_name(k)}: ${var}_{i}" for i, (k, is_null) in enumerate(shape) if not is_null
+    ]
+    return "{" + ", ".join(props) + "}" if props else ""
+
+
+@lru_cache(maxsize=4096)
+def get_where_template(var: str, shape: Tuple[Tuple[str, bool], ...]) -> str:
+    """Return `n.`a` = $n_0 AND n.`b` IS NULL ...` for the properties of `shape`."""
+    return " AND ".join(
+        [
+            f"{var}.{quote_name(k)} IS NULL" if is_null else f"{var}.{quote_name(k)} = ${var}_{i}"
+            for i, (k, is_null) in enumerate(shape)
+        ]
+    )
+
+
+def get_labels_key(labels: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(sorted(x.strip() for x in labels if x.strip()))
+
+
+def get_labels_from_template(template: str) -> Tuple[str, ...]:
+    """Return the labels of a template built by `get_labels_template`."""
+    return tuple(x.replace("``", "`") for x in re.findall(r":`((?:[^`]|``)*)`", template))
+
+
+def compile_element(element, var: str) -> CompiledElement:
+    """Compile a `Node` or `Edge` to templates and parameters.
+
+    Parameters
+    ----------
+    element : GraphElement
+        Node or Edge with labels and properties
+    var : str
+        Variable name of the element in the query, also used as prefix of the
+        parameter names
+
+    Returns
+    -------
+    CompiledElement
+        `labels` (e.g. ":`A`:`B`"), `props` (map pattern of the not null
+        properties for CREATE/MERGE, e.g. "{`a`: $n_0}"), `where` (condition
+        for all properties, empty if none) and `params`
+    """
+    items = [(k, get_param_value(v)) for k, v in (element.props or {}).items()]
+    shape = tuple((k, v is None) for k, v in items)
+    return CompiledElement(
+        get_labels_template(get_labels_key(element.labels)),
+        get_props_template(var, shape),
+        get_where_template(var, shape),
+        {f"{var}_{i}": v for i, (k, v) in enumerate(items) if v is not None},
+    )
@@ -2,6 +2,7 @@ import os
 import logging
 from neo4j_tools import defaults
 from configparser import RawConfigParser
+from typing import Optional
 
 def set_neo_config(
     user: str,
@@ -10,16 +11,25 @@ def set_neo_config(
     server="localhost",
     port=7687,
     import_folder="/opt/neo4j/import/",
+    max_connection_pool_size: Optional[int] = None,
+    connection_acquisition_timeout: Optional[float] = None,
+    max_transaction_retry_time: Optional[float] = None,
+    fetch_size: Optional[int] = None,
 ):
     config_dict = {
         'user': user,
         'password': password,
         'database': database,
         'uri': f"bolt://{server}:{port}",
-        'import_folder': import_folder       
+        'import_folder': import_folder,
+        'max_connection_pool_size': max_connection_pool_size,
+        'connection_acquisition_timeout': connection_acquisition_timeout,
+        'max_transaction_retry_time': max_transaction_retry_time,
+        'fetch_size': fetch_size,
     }
     for param, value in config_dict.items():
-        write_to_config('NEO4J', param, value)
+        if value is not None:
+            write_to_config('NEO4J', param, str(value))
 
 
 def write_to_config(section: str, option: str, value: str) -> None:
@@ -39,6 +49,7 @@ def write_to_config(section: str, option: str, value: str) -> None:
         config = RawConfigParser()
 
         if not os.path.exists(cfp):
+            os.makedirs(os.path.dirname(cfp), exist_ok=True)
             with open(cfp, 'w') as config_file:
                 config[section] = {option: value}
                 config.write(config_file)
@@ -2,13 +2,63 @@ import os
 
 HOME = os.path.expanduser('~')
 PROJECT_NAME = 'neo4j_tools'
-# Path to folder
+# Path to folder, created when the config file is written
 PROJECT_DIR = os.path.join(HOME, f".{PROJECT_NAME}")
-if not os.path.exists(PROJECT_DIR):
-    os.mkdir(PROJECT_DIR)
 
 """This file contains default values for configurations and parameters."""
 
 ###############################################################################
 # Config
-config_file_path = os.path.join(PROJECT_DIR, 'config.ini')
\ No newline at end of file
+config_file_path = os.path.join(PROJECT_DIR, 'config.ini')
+
+###############################################################################
+# Bulk writes
+# Number of rows sent in one parameterized UNWIND query
+batch_size = 1000
+
+###############################################################################
+# Async
+# Maximum number of queries in flight at once in `AsyncDb.gather`
+max_concurrency = 8
+
+###############################################################################
+# Parallel loading
+# Number of worker threads, each with its own session
+workers = 4
+# Maximum number of retries of a batch failing with a transient error
+max_retries = 5
+# Seconds to wait before the first retry, doubled for every further retry
+retry_backoff = 0.5
+
+###############################################################################
+# Reading
+# Number of records fetched per round trip when streaming results
+fetch_size = 1000
+# Number of records fetched per round trip when paging through nodes or edges
+page_size = 10000
+
+###############################################################################
+# Caching
+# Seconds metadata (schema, labels, types, databases, indexes) is cached by `Db`
+metadata_ttl = 60
+
+###############################################################################
+# File import
+# Number of CSV lines per transaction in `LOAD CSV ... IN TRANSACTIONS`
+csv_batch_size = 10000
+# Number of rows read at once by the client-side file loaders
+file_chunksize = 50000
+# Maximum number of rows per data file written for `neo4j-admin database import`
+shard_size = 1000000
+
+###############################################################################
+# Deleting
+# Number of nodes or relationships deleted per transaction
+delete_batch_size = 10000
+# Number of relationships from which a node's relationships are deleted in slices first
+supernode_degree = 10000
+
+###############################################################################
+# Indexes
+# Seconds to wait for created indexes to come online
+index_timeout = 300
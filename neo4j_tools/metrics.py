@@ -0,0 +1,391 @@
+"""Opt-in query instrumentation for `Db`.
+
+`Db.enable_metrics()` wraps the sessions of a `Db`, so every query records
+latency, returned rows, server timings, update counters and errors per `Db`
+method and per query template (the Cypher text, values are parameters).
+Without metrics the sessions are used unwrapped.
+
+Example
+-------
+>>> metrics = db.enable_metrics()
+>>> db.node_labels
+>>> metrics.snapshot()["methods"]["node_labels"]["count"]
+1
+>>> print(metrics.to_prometheus())
+"""
+import functools
+import hashlib
+import json
+import re
+import sys
+import time
+import weakref
+from collections import namedtuple
+from threading import Lock
+from typing import Optional, List, Dict, Callable, Iterable, Any
+
+from neo4j_tools.neo4j_tools import get_counters, retryable_errors
+
+QueryEvent = namedtuple(
+    "QueryEvent",
+    [
+        "method",
+        "query",
+        "seconds",
+        "rows",
+        "counters",
+        "available_after_ms",
+        "consumed_after_ms",
+        "error",
+    ],
+)
+
+# upper bounds of the latency histogram buckets in seconds
+latency_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def get_query_template(query: str) -> str:
+    """Return the query with normalized whitespace."""
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def get_query_hash(query: str) -> str:
+    """Return a short hash of the query with string and number literals replaced by `?`.
+
+    Used as Prometheus label instead of the query text, which has no bounded
+    length and no bounded number of values if literals are inlined.
+    """
+    normalized = re.sub(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"", "?", get_query_template(query))
+    normalized = re.sub(r"\b\d+(?:\.\d+)?\b", "?", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def get_prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class QueryStats:
+    """Latency histogram and totals of one method or query template."""
+
+    def __init__(self, buckets: Iterable[float] = latency_buckets):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.available_after_ms = 0
+        self.consumed_after_ms = 0
+        self.counters: Dict[str, int] = {}
+
+    def add(self, event: QueryEvent):
+        self.count += 1
+        self.seconds += event.seconds
+        self.max_seconds = max(self.max_seconds, event.seconds)
+        self.rows += event.rows
+        self.available_after_ms += event.available_after_ms or 0
+        self.consumed_after_ms += event.consumed_after_ms or 0
+        i = 0
+        while i < len(self.buckets) and event.seconds > self.buckets[i]:
+            i += 1
+        self.bucket_counts[i] += 1
+        if event.error is not None:
+            self.errors += 1
+            if isinstance(event.error, retryable_errors):
+                self.retries += 1
+        for name, value in (event.counters or {}).items():
+            if value:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rows": self.rows,
+            "seconds": self.seconds,
+            "mean_seconds": self.seconds / self.count if self.count else 0.0,
+            "max_seconds": self.max_seconds,
+            "available_after_ms": self.available_after_ms,
+            "consumed_after_ms": self.consumed_after_ms,
+            "counters": dict(self.counters),
+            "buckets": buckets,
+        }
+
+
+def merge_stats(stats: List[dict]) -> dict:
+    """Sum the `QueryStats.as_dict` of several templates, as far as Prometheus exports it."""
+    merged = {"count": 0, "seconds": 0.0, "buckets": dict.fromkeys(stats[0]["buckets"], 0)}
+    for item in stats:
+        merged["count"] += item["count"]
+        merged["seconds"] += item["seconds"]
+        for bound, count in item["buckets"].items():
+            merged["buckets"][bound] += count
+    return merged
+
+
+class Metrics:
+    """Thread-safe collection of query events.
+
+    Parameters
+    ----------
+    hooks : Optional[List[Callable[[QueryEvent], Any]]], optional
+        Functions called with every `QueryEvent`, by default None
+    buckets : Iterable[float], optional
+        Upper bounds of the latency histogram buckets in seconds
+    """
+
+    def __init__(
+        self,
+        hooks: Optional[List[Callable[[QueryEvent], Any]]] = None,
+        buckets: Iterable[float] = latency_buckets,
+    ):
+        self.hooks = list(hooks or [])
+        self.buckets = tuple(buckets)
+        self.__methods: Dict[str, QueryStats] = {}
+        self.__queries: Dict[str, QueryStats] = {}
+        self.__lock = Lock()
+
+    def record(self, event: QueryEvent):
+        with self.__lock:
+            for stats, key in ((self.__methods, event.method), (self.__queries, event.query)):
+                if key not in stats:
+                    stats[key] = QueryStats(self.buckets)
+                stats[key].add(event)
+        for hook in self.hooks:
+            hook(event)
+
+    def reset(self):
+        with self.__lock:
+            self.__methods.clear()
+            self.__queries.clear()
+
+    def snapshot(self) -> dict:
+        """Return the statistics by `Db` method and by query template."""
+        with self.__lock:
+            return {
+                "methods": {k: v.as_dict() for k, v in self.__methods.items()},
+                "queries": {k: v.as_dict() for k, v in self.__queries.items()},
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "neo4j_tools") -> str:
+        """Return the statistics in the Prometheus text exposition format.
+
+        Query templates are labelled with `get_query_hash` (`query_hash`), the
+        hash of a template in `snapshot()["queries"]` identifies its series.
+        Templates differing only in literals share one series.
+        """
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_query_seconds Client side query latency",
+            f"# TYPE {prefix}_query_seconds histogram",
+        ]
+        by_hash: Dict[str, List[dict]] = {}
+        for query, stats in snapshot["queries"].items():
+            by_hash.setdefault(get_query_hash(query), []).append(stats)
+        query_stats = {
+            key: stats[0] if len(stats) == 1 else merge_stats(stats)
+            for key, stats in by_hash.items()
+        }
+        for label, group in (("method", snapshot["methods"]), ("query_hash", query_stats)):
+            for key, stats in group.items():
+                labels = f'{label}="{get_prometheus_label(key)}"'
+                for bound, count in stats["buckets"].items():
+                    le = "+Inf" if bound == "inf" else bound
+                    lines.append(f'{prefix}_query_seconds_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{prefix}_query_seconds_sum{{{labels}}} {stats['seconds']}")
+                lines.append(f"{prefix}_query_seconds_count{{{labels}}} {stats['count']}")
+        for name, kind, help in (
+            ("rows", "rows", "Returned records"),
+            ("errors", "errors", "Failed queries"),
+            ("retries", "retries", "Queries failed with a transient error"),
+        ):
+            lines.append(f"# HELP {prefix}_query_{name}_total {help}")
+            lines.append(f"# TYPE {prefix}_query_{name}_total counter")
+            for method, stats in snapshot["methods"].items():
+                labels = f'method="{get_prometheus_label(method)}"'
+                lines.append(f"{prefix}_query_{name}_total{{{labels}}} {stats[kind]}")
+        lines.append(f"# HELP {prefix}_updates_total Update counters of write queries")
+        lines.append(f"# TYPE {prefix}_updates_total counter")
+        for method, stats in snapshot["methods"].items():
+            for counter, value in stats["counters"].items():
+                labels = f'method="{get_prometheus_label(method)}",counter="{counter}"'
+                lines.append(f"{prefix}_updates_total{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+@functools.lru_cache(maxsize=None)
+def get_public_names(cls) -> frozenset:
+    return frozenset(name for name in dir(cls) if not name.startswith("_"))
+
+
+def get_caller_method(owner) -> str:
+    """Return the name of the innermost public method of `owner` on the stack."""
+    methods = get_public_names(type(owner))
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name in methods and frame.f_locals.get("self") is owner:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryRecorder:
+    """Records the `QueryEvent` of one query exactly once."""
+
+    def __init__(self, metrics: Metrics, method: str, query: str, start: float):
+        self.metrics = metrics
+        self.method = method
+        self.query = query
+        self.start = start
+        self.rows = 0
+        self.recorded = False
+
+    def record(
+        self,
+        summary=None,
+        error: Optional[BaseException] = None,
+        end: Optional[float] = None,
+    ):
+        if self.recorded:
+            return
+        self.recorded = True
+        self.metrics.record(
+            QueryEvent(
+                self.method,
+                self.query,
+                (end if end is not None else time.perf_counter()) - self.start,
+                self.rows,
+                get_counters(summary) if summary is not None else {},
+                getattr(summary, "result_available_after", None),
+                getattr(summary, "result_consumed_after", None),
+                error,
+            )
+        )
+
+
+class InstrumentedResult:
+    """Result recording a `QueryEvent` when it is consumed or exhausted.
+
+    A result which is dropped unconsumed, like the return value of
+    `Db.create_node_index`, is recorded when it is garbage collected, with the
+    time until `run` returned and without a summary. The finalizer never talks
+    to the server, so errors still surface where the driver raises them.
+    """
+
+    def __init__(self, result, metrics: Metrics, method: str, query: str, start: float):
+        self.__result = result
+        self.__recorder = QueryRecorder(metrics, method, query, start)
+        weakref.finalize(self, self.__recorder.record, end=time.perf_counter())
+
+    def __record(self, summary=None, error: Optional[BaseException] = None):
+        if self.__recorder.recorded:
+            return
+        if summary is None and error is None:
+            try:
+                summary = self.__result.consume()
+            except BaseException as e:
+                error = e
+        self.__recorder.record(summary, error)
+
+    def __iter__(self):
+        try:
+            for record in self.__result:
+                self.__recorder.rows += 1
+                yield record
+        except BaseException as e:
+            self.__record(error=e)
+            raise
+        self.__record()
+
+    def __fetch_all(self, name: str, *args, **kwargs):
+        try:
+            value = getattr(self.__result, name)(*args, **kwargs)
+        except BaseException as e:
+            self.__record(error=e)
+            raise
+        self.__recorder.rows += len(value) if isinstance(value, list) else int(value is not None)
+        self.__record()
+        return value
+
+    def data(self, *keys):
+        return self.__fetch_all("data", *keys)
+
+    def values(self, *keys):
+        return self.__fetch_all("values", *keys)
+
+    def single(self, *args, **kwargs):
+        return self.__fetch_all("single", *args, **kwargs)
+
+    def consume(self):
+        try:
+            summary = self.__result.consume()
+        except BaseException as e:
+            self.__record(error=e)
+            raise
+        self.__record(summary)
+        return summary
+
+    def __getattr__(self, name):
+        return getattr(self.__result, name)
+
+
+class InstrumentedRunner:
+    """Session or transaction whose `run` returns an `InstrumentedResult`."""
+
+    def __init__(self, runner, metrics: Metrics, owner):
+        self._runner = runner
+        self._metrics = metrics
+        self._owner = owner
+
+    def run(self, query, parameters=None, **kwargs):
+        method = get_caller_method(self._owner)
+        query_template = get_query_template(str(query))
+        start = time.perf_counter()
+        try:
+            result = self._runner.run(query, parameters, **kwargs)
+        except BaseException as e:
+            self._metrics.record(
+                QueryEvent(
+                    method, query_template, time.perf_counter() - start, 0, {}, None, None, e
+                )
+            )
+            raise
+        return InstrumentedResult(result, self._metrics, method, query_template, start)
+
+    def __getattr__(self, name):
+        return getattr(self._runner, name)
+
+
+class InstrumentedSession(InstrumentedRunner):
+    """Session instrumenting auto-commit queries and managed transactions."""
+
+    def __execute(self, execute, work, *args, **kwargs):
+        def instrumented_work(tx, *work_args, **work_kwargs):
+            return work(
+                InstrumentedRunner(tx, self._metrics, self._owner), *work_args, **work_kwargs
+            )
+
+        return execute(instrumented_work, *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return self.__execute(self._runner.execute_write, work, *args, **kwargs)
+
+    def execute_read(self, work, *args, **kwargs):
+        return self.__execute(self._runner.execute_read, work, *args, **kwargs)
+
+    def __enter__(self):
+        self._runner.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._runner.__exit__(*exc)
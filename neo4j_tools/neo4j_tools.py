@@ -3,12 +3,11 @@
 import os
 import warnings
 import logging
-from neo4j import basic_auth, AsyncGraphDatabase, GraphDatabase
+from neo4j import basic_auth, GraphDatabase
+from neo4j.exceptions import ClientError, TransientError, SessionExpired, ServiceUnavailable
 import json
 import pandas as pd
-from typing import Optional, List, Dict, Iterable, Union, Any
-import networkx as nx
-from yfiles_jupyter_graphs import GraphWidget
+from typing import Optional, List, Dict, Iterable, Union, Any, Callable, Tuple
 
 # from sqlalchemy import create_engine
 import pandas as pd
@@ -17,16 +16,53 @@ import pandas as pd
 import configparser
 from tqdm import tqdm
 from collections import namedtuple
+from itertools import islice
+from queue import Queue
+from threading import Thread
 
 # from pymysql import cursors
 import numpy as np
 import re
+import sys
+import functools
+import threading
+import weakref
+import random
+import time
+import array
+import csv
+import uuid
+from contextlib import contextmanager
 from typing_extensions import LiteralString
 from neo4j_tools import defaults
-
-from IPython.core.display import SVG, display, Image
-
-Config = namedtuple("Config", ["uri", "user", "password", "import_folder", "database"])
+from neo4j_tools.advisor import IndexAdvisor, Shape, get_covering_index
+from neo4j_tools.cache import TTLCache
+from neo4j_tools.checkpoint import Checkpoint
+from neo4j_tools.compiler import (
+    compile_element,
+    get_labels_from_template,
+    get_labels_key,
+    get_labels_template,
+    get_param_props,
+    get_param_value,
+    quote_name,
+)
+
+logger = logging.getLogger(__name__)
+
+Config = namedtuple(
+    "Config", ["uri", "user", "password", "import_folder", "database", "driver_config"]
+)
+
+# driver settings read from the config file with their types
+driver_options = {
+    "max_connection_pool_size": int,
+    "connection_acquisition_timeout": float,
+    "connection_timeout": float,
+    "max_connection_lifetime": float,
+    "max_transaction_retry_time": float,
+    "fetch_size": int,
+}
 
 
 def get_config(config_file_path: str) -> Config:
@@ -36,15 +72,27 @@ def get_config(config_file_path: str) -> Config:
     else:
         # shortcut used
         file_path = os.path.join(defaults.PROJECT_DIR, f"config.{config_file_path}.ini")
+    mtime = os.path.getmtime(file_path) if os.path.exists(file_path) else None
+    return read_config(file_path, mtime)
+
 
+@functools.lru_cache(maxsize=32)
+def read_config(file_path: str, mtime: Optional[float]) -> Config:
+    """Parse a config file, cached until its modification time changes."""
     config = configparser.ConfigParser()
     config.read(file_path)
+    driver_config = {
+        option: cast(config["NEO4J"][option])
+        for option, cast in driver_options.items()
+        if config["NEO4J"].get(option)
+    }
     return Config(
         config["NEO4J"]["uri"],
         config["NEO4J"]["user"],
         config["NEO4J"]["password"],
         config["NEO4J"].get("import_folder", None),
         config["NEO4J"].get("database", None),
+        driver_config,
     )
 
 
@@ -76,6 +124,253 @@ def get_cypher_props(props: Optional[dict]):
     return props_str
 
 
+BatchResult = namedtuple("BatchResult", ["element_ids", "counters"])
+
+counter_names = [
+    "nodes_created",
+    "nodes_deleted",
+    "relationships_created",
+    "relationships_deleted",
+    "properties_set",
+    "labels_added",
+    "labels_removed",
+    "indexes_added",
+    "indexes_removed",
+    "constraints_added",
+    "constraints_removed",
+]
+
+
+def get_counters(summary) -> Dict[str, int]:
+    """Return the update counters of a result summary as dictionary."""
+    return {name: getattr(summary.counters, name, 0) for name in counter_names}
+
+
+retryable_errors = (TransientError, SessionExpired, ServiceUnavailable)
+
+
+def call_with_retry(
+    func: Callable[[], Any],
+    max_retries: int = defaults.max_retries,
+    backoff: float = defaults.retry_backoff,
+) -> Tuple[Any, int]:
+    """Call `func`, retry on transient errors (e.g. deadlocks, leader switches).
+
+    Waits `backoff` * 2^attempt seconds (with jitter) between attempts.
+
+    Returns
+    -------
+    Tuple[Any, int]
+        Return value of `func` and number of retries needed
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func(), attempt
+        except retryable_errors as e:
+            if attempt == max_retries:
+                raise
+            wait = backoff * 2**attempt * (1 + random.random())
+            logger.info(f"Retry in {wait:.2f}s after {type(e).__name__}: {e}")
+            time.sleep(wait)
+
+
+def run_with_retry(
+    session,
+    cypher: LiteralString,
+    params: Optional[dict] = None,
+    max_retries: int = defaults.max_retries,
+    backoff: float = defaults.retry_backoff,
+) -> Tuple[Dict[str, int], int]:
+    """Run a write query in a managed transaction (`execute_write`) with retries.
+
+    The driver already retries the transaction function for
+    `max_transaction_retry_time`; errors still raised after that are retried
+    by `call_with_retry`.
+
+    Returns
+    -------
+    Tuple[Dict[str, int], int]
+        Update counters and number of retries needed
+    """
+
+    def work(tx):
+        return get_counters(tx.run(cypher, parameters=params).consume())
+
+    return call_with_retry(lambda: session.execute_write(work), max_retries, backoff)
+
+
+def get_frame_values(series: pd.Series) -> list:
+    """Convert a column to parameter values, object columns value by value."""
+    values = series.tolist()
+    if series.dtype == object:
+        values = [get_param_value(v) for v in values]
+    return values
+
+
+def get_frame_rows(df: pd.DataFrame) -> List[dict]:
+    """Convert a DataFrame to parameter rows column by column.
+
+    Numeric, bool and datetime columns are converted to Python values with one
+    `tolist` per column, only object columns are converted value by value.
+    Missing values (None, NaN, NaT) are dropped like in `get_param_props`.
+    """
+    names = [str(name) for name in df.columns]
+    if not names:
+        return [{} for _ in range(len(df))]
+    columns = []
+    has_missing = False
+    for i in range(len(names)):
+        series = df.iloc[:, i]
+        values = get_frame_values(series)
+        isna = series.isna().to_numpy()
+        if isna.any():
+            has_missing = True
+            values = [None if missing else v for v, missing in zip(values, isna)]
+        columns.append(values)
+    if not has_missing:
+        return [dict(zip(names, values)) for values in zip(*columns)]
+    return [
+        {k: v for k, v in zip(names, values) if v is not None} for values in zip(*columns)
+    ]
+
+
+def get_param_frame(
+    df: pd.DataFrame,
+    standardize_names: bool = True,
+    dtypes: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Prepare a DataFrame column by column for `get_frame_rows`.
+
+    Columns are cast with `dtypes` (by original column name), categorical
+    columns are converted to their values and column names are converted with
+    `get_standard_name`.
+    """
+    if dtypes:
+        df = df.astype(dtypes)
+    categorical = [c for c, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if categorical:
+        df = df.astype({c: object for c in categorical})
+    if standardize_names:
+        df = df.rename(columns=lambda x: get_standard_name(str(x)))
+        if df.columns.duplicated().any():
+            duplicated = set(df.columns[df.columns.duplicated()])
+            raise ValueError(f"Columns {duplicated} have the same standard name.")
+    return df
+
+
+def get_batches(
+    rows: Union[Iterable[dict], pd.DataFrame], batch_size: int = defaults.batch_size
+):
+    """Yield lists of property dictionaries with a maximum length of `batch_size`.
+
+    `rows` can be any iterable of dictionaries (list, generator, ...) or a
+    pandas DataFrame. Only one batch is held in memory at a time.
+    """
+    if isinstance(rows, pd.DataFrame):
+        for i in range(0, len(rows), batch_size):
+            yield get_frame_rows(rows.iloc[i : i + batch_size])
+    else:
+        iterator = iter(rows)
+        while True:
+            batch = [get_param_props(row) for row in islice(iterator, batch_size)]
+            if not batch:
+                break
+            yield batch
+
+
+def get_raw_batches(
+    rows: Union[Iterable[dict], pd.DataFrame], batch_size: int = defaults.batch_size
+):
+    """Yield lists of row dictionaries like `get_batches`, keeping missing values."""
+    if isinstance(rows, pd.DataFrame):
+        for i in range(0, len(rows), batch_size):
+            yield rows.iloc[i : i + batch_size].to_dict("records")
+    else:
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            yield batch
+
+
+def fetch_batches(cursor, batch_size: int = defaults.batch_size):
+    """Yield rows of an executed DB-API cursor as lists of dictionaries.
+
+    Rows are fetched with `fetchmany`, tuple rows are converted with the
+    column names in `cursor.description`.
+    """
+    columns = None
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        if not isinstance(rows[0], dict):
+            columns = columns or [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in rows]
+        yield rows
+
+
+def is_buffered_cursor(cursor) -> bool:
+    """Return True for pymysql cursors which load the whole result on `execute`.
+
+    Only the unbuffered `pymysql.cursors.SSCursor` and `SSDictCursor` fetch
+    rows from the server when `fetchmany` is called.
+    """
+    cursors = sys.modules.get("pymysql.cursors")
+    return (
+        cursors is not None
+        and isinstance(cursor, cursors.Cursor)
+        and not isinstance(cursor, cursors.SSCursor)
+    )
+
+
+def consume_in_background(
+    items: Iterable,
+    consume: Callable[[Any], Any],
+    queue_size: int = 4,
+    on_exit: Optional[Callable[[], Any]] = None,
+) -> None:
+    """Iterate `items` in the calling thread and `consume` them in a worker thread.
+
+    Items are passed through a queue with at most `queue_size` entries, so
+    producing blocks if consuming falls behind. The first exception raised by
+    `consume` stops the iteration and is re-raised. `on_exit` is called in
+    the worker thread before it ends, e.g. to close its session.
+    """
+    queue = Queue(maxsize=queue_size)
+    errors = []
+    done = object()
+
+    def worker():
+        try:
+            while True:
+                item = queue.get()
+                if item is done:
+                    break
+                if not errors:
+                    try:
+                        consume(item)
+                    except BaseException as e:
+                        errors.append(e)
+        finally:
+            if on_exit is not None:
+                on_exit()
+
+    thread = Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        for item in items:
+            if errors:
+                break
+            queue.put(item)
+    finally:
+        queue.put(done)
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
 # define Node and Edge classes
 class GraphElement:
     def __init__(self, labels: Union[str, set[str]], props: Optional[dict] = None):
@@ -118,6 +413,377 @@ class Edge(GraphElement):
         super().__init__(labels, props)
 
 
+def get_cypher_labels(labels: Iterable[str]) -> str:
+    """Return quoted labels/types with leading colons (cached template)."""
+    return get_labels_template(get_labels_key(labels))
+
+
+def iter_edge_rows(
+    triples_or_df: Union[Iterable[tuple[Node, Edge, Node]], pd.DataFrame],
+    subj_key: str,
+    obj_key: str,
+    batch_size: int = defaults.batch_size,
+):
+    """Yield ((subject labels, type, object labels), row) for each edge.
+
+    See `Db.bulk_merge_edges` for the accepted input.
+    """
+    if isinstance(triples_or_df, pd.DataFrame):
+        for i in range(0, len(triples_or_df), batch_size):
+            chunk = triples_or_df.iloc[i : i + batch_size]
+            for record in get_frame_rows(chunk):
+                group = (
+                    get_cypher_labels(Node(record.pop("subj_labels")).labels),
+                    get_cypher_labels(Edge(record.pop("rel_type")).labels),
+                    get_cypher_labels(Node(record.pop("obj_labels")).labels),
+                )
+                row = {
+                    "subj": record.pop("subj", None),
+                    "obj": record.pop("obj", None),
+                    "props": record,
+                }
+                yield group, row
+    else:
+        for subj, edge, obj in triples_or_df:
+            group = (
+                get_cypher_labels(subj.labels),
+                get_cypher_labels(edge.labels),
+                get_cypher_labels(obj.labels),
+            )
+            row = {
+                "subj": get_param_value(subj.props[subj_key]),
+                "obj": get_param_value(obj.props[obj_key]),
+                "props": get_param_props(edge.props),
+            }
+            yield group, row
+
+
+def iter_edge_batches(
+    triples_or_df: Union[Iterable[tuple[Node, Edge, Node]], pd.DataFrame],
+    subj_key: str,
+    obj_key: str,
+    batch_size: int = defaults.batch_size,
+):
+    """Yield (group, rows) with at most `batch_size` edge rows of the same group.
+
+    A group is (subject labels, relationship type, object labels).
+    """
+    rows_by_group: Dict[tuple, List[dict]] = {}
+    for group, row in iter_edge_rows(triples_or_df, subj_key, obj_key, batch_size):
+        rows = rows_by_group.setdefault(group, [])
+        rows.append(row)
+        if len(rows) >= batch_size:
+            yield group, rows_by_group.pop(group)
+    yield from rows_by_group.items()
+
+
+def get_rows_with_keys(rows: List[dict], keys: List[str]) -> List[dict]:
+    """Return the rows containing all key properties, log the number of others.
+
+    Merging on only some properties of a composite key would match unrelated
+    nodes sharing them, so rows missing any key property are skipped.
+    """
+    key_rows = [row for row in rows if all(k in row for k in keys)]
+    if len(key_rows) < len(rows):
+        logger.warning(f"Skipped {len(rows) - len(key_rows)} rows without all of {keys}")
+    return key_rows
+
+
+def get_bulk_create_nodes_cypher(labels: Union[str, set[str]]) -> str:
+    return (
+        f"UNWIND $rows AS row CREATE (n{get_cypher_labels(Node(labels).labels)}) "
+        "SET n += row RETURN elementId(n) AS eid"
+    )
+
+
+def get_bulk_merge_nodes_cypher(labels: Union[str, set[str]], keys: Iterable[str]) -> str:
+    merge_props = ", ".join([f"{quote_name(k)}: row.{quote_name(k)}" for k in keys])
+    cypher_labels = get_cypher_labels(Node(labels).labels)
+    return (
+        f"UNWIND $rows AS row MERGE (n{cypher_labels} {{{merge_props}}}) "
+        "SET n += row RETURN elementId(n) AS eid"
+    )
+
+
+def get_bulk_merge_edges_cypher(group: tuple, subj_key: str, obj_key: str) -> str:
+    subj_labels, rel_type, obj_labels = group
+    return f"""UNWIND $rows AS row
+        MATCH (a{subj_labels} {{{quote_name(subj_key)}: row.subj}})
+        MATCH (b{obj_labels} {{{quote_name(obj_key)}: row.obj}})
+        MERGE (a)-[r{rel_type}]->(b)
+        SET r += row.props"""
+
+
+update_modes = ("merge", "replace", "remove")
+
+
+@functools.lru_cache(maxsize=1024)
+def get_bulk_update_props_cypher(
+    labels: str, key: Optional[str], mode: str, remove_props: Tuple[str, ...] = ()
+) -> str:
+    """Return an UNWIND query updating the properties of nodes matched by key.
+
+    Rows are `{"key": ..., "props": {...}}`, a `key` of None matches
+    `elementId(n)`. `labels` is a cypher labels template (e.g. ":`A`").
+    """
+    if key is None:
+        match = f"MATCH (n{labels}) WHERE elementId(n) = row.key"
+    else:
+        match = f"MATCH (n{labels} {{{quote_name(key)}: row.key}})"
+    if mode == "merge":
+        update = "SET n += row.props"
+    elif mode == "replace":
+        update = "SET n = row.props"
+    else:
+        update = "REMOVE " + ", ".join([f"n.{quote_name(x)}" for x in remove_props])
+    return f"UNWIND $rows AS row {match} {update}"
+
+
+def get_df(data: List[dict]) -> pd.DataFrame:
+    """Convert query result data to a DataFrame.
+
+    If each record has only one key with a map (e.g. a node) as value, the
+    properties of the map become the columns.
+    """
+    if set([len(x.keys()) for x in data]) == {
+        1,
+    }:
+        only_available_key = list(data[0].keys())[0]
+        if isinstance(data[0][only_available_key], dict):
+            data = [
+                dict(
+                    {"Label in Cypher": only_available_key}, **x[only_available_key]
+                )
+                for x in data
+            ]
+    return pd.DataFrame(data)
+
+
+def iter_frames(
+    records: Iterable,
+    chunksize: Optional[int] = None,
+    dtypes: Optional[Dict[str, Any]] = None,
+    as_arrow: bool = False,
+):
+    """Yield DataFrames built column-wise from records with at most `chunksize` rows.
+
+    Without `chunksize` exactly one (maybe empty) frame is yielded. See
+    `Db.exec_df` for the handling of single node/map columns.
+    """
+    if as_arrow:
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required for as_arrow=True") from e
+    dtypes = dtypes or {}
+    records = iter(records)
+    first_chunk = True
+    while True:
+        chunk = islice(records, chunksize) if chunksize else records
+        columns: Dict[str, list] = {}
+        num_rows = 0
+        for record in chunk:
+            row = record.data()
+            if len(row) == 1:
+                key, value = next(iter(row.items()))
+                if isinstance(value, dict):
+                    row = dict({"Label in Cypher": key}, **value)
+            for k in columns.keys() - row.keys():
+                columns[k].append(None)
+            for k, v in row.items():
+                if k not in columns:
+                    columns[k] = [None] * num_rows
+                columns[k].append(v)
+            num_rows += 1
+        if num_rows == 0 and not first_chunk:
+            break
+        first_chunk = False
+        if as_arrow:
+            yield (pa.RecordBatch if chunksize else pa.Table).from_pydict(columns)
+        else:
+            yield pd.DataFrame(
+                {k: pd.Series(v, dtype=dtypes.get(k)) for k, v in columns.items()}
+            )
+        if not chunksize or num_rows < chunksize:
+            break
+
+
+plan_prefix_pattern = re.compile(r"^\s*(?:EXPLAIN|PROFILE)\b\s*", re.IGNORECASE)
+
+plan_warnings = {
+    "AllNodesScan": "scans all nodes, add a label to the pattern",
+    "NodeByLabelScan+Filter": "scans a label and filters by property, add an index",
+    "CartesianProduct": "cartesian product of disconnected patterns",
+    "Eager": "eager operator materializes all rows (e.g. MATCH and write on the same label)",
+}
+
+
+def get_plan_warning(operator: str, parent_operator: Optional[str]) -> Optional[str]:
+    """Return the anti-pattern of a plan operator, None if it is fine."""
+    if operator == "AllNodesScan":
+        return plan_warnings["AllNodesScan"]
+    if operator == "NodeByLabelScan" and parent_operator == "Filter":
+        return plan_warnings["NodeByLabelScan+Filter"]
+    if operator == "CartesianProduct":
+        return plan_warnings["CartesianProduct"]
+    if operator == "Eager":
+        return plan_warnings["Eager"]
+    return None
+
+
+def get_plan_df(plan: Optional[dict]) -> pd.DataFrame:
+    """Flatten a plan or profile tree of a result summary to a DataFrame.
+
+    One row per operator in depth first order with the `id` of the operator
+    and the `parent_id` of the operator consuming its rows. Profile columns
+    (`rows`, `db_hits`, page cache hits/misses, `time`) are empty for plans of
+    EXPLAIN. `warning` describes known anti-patterns.
+    """
+    rows = []
+    stack = [(plan, None, None, 0)] if plan else []
+    while stack:
+        operator_plan, parent_id, parent_operator, depth = stack.pop()
+        args = operator_plan.get("args", operator_plan.get("arguments", {})) or {}
+        operator = operator_plan.get("operatorType", "").split("@")[0]
+        op_id = len(rows)
+        rows.append(
+            {
+                "id": op_id,
+                "parent_id": parent_id,
+                "depth": depth,
+                "operator": operator,
+                "details": args.get("Details"),
+                "identifiers": ", ".join(operator_plan.get("identifiers", [])),
+                "estimated_rows": args.get("EstimatedRows"),
+                "rows": operator_plan.get("rows", args.get("Rows")),
+                "db_hits": operator_plan.get("dbHits", args.get("DbHits")),
+                "page_cache_hits": operator_plan.get("pageCacheHits", args.get("PageCacheHits")),
+                "page_cache_misses": operator_plan.get(
+                    "pageCacheMisses", args.get("PageCacheMisses")
+                ),
+                "time": operator_plan.get("time", args.get("Time")),
+                "warning": get_plan_warning(operator, parent_operator),
+            }
+        )
+        for child in reversed(operator_plan.get("children", [])):
+            stack.append((child, op_id, operator, depth + 1))
+    columns = [
+        "id",
+        "parent_id",
+        "depth",
+        "operator",
+        "details",
+        "identifiers",
+        "estimated_rows",
+        "rows",
+        "db_hits",
+        "page_cache_hits",
+        "page_cache_misses",
+        "time",
+        "warning",
+    ]
+    return pd.DataFrame(rows, columns=columns).set_index("id")
+
+
+DeleteCount = namedtuple("DeleteCount", ["nodes", "relationships"])
+
+EdgeArrays = namedtuple("EdgeArrays", ["src", "dst", "weights", "node_ids", "node_index"])
+
+SparseAdjacency = namedtuple("SparseAdjacency", ["matrix", "node_ids", "node_index"])
+
+
+def get_projection_cypher(var: str, props: Optional[Iterable[str]]) -> str:
+    """Return `properties(n)` for all properties, `n {.`a`, ...}` for selected ones."""
+    if props is None:
+        return f"properties({var})"
+    return f"{var} {{{', '.join(['.' + quote_name(x) for x in props])}}}"
+
+
+def get_subgraph_filter(
+    node_filter: Optional[Union[str, set[str], GraphElement]],
+    rel_types: Optional[Iterable[str]] = None,
+):
+    """Return the Cypher of nodes matching `node_filter` connected by `rel_types`.
+
+    Returns the compiled start node (`a`), end node (`b`), the relationship
+    type pattern (e.g. ":`A`|`B`") and the WHERE clause of both nodes.
+    """
+    if not isinstance(node_filter, GraphElement):
+        node_filter = Node(node_filter or set())
+    a, b = compile_element(node_filter, "a"), compile_element(node_filter, "b")
+    types = ":" + "|".join([quote_name(x) for x in rel_types]) if rel_types else ""
+    where = " AND ".join([x for x in (a.where, b.where) if x])
+    return a, b, types, f"WHERE {where}" if where else ""
+
+
+Statistics = namedtuple(
+    "Statistics", ["labels", "relationship_types", "relationship_labels"]
+)
+
+
+def get_count_store_cypher(
+    labels: List[str], types: List[str], label_types: List[tuple[int, int, str]]
+) -> str:
+    """Return one UNION ALL query reading all counts from the count store.
+
+    Names are returned from the `$labels` and `$types` parameters by index.
+    `label_types` are (label index, type index, "out"|"in") tuples.
+    """
+    columns = "AS kind, {} AS label, {} AS type, {} AS direction, count({}) AS num"
+    parts = []
+    for i, label in enumerate(labels):
+        parts.append(
+            f"MATCH (n:{quote_name(label)}) RETURN 'label' "
+            + columns.format(f"$labels[{i}]", "null", "null", "n")
+        )
+    for j, rel_type in enumerate(types):
+        parts.append(
+            f"MATCH ()-[r:{quote_name(rel_type)}]->() RETURN 'type' "
+            + columns.format("null", f"$types[{j}]", "null", "r")
+        )
+    for i, j, direction in label_types:
+        label, rel_type = quote_name(labels[i]), quote_name(types[j])
+        pattern = (
+            f"(:{label})-[r:{rel_type}]->()"
+            if direction == "out"
+            else f"()-[r:{rel_type}]->(:{label})"
+        )
+        parts.append(
+            f"MATCH {pattern} RETURN 'label_type' "
+            + columns.format(f"$labels[{i}]", f"$types[{j}]", f"'{direction}'", "r")
+        )
+    return " UNION ALL ".join(parts)
+
+
+graph_counts_cypher = "CALL db.stats.retrieve('GRAPH COUNTS') YIELD data RETURN data"
+
+
+def get_graph_counts_rows(data: dict, relationship_labels: bool = True) -> List[tuple]:
+    """Return (kind, label, type, direction, num) rows of `db.stats.retrieve` data.
+
+    The "GRAPH COUNTS" section is the content of the count store: nodes by
+    label and relationships by type, optionally with the start or end label.
+    """
+    rows = [
+        ("label", x["label"], None, None, x["count"])
+        for x in data.get("nodes", [])
+        if "label" in x
+    ]
+    for x in data.get("relationships", []):
+        rel_type = x.get("relationshipType")
+        if rel_type is None:
+            continue
+        if "startLabel" in x:
+            if relationship_labels:
+                rows.append(("label_type", x["startLabel"], rel_type, "out", x["count"]))
+        elif "endLabel" in x:
+            if relationship_labels:
+                rows.append(("label_type", x["endLabel"], rel_type, "in", x["count"]))
+        else:
+            rows.append(("type", None, rel_type, None, x["count"]))
+    return rows
+
+
 py_neo_cast_map = {
     bool: "toBooleanOrNull",
     float: "toFloatOrNull",
@@ -125,24 +791,355 @@ py_neo_cast_map = {
 }
 
 
+def get_cypher_string(value: str) -> str:
+    """Escape a value to be used in a single quoted Cypher string."""
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def read_csv_header(file_path: str, field_terminator: str = ",") -> List[str]:
+    """Return the column names in the first line of a CSV file."""
+    with open(file_path, newline="") as f:
+        header = next(csv.reader(f, delimiter=field_terminator), [])
+    return [x.strip() for x in header if x.strip()]
+
+
+csv_bool_values = {"true", "false"}
+csv_int_pattern = re.compile(r"[+-]?(0|[1-9][0-9]*)")
+csv_leading_zero_pattern = re.compile(r"[+-]?0[0-9]")
+
+
+def get_csv_dtype(values: Iterable[str]) -> Optional[type]:
+    """Return `bool`, `int` or `float` if all non-empty values have that type.
+
+    Values with leading zeros (e.g. zip codes) are strings, empty values are
+    ignored, so an integer column with blanks stays `int`.
+    """
+    values = [x.strip() for x in values if x.strip()]
+    if not values:
+        return None
+    if all(x.lower() in csv_bool_values for x in values):
+        return bool
+    if any(csv_leading_zero_pattern.match(x) for x in values):
+        return None
+    if all(csv_int_pattern.fullmatch(x) for x in values):
+        return int
+    if pd.to_numeric(pd.Series(values), errors="coerce").notna().all():
+        return float
+    return None
+
+
+def infer_csv_dtypes(
+    file_path: str, field_terminator: str = ",", nrows: int = 1000
+) -> Dict[str, type]:
+    """Infer `bool`, `float` and `int` columns from the first `nrows` CSV lines."""
+    df = pd.read_csv(
+        file_path, sep=field_terminator, nrows=nrows, dtype=str, keep_default_na=False
+    )
+    dtypes = {col.strip(): get_csv_dtype(df[col]) for col in df.columns}
+    return {col: dtype for col, dtype in dtypes.items() if dtype is not None}
+
+
+def get_csv_value_cypher(column: str, dtype: Optional[Union[type, str]] = None) -> str:
+    """Return `line.column` cast with `py_neo_cast_map` or a Cypher function name."""
+    value = f"line.{quote_name(column)}"
+    cast = py_neo_cast_map.get(dtype, dtype if isinstance(dtype, str) else None)
+    return f"{cast}({value})" if cast else value
+
+
+def get_csv_props_cypher(
+    columns: List[str], dtypes: Dict[str, Union[type, str]]
+) -> str:
+    """Return a map of lower case property names to cast CSV values."""
+    props = [
+        f"{quote_name(col.lower())}: {get_csv_value_cypher(col, dtypes.get(col))}"
+        for col in columns
+    ]
+    return "{" + ", ".join(props) + "}"
+
+
+file_formats = {
+    ".csv": "csv",
+    ".tsv": "csv",
+    ".txt": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+
+def get_file_format(file_path: str) -> str:
+    """Return "csv", "jsonl" or "parquet" by the extension of `file_path`.
+
+    Compression extensions (e.g. `.csv.gz`) are ignored.
+    """
+    root, extension = os.path.splitext(file_path.lower())
+    if extension in (".gz", ".bz2", ".xz", ".zip", ".zst"):
+        extension = os.path.splitext(root)[1]
+    if extension not in file_formats:
+        raise ValueError(f"Unknown file format of {file_path}, set file_format.")
+    return file_formats[extension]
+
+
+def read_file_chunks(
+    file_path: str,
+    file_format: Optional[str] = None,
+    chunksize: int = defaults.file_chunksize,
+    **read_kwargs,
+) -> Iterable[pd.DataFrame]:
+    """Yield a CSV, JSONL or Parquet file as DataFrames of `chunksize` rows.
+
+    CSV and JSONL files are read with pandas (`read_kwargs` are passed to
+    `pd.read_csv`/`pd.read_json`), Parquet files row group by row group with
+    pyarrow (`columns` is the only supported keyword).
+    """
+    file_format = file_format or get_file_format(file_path)
+    if file_format == "csv":
+        with pd.read_csv(file_path, chunksize=chunksize, **read_kwargs) as reader:
+            yield from reader
+    elif file_format == "jsonl":
+        with pd.read_json(file_path, lines=True, chunksize=chunksize, **read_kwargs) as reader:
+            yield from reader
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("pyarrow is required to read Parquet files") from e
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(
+            batch_size=chunksize, columns=read_kwargs.get("columns")
+        ):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unknown file format {file_format}, use csv, jsonl or parquet.")
+
+
+def add_counters(total: Dict[str, int], counters: Dict[str, int]) -> Dict[str, int]:
+    """Add update `counters` to `total` and return `total`."""
+    for name, value in counters.items():
+        total[name] = total.get(name, 0) + value
+    return total
+
+
+class DriverRegistry:
+    """Drivers (connection pools) shared by all `Db` with the same connection settings.
+
+    `acquire` creates the driver on first use, `release` closes it when the
+    last `Db` using it is closed. Databases are selected per session, so one
+    driver serves all databases of a server. A `Db` with another password or
+    `driver_config` (pool size, timeouts, ...) gets its own driver.
+    """
+
+    def __init__(self):
+        self.__drivers: Dict[Tuple[str, str, int], list] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_key(config: Config) -> Tuple[str, str, int]:
+        """Key of the driver of `config`, the auth and driver settings are only kept as hash."""
+        settings = (config.password, tuple(sorted(config.driver_config.items())))
+        return config.uri, config.user, hash(settings)
+
+    def acquire(self, config: Config):
+        """Return the driver of `config` and add a reference to it."""
+        key = self.get_key(config)
+        with self.__lock:
+            if key not in self.__drivers:
+                driver = GraphDatabase.driver(
+                    config.uri,
+                    auth=(config.user, config.password),
+                    **config.driver_config,
+                )
+                self.__drivers[key] = [driver, 0]
+            self.__drivers[key][1] += 1
+            return self.__drivers[key][0]
+
+    def release(self, config: Config):
+        """Remove a reference to the driver of `config`, close it if it was the last."""
+        key = self.get_key(config)
+        with self.__lock:
+            entry = self.__drivers.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self.__drivers[key]
+                entry[0].close()
+
+    def references(self, uri: str, user: str) -> int:
+        """Number of `Db` using a driver of `uri` and `user`."""
+        with self.__lock:
+            return sum(
+                count for (key_uri, key_user, _), (_, count) in self.__drivers.items()
+                if (key_uri, key_user) == (uri, user)
+            )
+
+    def close_all(self):
+        """Close all drivers, e.g. at the shutdown of a service."""
+        with self.__lock:
+            entries = list(self.__drivers.values())
+            self.__drivers.clear()
+        for driver, _ in entries:
+            driver.close()
+
+
+drivers = DriverRegistry()
+
+graph_metadata = ("node_labels", "relationship_types", "schema")
+
+
+def invalidates(*keys: str):
+    """Decorate a `Db` method to refresh the cached metadata `keys` after it ran."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            self.refresh(*keys)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
 class Db:
     def __init__(
-        self, config_file=defaults.config_file_path, database: Optional[str] = None
+        self,
+        config_file=defaults.config_file_path,
+        database: Optional[str] = None,
+        metadata_ttl: Optional[float] = defaults.metadata_ttl,
     ):
+        self.__config_file = config_file
         self.__config = get_config(config_file)
+        self.__metadata_ttl = metadata_ttl
         self.database = database if database else self.__config.database
-        self.driver = GraphDatabase.driver(
-            self.__config.uri,
-            auth=(self.__config.user, self.__config.password),
-            database=self.database,
-        )
-        self.session = self.driver.session()
+        self.__driver = None
+        self.__driver_lock = threading.Lock()
+        self.__local = threading.local()
+        self.__sessions = weakref.WeakSet()
+        self.__statistics_cache = TTLCache()
+        self.__metadata_cache = TTLCache(metadata_ttl)
+        self.metrics = None
+        self.advisor = IndexAdvisor()
+
+    @property
+    def driver(self):
+        """Driver shared by all `Db` with the same URI and user (see `DriverRegistry`).
+
+        No connection is opened before the first query.
+        """
+        if self.__driver is None:
+            with self.__driver_lock:
+                if self.__driver is None:
+                    self.__driver = drivers.acquire(self.__config)
+        return self.__driver
+
+    def use(self, database: str) -> "Db":
+        """Return a `Db` for `database` sharing the driver and connection pool.
+
+        The returned `Db` has its own sessions and caches, closing it only
+        releases its reference to the shared driver.
+        """
+        db = Db(self.__config_file, database, self.__metadata_ttl)
+        db.metrics = self.metrics
+        return db
+
+    @property
+    def session(self):
+        """Session of the current thread, opened on first use.
+
+        Sessions are not thread safe, so every thread gets its own session
+        from the connection pool of the shared driver.
+        """
+        session = getattr(self.__local, "session", None)
+        if session is None:
+            session = self.driver.session(database=self.database)
+            self.__local.session = session
+            self.__sessions.add(session)
+        return self.__instrument(session)
+
+    def __close_thread_session(self):
+        """Close the session of the current thread, e.g. before a worker thread ends."""
+        session = getattr(self.__local, "session", None)
+        if session is not None:
+            self.__local.session = None
+            self.__sessions.discard(session)
+            session.close()
+
+    def __instrument(self, session):
+        if self.metrics is None:
+            return session
+        from neo4j_tools.metrics import InstrumentedSession
+
+        return InstrumentedSession(session, self.metrics, self)
+
+    def enable_metrics(self, hooks: Optional[List[Callable]] = None):
+        """Record latency, rows, server timings and counters of all queries.
+
+        Parameters
+        ----------
+        hooks : Optional[List[Callable]], optional
+            Functions called with each `metrics.QueryEvent`, by default None
+
+        Returns
+        -------
+        metrics.Metrics
+            Collected metrics with `snapshot`, `to_json` and `to_prometheus`
+        """
+        from neo4j_tools.metrics import Metrics
+
+        self.metrics = Metrics(hooks)
+        return self.metrics
+
+    def disable_metrics(self):
+        self.metrics = None
 
     def __str__(self):
         return f"<neo4j_tools:Db {{user:{self.__config.user}, database:{self.database}, uri: {self.__config.uri} }}>"
 
+    def refresh(self, *keys: str):
+        """Clear cached metadata and statistics.
+
+        Metadata (schema, node labels, relationship types, databases, indexes
+        and constraints) is cached for `metadata_ttl` seconds. Writes through
+        `Db` refresh the affected entries automatically, call `refresh` after
+        changes made by other clients or with `exec_data`.
+
+        Parameters
+        ----------
+        keys : str
+            Cache entries to clear ("schema", "node_labels",
+            "relationship_types", "databases", "indexes", "constraints"), by
+            default all
+        """
+        self.__metadata_cache.invalidate(*keys)
+        if not keys or set(keys) & set(graph_metadata):
+            self.__statistics_cache.invalidate()
+
+    def __add_tokens(self, labels: Iterable[str] = (), types: Iterable[str] = ()):
+        """Refresh metadata after a write which might add labels or types."""
+        self.__statistics_cache.invalidate()
+        keys = set()
+        for key, names in (("node_labels", labels), ("relationship_types", types)):
+            names = set(names)
+            known = self.__metadata_cache.peek(key)
+            if names and (known is None or not names <= set(known)):
+                keys.update([key, "schema"])
+        if types:
+            keys.add("schema")
+        if keys:
+            self.__metadata_cache.invalidate(*keys)
+
+    def __record_lookup(self, element: "GraphElement", entity: str = "NODE"):
+        """Record the labels and not null properties `element` is matched by."""
+        keys = [k for k, v in (element.props or {}).items() if get_param_value(v) is not None]
+        self.advisor.record(element.labels, keys, entity=entity)
+
     def show_databases(self):
-        return self.exec_data("SHOW DATABASES")
+        return self.__metadata_cache.get(
+            "databases", lambda: self.exec_data("SHOW DATABASES")
+        )
 
     @property
     def databases(self):
@@ -200,7 +1197,9 @@ class Db:
     @property
     def schema(self):
         """Get the database schema."""
-        return self.session.run("CALL db.schema.visualization()").data()
+        return self.__metadata_cache.get(
+            "schema", lambda: self.exec_data("CALL db.schema.visualization()")
+        )
 
     @property
     def nodes_schema_as_df(self):
@@ -221,7 +1220,7 @@ class Db:
     def database_names(self):
         """All databases except system."""
         return [
-            x["name"] for x in self.exec_data("SHOW DATABASES") if x["name"] != "system"
+            x["name"] for x in self.show_databases() if x["name"] != "system"
         ]
 
     def show_schema_in_ipynb(self, format="jpg", interactive=False):
@@ -238,6 +1237,9 @@ class Db:
             cypher = "CALL db.schema.visualization()"
             return self.show_graph_interactive(cypher)
         else:
+            import networkx as nx
+            from IPython.display import SVG, Image
+
             graph = nx.DiGraph()
             edges = [
                 (x[0]["name"], x[2]["name"], {"label": x[1]})
@@ -251,6 +1253,7 @@ class Db:
                 img = nx.nx_agraph.to_agraph(graph).draw(prog="dot", format="jpg")
                 return Image(img)
 
+    @invalidates(*graph_metadata)
     def import_ttl(
         self, path_or_uri: str, init_graph_config=True, file_on_local_machine=False
     ):
@@ -290,13 +1293,73 @@ class Db:
             "CREATE CONSTRAINT n10s_unique_uri IF NOT EXISTS FOR (r:Resource) REQUIRE r.uri IS UNIQUE"
         )
 
-        cypher_import = f'CALL n10s.rdf.import.fetch("{uri}","Turtle")'
-        return self.session.run(cypher_import).data()
+        cypher_import = 'CALL n10s.rdf.import.fetch($uri, "Turtle")'
+        return self.session.run(cypher_import, parameters={"uri": uri}).data()
 
-    def exec_data(self, cypher: LiteralString):
-        r = self.session.run(cypher)
+    def exec_data(self, cypher: LiteralString, params: Optional[dict] = None):
+        r = self.session.run(cypher, parameters=params)
         return r.data()
 
+    def __get_plan(self, keyword: str, cypher: LiteralString, params: Optional[dict]):
+        cypher = f"{keyword} {plan_prefix_pattern.sub('', cypher, count=1)}"
+        summary = self.session.run(cypher, parameters=params).consume()
+        return get_plan_df(summary.profile if keyword == "PROFILE" else summary.plan)
+
+    def profile(self, cypher: LiteralString, params: Optional[dict] = None) -> pd.DataFrame:
+        """Run a query with PROFILE and return the executed plan as DataFrame.
+
+        The query is executed (and writes are committed), the records are
+        discarded. See `get_plan_df` for the columns; `warning` flags
+        `AllNodesScan`, `NodeByLabelScan` followed by a property `Filter`,
+        `CartesianProduct` and `Eager` operators.
+
+        Example
+        -------
+        >>> plan = db.profile("MATCH (n:Person {name: $name}) RETURN n", {"name": "Ada"})
+        >>> plan[plan.warning.notna()]
+        """
+        return self.__get_plan("PROFILE", cypher, params)
+
+    def explain(self, cypher: LiteralString, params: Optional[dict] = None) -> pd.DataFrame:
+        """Return the plan of a query (EXPLAIN) without executing it, see `profile`."""
+        return self.__get_plan("EXPLAIN", cypher, params)
+
+    def stream(
+        self,
+        cypher: LiteralString,
+        params: Optional[dict] = None,
+        fetch_size: Optional[int] = None,
+    ):
+        """Yield the records of a query lazily.
+
+        The query runs in its own session which fetches `fetch_size` records
+        per round trip, so memory stays flat and the first records are
+        available before the query has finished.
+
+        Parameters
+        ----------
+        cypher : LiteralString
+            Cypher query
+        params : Optional[dict], optional
+            Query parameters, by default None
+        fetch_size : Optional[int], optional
+            Number of records fetched at once, by default `fetch_size` of the
+            config file or `defaults.fetch_size`
+
+        Yields
+        ------
+        neo4j.Record
+            Records of the query
+        """
+        fetch_size = fetch_size or self.__config.driver_config.get(
+            "fetch_size", defaults.fetch_size
+        )
+        with self.driver.session(database=self.database, fetch_size=fetch_size) as session:
+            yield from self.__instrument(session).run(cypher, parameters=params)
+
+    iter_records = stream
+
+    @invalidates(*graph_metadata)
     def import_owl(
         self,
         url: str,
@@ -332,49 +1395,97 @@ class Db:
         rangeRel : str, optional
             Relationship to be used for rdfs:range, by default "RANGE"
         """
-        config = f"""{{
-            classLabel: '{classLabel}',
-            subClassOfRel: '{subClassOfRel}',
-            dataTypePropertyLabel: '{dataTypePropertyLabel}',
-            objectPropertyLabel: '{objectPropertyLabel}',
-            subPropertyOfRel: '{subPropertyOfRel}',
-            domainRel: '{domainRel}',
-            rangeRel: '{rangeRel}'
-        }}"""
+        config = {
+            "classLabel": classLabel,
+            "subClassOfRel": subClassOfRel,
+            "dataTypePropertyLabel": dataTypePropertyLabel,
+            "objectPropertyLabel": objectPropertyLabel,
+            "subPropertyOfRel": subPropertyOfRel,
+            "domainRel": domainRel,
+            "rangeRel": rangeRel,
+        }
         # self.session.run('CREATE CONSTRAINT n10s_unique_uri FOR (r:Resource) REQUIRE r.uri IS UNIQUE')
         self.session.run("call n10s.graphconfig.init()")
-        cypher = f'CALL n10s.onto.import.fetch("{url}","Turtle", {config})'
-        print(cypher)
-        return self.session.run(cypher).data()
-
-    def exec_df(self, cypher: LiteralString):
-        data = self.exec_data(cypher)
-        if set([len(x.keys()) for x in data]) == {
-            1,
-        }:
-            only_available_key = list(data[0].keys())[0]
-            if isinstance(data[0][only_available_key], dict):
-                data = [
-                    dict(
-                        {"Label in Cypher": only_available_key}, **x[only_available_key]
-                    )
-                    for x in data
-                ]
-        return pd.DataFrame(data)
+        cypher = 'CALL n10s.onto.import.fetch($url, "Turtle", $config)'
+        return self.session.run(cypher, parameters={"url": url, "config": config}).data()
+
+    def exec_df(
+        self,
+        cypher: LiteralString,
+        params: Optional[dict] = None,
+        dtypes: Optional[Dict[str, Any]] = None,
+        chunksize: Optional[int] = None,
+        as_arrow: bool = False,
+        fetch_size: Optional[int] = None,
+    ):
+        """Execute a query and return the result as DataFrame.
+
+        The frame is built column by column from the record stream without
+        intermediate list of dictionaries. If all records have only one key
+        with a node/map as value, the properties become the columns. Values
+        are converted like `Record.data()`, also in lists, maps and paths.
+
+        Parameters
+        ----------
+        cypher : LiteralString
+            Cypher query
+        params : Optional[dict], optional
+            Query parameters, by default None
+        dtypes : Optional[Dict[str, Any]], optional
+            dtypes by column name, other columns are inferred, by default None
+        chunksize : Optional[int], optional
+            If set, return an iterator of DataFrames with at most `chunksize`
+            rows, by default None
+        as_arrow : bool, optional
+            Return `pyarrow.Table` (or `pyarrow.RecordBatch` per chunk)
+            instead of DataFrames, by default False. Requires pyarrow.
+        fetch_size : Optional[int], optional
+            Number of records fetched per round trip, see `stream`
+
+        Returns
+        -------
+        Union[pd.DataFrame, pyarrow.Table, Iterator]
+            Result as one frame or, with `chunksize`, an iterator of frames
+        """
+        records = self.stream(cypher, params, fetch_size=fetch_size)
+        frames = iter_frames(records, chunksize, dtypes, as_arrow)
+        if chunksize:
+            return frames
+        return next(frames)
 
     def show_graph_interactive(self, cypher: LiteralString):
+        """Show the result graph of `cypher` in a notebook, requires `neo4j_tools[viz]`."""
+        from yfiles_jupyter_graphs import GraphWidget
+
         return GraphWidget(graph=self.session.run(cypher).graph())
 
     def close(self):
-        self.driver.close()
+        """Close the sessions and release the shared driver.
+
+        The driver is closed when no other `Db` uses it. A query after `close`
+        opens a new session on a newly acquired driver.
+        """
+        sessions = list(self.__sessions)
+        self.__local = threading.local()
+        self.__sessions = weakref.WeakSet()
+        for session in sessions:
+            session.close()
+        with self.__driver_lock:
+            if self.__driver is not None:
+                drivers.release(self.__config)
+                self.__driver = None
 
     def show_indexes(self, as_df=True):
-        cypher = "SHOW INDEXES"
-        return self.exec_df(cypher) if as_df else self.exec_data(cypher)
+        data = self.__metadata_cache.get(
+            "indexes", lambda: self.exec_data("SHOW INDEXES")
+        )
+        return get_df(data) if as_df else data
 
     def show_unique_constraints(self, as_df=True):
-        cypher = "SHOW UNIQUE CONSTRAINTS"
-        return self.exec_df(cypher) if as_df else self.exec_data(cypher)
+        data = self.__metadata_cache.get(
+            "constraints", lambda: self.exec_data("SHOW UNIQUE CONSTRAINTS")
+        )
+        return get_df(data) if as_df else data
 
     @property
     def nodes(self):
@@ -382,133 +1493,880 @@ class Db:
         return [x["n"] for x in self.exec_data(cypher)]
 
     def nodes_by_label(self, labels: Union[set[str], str], limit: Optional[int] = None):
-        cypher_limit = f"LIMIT {limit}" if limit else ""
-        cypher = f"MATCH (n:{Node(labels).cypher_labels}) RETURN n {cypher_limit}"
-        return [x["n"] for x in self.exec_data(cypher)]
+        c = compile_element(Node(labels), "n")
+        cypher_limit = "LIMIT $limit" if limit else ""
+        cypher = f"MATCH (n{c.labels}) RETURN n {cypher_limit}"
+        return [x["n"] for x in self.exec_data(cypher, {"limit": limit})]
+
+    def iter_nodes(
+        self,
+        labels: Optional[Union[set[str], str]] = None,
+        page_size: int = defaults.page_size,
+    ):
+        """Yield nodes page by page, like `nodes` but with flat memory.
+
+        The nodes are read by a single query with `stream`, which fetches
+        `page_size` records per round trip. The server scans the label once
+        and pauses until the next page is requested.
+
+        Parameters
+        ----------
+        labels : Optional[Union[set[str], str]], optional
+            Only nodes with these label(s), by default all nodes
+        page_size : int, optional
+            Number of nodes fetched per round trip, by default `defaults.page_size`
+
+        Yields
+        ------
+        dict
+            Node properties
+        """
+        cypher_labels = compile_element(Node(labels), "n").labels if labels else ""
+        cypher = f"MATCH (n{cypher_labels}) RETURN n"
+        for record in self.stream(cypher, fetch_size=page_size):
+            yield record.data()["n"]
+
+    def iter_nodes_by_label(
+        self, labels: Union[set[str], str], page_size: int = defaults.page_size
+    ):
+        """Yield nodes with label(s) page by page, see `iter_nodes`."""
+        return self.iter_nodes(labels, page_size)
+
+    def __iter_relationships(
+        self,
+        node_filter: Optional[Union[str, set[str], Node]],
+        rel_types: Optional[Iterable[str]],
+        returns: str,
+        page_size: int,
+    ):
+        """Stream relationships between nodes matching `node_filter`."""
+        a, b, types, where = get_subgraph_filter(node_filter, rel_types)
+        cypher = f"MATCH (a{a.labels})-[r{types}]->(b{b.labels}) {where} RETURN {returns}"
+        return self.stream(cypher, dict(**a.params, **b.params), fetch_size=page_size)
+
+    def to_networkx(
+        self,
+        node_filter: Optional[Union[str, set[str], Node]] = None,
+        rel_types: Optional[Iterable[str]] = None,
+        props: Optional[List[str]] = None,
+        rel_props: Optional[List[str]] = None,
+        multigraph: bool = False,
+        page_size: int = defaults.page_size,
+    ):
+        """Return a subgraph as `networkx.DiGraph`.
+
+        Nodes and relationships are streamed with one query each, records are
+        fetched in pages of `page_size` and added to the graph directly.
+        Nodes are keyed by element ID and have the attributes `labels` and
+        their properties, edges the attribute `type` and their properties. A
+        property named `labels` (nodes) or `type` (edges) is not exported.
+
+        Parameters
+        ----------
+        node_filter : Optional[Union[str, set[str], Node]], optional
+            Label(s) or a `Node` with labels and properties the nodes must
+            match, by default all nodes
+        rel_types : Optional[Iterable[str]], optional
+            Relationship types between the nodes, by default all
+        props : Optional[List[str]], optional
+            Node properties to export, by default all, [] for none
+        rel_props : Optional[List[str]], optional
+            Relationship properties to export, by default all, [] for none
+        multigraph : bool, optional
+            Return a `networkx.MultiDiGraph` keeping parallel relationships
+            (keyed by element ID), by default False
+        page_size : int, optional
+            Number of records fetched per round trip, by default `defaults.page_size`
+
+        Returns
+        -------
+        Union[networkx.DiGraph, networkx.MultiDiGraph]
+            Subgraph
+        """
+        import networkx as nx
+
+        graph = nx.MultiDiGraph() if multigraph else nx.DiGraph()
+        a, _, _, _ = get_subgraph_filter(node_filter)
+        where = f"WHERE {a.where}" if a.where else ""
+        cypher = f"""MATCH (a{a.labels}) {where}
+            RETURN elementId(a) AS eid, labels(a) AS labels, {get_projection_cypher("a", props)} AS props"""
+        for record in self.stream(cypher, a.params, fetch_size=page_size):
+            graph.add_node(record["eid"], **dict(record["props"] or {}, labels=record["labels"]))
+
+        returns = f"""elementId(r) AS eid, elementId(a) AS src, elementId(b) AS dst,
+            type(r) AS type, {get_projection_cypher("r", rel_props)} AS props"""
+        for record in self.__iter_relationships(node_filter, rel_types, returns, page_size):
+            attributes = dict(record["props"] or {}, type=record["type"])
+            if multigraph:
+                graph.add_edge(record["src"], record["dst"], key=record["eid"], **attributes)
+            else:
+                graph.add_edge(record["src"], record["dst"], **attributes)
+        return graph
+
+    def to_edge_arrays(
+        self,
+        node_filter: Optional[Union[str, set[str], Node]] = None,
+        rel_types: Optional[Iterable[str]] = None,
+        weight: Optional[str] = None,
+        page_size: int = defaults.page_size,
+    ) -> EdgeArrays:
+        """Return the relationships of a subgraph as NumPy arrays of node indices.
+
+        Element IDs are mapped to consecutive indices in order of appearance,
+        only nodes with at least one relationship in the subgraph get an index.
+        Indices are collected in typed arrays, so memory grows with 8 bytes per
+        index instead of one Python object per relationship.
+
+        Parameters
+        ----------
+        node_filter : Optional[Union[str, set[str], Node]], optional
+            Label(s) or a `Node` both ends must match, by default all nodes
+        rel_types : Optional[Iterable[str]], optional
+            Relationship types, by default all
+        weight : Optional[str], optional
+            Relationship property returned as `weights` (missing values are
+            1.0), by default None
+        page_size : int, optional
+            Number of records fetched per round trip, by default `defaults.page_size`
+
+        Returns
+        -------
+        EdgeArrays
+            `src` and `dst` (int64 node indices), `weights` (float64 or None),
+            `node_ids` (element ID by index) and `node_index` (index by element ID)
+        """
+        returns = "elementId(a) AS src, elementId(b) AS dst"
+        if weight:
+            returns += f", r.{quote_name(weight)} AS weight"
+        node_index: Dict[str, int] = {}
+        src, dst, weights = array.array("q"), array.array("q"), array.array("d")
+        for record in self.__iter_relationships(node_filter, rel_types, returns, page_size):
+            src.append(node_index.setdefault(record["src"], len(node_index)))
+            dst.append(node_index.setdefault(record["dst"], len(node_index)))
+            if weight:
+                value = record["weight"]
+                weights.append(1.0 if value is None else value)
+        return EdgeArrays(
+            np.frombuffer(src, dtype=np.int64),
+            np.frombuffer(dst, dtype=np.int64),
+            np.frombuffer(weights, dtype=np.float64) if weight else None,
+            list(node_index),
+            node_index,
+        )
+
+    def to_sparse_adjacency(
+        self,
+        node_filter: Optional[Union[str, set[str], Node]] = None,
+        rel_types: Optional[Iterable[str]] = None,
+        weight: Optional[str] = None,
+        directed: bool = True,
+        page_size: int = defaults.page_size,
+    ) -> SparseAdjacency:
+        """Return the adjacency matrix of a subgraph as `scipy.sparse.csr_matrix`.
+
+        Requires scipy. See `to_edge_arrays` for the node indices; parallel
+        relationships are summed.
+
+        Parameters
+        ----------
+        node_filter : Optional[Union[str, set[str], Node]], optional
+            Label(s) or a `Node` both ends must match, by default all nodes
+        rel_types : Optional[Iterable[str]], optional
+            Relationship types, by default all
+        weight : Optional[str], optional
+            Relationship property used as value, by default 1 per relationship
+        directed : bool, optional
+            If False, return the symmetric matrix A + A.T, by default True
+        page_size : int, optional
+            Number of records fetched per round trip, by default `defaults.page_size`
+
+        Returns
+        -------
+        SparseAdjacency
+            `matrix` (n x n), `node_ids` (element ID by row/column) and
+            `node_index` (row/column by element ID)
+        """
+        try:
+            from scipy import sparse
+        except ImportError as e:
+            raise ImportError("scipy is required for to_sparse_adjacency") from e
+
+        edges = self.to_edge_arrays(node_filter, rel_types, weight, page_size)
+        n = len(edges.node_ids)
+        values = edges.weights if weight else np.ones(len(edges.src), dtype=np.float64)
+        matrix = sparse.coo_matrix((values, (edges.src, edges.dst)), shape=(n, n)).tocsr()
+        if not directed:
+            matrix = matrix + matrix.T
+        return SparseAdjacency(matrix, edges.node_ids, edges.node_index)
 
     def create_node(self, node: Node) -> int:
         """Create a node with label and properties."""
-        cypher = (
-            f"CREATE (n:{node.cypher_labels} {node.cypher_props}) return ID(n) as nid"
-        )
-        return self.session.run(cypher).data()[0]["nid"]
+        c = compile_element(node, "n")
+        cypher = f"CREATE (n{c.labels} {c.props}) return ID(n) as nid"
+        nid = self.session.run(cypher, parameters=c.params).data()[0]["nid"]
+        self.__add_tokens(node.labels)
+        return nid
 
-    def __get_sql_value(self, value):
-        return f'"' + json.dumps(value) + '"' if isinstance(value, str) else value
+    def execute_write(
+        self,
+        cypher: LiteralString,
+        params: Optional[dict] = None,
+        max_retries: int = defaults.max_retries,
+        backoff: float = defaults.retry_backoff,
+    ) -> Dict[str, int]:
+        """Run a write query in a managed transaction, retry on transient errors.
 
-    def __get_where_part_by_props(self, node_name: str, props: dict):
-        return " AND ".join(
-            [f"{node_name}.{k} = {self.__get_sql_value(v)}" for k, v in props.items()]
-        )
+        Returns
+        -------
+        Dict[str, int]
+            Update counters
+        """
+        return run_with_retry(self.session, cypher, params, max_retries, backoff)[0]
+
+    def __write_rows(self, cypher: LiteralString, rows: List[dict]) -> BatchResult:
+        """Run an `UNWIND $rows` query returning `eid` for one batch of rows.
+
+        The batch is written in a managed transaction with retries.
+        """
+
+        def work(tx):
+            result = tx.run(cypher, parameters={"rows": rows})
+            element_ids = [record["eid"] for record in result]
+            return BatchResult(element_ids, get_counters(result.consume()))
+
+        return call_with_retry(lambda: self.session.execute_write(work))[0]
+
+    def bulk_create_nodes(
+        self,
+        labels: Union[str, set[str]],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        batch_size: int = defaults.batch_size,
+    ) -> List[BatchResult]:
+        """Create nodes in batches with `UNWIND $rows AS row CREATE ...`.
+
+        Properties are passed as query parameters, so the server compiles the
+        query plan only once and one round trip creates `batch_size` nodes.
+
+        Parameters
+        ----------
+        labels : Union[str, set[str]]
+            Label(s) of the new nodes
+        rows : Union[Iterable[dict], pd.DataFrame]
+            Properties of the nodes. Any iterable of dictionaries (e.g. a
+            generator) or a DataFrame; only one batch is held in memory.
+        batch_size : int, optional
+            Number of nodes created per query, by default `defaults.batch_size`
+
+        Returns
+        -------
+        List[BatchResult]
+            Element IDs of the created nodes and update counters per batch
+        """
+        cypher = get_bulk_create_nodes_cypher(labels)
+        results = [
+            self.__write_rows(cypher, batch) for batch in get_batches(rows, batch_size)
+        ]
+        self.__add_tokens(Node(labels).labels)
+        return results
+
+    def bulk_merge_nodes(
+        self,
+        labels: Union[str, set[str]],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        key: Union[str, List[str]],
+        batch_size: int = defaults.batch_size,
+        ensure_index: bool = False,
+    ) -> List[BatchResult]:
+        """Merge nodes in batches with `UNWIND $rows AS row MERGE ...`.
+
+        Nodes are matched by the `key` properties, all other properties of a
+        row are set on the merged node. Rows missing any of the key properties
+        are skipped.
+
+        Parameters
+        ----------
+        labels : Union[str, set[str]]
+            Label(s) of the nodes
+        rows : Union[Iterable[dict], pd.DataFrame]
+            Properties of the nodes. Any iterable of dictionaries (e.g. a
+            generator) or a DataFrame; only one batch is held in memory.
+        key : Union[str, List[str]]
+            Property name(s) identifying a node
+        batch_size : int, optional
+            Number of nodes merged per query, by default `defaults.batch_size`
+        ensure_index : bool, optional
+            Create an index on the first label and `key` (if there is no
+            usable one) and wait until it is online before merging, by default False
+
+        Returns
+        -------
+        List[BatchResult]
+            Element IDs of the merged nodes and update counters per batch
+        """
+        keys = [key] if isinstance(key, str) else list(key)
+        if ensure_index:
+            self.ensure_index(labels, keys)
+        cypher = get_bulk_merge_nodes_cypher(labels, keys)
+        results = []
+        for batch in get_batches(rows, batch_size):
+            key_rows = get_rows_with_keys(batch, keys)
+            if not key_rows:
+                continue
+            self.advisor.record(Node(labels).labels, keys, len(key_rows))
+            results.append(self.__write_rows(cypher, key_rows))
+        self.__add_tokens(Node(labels).labels)
+        return results
 
     def create_edge(self, subj: Node, edge: Edge, obj: Node):
-        cypher = f"CREATE (subj:{subj.cypher_labels} {subj.cypher_props})"
-        cypher += f"-[edge:{edge.cypher_labels} {edge.cypher_props}]->"
-        cypher += f"(obj:{obj.cypher_labels} {obj.cypher_props})" ""
+        s, e, o = (
+            compile_element(subj, "subj"),
+            compile_element(edge, "edge"),
+            compile_element(obj, "obj"),
+        )
+        cypher = f"CREATE (subj{s.labels} {s.props})"
+        cypher += f"-[edge{e.labels} {e.props}]->"
+        cypher += f"(obj{o.labels} {o.props})"
         cypher += " RETURN ID(subj) as subj_id, ID(edge) as edge_id, ID(obj) as obj_id"
-        r = self.session.run(cypher).values()[0]
+        params = dict(**s.params, **e.params, **o.params)
+        r = self.session.run(cypher, parameters=params).values()[0]
+        self.__add_tokens(subj.labels | obj.labels, edge.labels)
         return Relationship(*r)
 
-    def set_props(self, node_id: int, props: dict):
-        # TODO: Implement!
-        cypher = """SET
-            e.property1 = $value1,
-            e.property2 = $value2"""
-        return self.exec_data(cypher)[0]
+    def bulk_update_props(
+        self,
+        labels: Optional[Union[str, set[str]]],
+        key: Optional[str],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        mode: str = "merge",
+        batch_size: int = defaults.batch_size,
+    ) -> Dict[str, int]:
+        """Update properties of existing nodes in parameterized UNWIND batches.
+
+        Modes:
+
+        - "merge": `SET n += row.props`, missing values keep the property
+        - "replace": `SET n = row.props`, properties not in the row are removed
+          (the key property is kept)
+        - "remove": `REMOVE n.prop, ...` for all other properties of the row
+          (values are ignored)
 
-    def remove_props(self):
-        cypher = "SET e = {}"
+        Parameters
+        ----------
+        labels : Optional[Union[str, set[str]]]
+            Label(s) of the nodes, None for any node
+        key : Optional[str]
+            Property identifying a node, None to match by element ID (value
+            of `element_id` in the rows)
+        rows : Union[Iterable[dict], pd.DataFrame]
+            Key and properties per node; any iterable of dictionaries or a DataFrame
+        mode : str, optional
+            "merge", "replace" or "remove", by default "merge"
+        batch_size : int, optional
+            Number of nodes updated per query, by default `defaults.batch_size`
 
-    def update_props(self):
-        cypher = "SET e += $map"
+        Returns
+        -------
+        Dict[str, int]
+            Summed update counters (e.g. `properties_set`)
+        """
+        if mode not in update_modes:
+            raise ValueError(f"mode must be one of {update_modes}, not {mode!r}")
+        cypher_labels = get_cypher_labels(Node(labels).labels) if labels else ""
+        row_key = "element_id" if key is None else key
+        total: Dict[str, int] = {}
+        # values are ignored by "remove", so missing values must not drop names
+        batches = (get_raw_batches if mode == "remove" else get_batches)(rows, batch_size)
+        for batch in batches:
+            rows_by_cypher: Dict[str, List[dict]] = {}
+            for row in batch:
+                key_value = get_param_value(row.get(row_key))
+                if key_value is None:
+                    logger.warning(f"Skipped row without {row_key}")
+                    continue
+                props = {k: v for k, v in row.items() if k != "element_id"}
+                remove_props = ()
+                if mode == "remove":
+                    remove_props = tuple(sorted(k for k in props if k != key))
+                    if not remove_props:
+                        continue
+                    props = {}
+                cypher = get_bulk_update_props_cypher(cypher_labels, key, mode, remove_props)
+                rows_by_cypher.setdefault(cypher, []).append(
+                    {"key": key_value, "props": props}
+                )
+            for cypher, key_rows in rows_by_cypher.items():
+                if labels and key is not None:
+                    self.advisor.record(Node(labels).labels, [key], len(key_rows))
+                add_counters(total, self.execute_write(cypher, {"rows": key_rows}))
+        return total
+
+    def set_props(
+        self,
+        labels: Optional[Union[str, set[str]]],
+        key: Optional[str],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        batch_size: int = defaults.batch_size,
+    ) -> Dict[str, int]:
+        """Replace all properties of nodes, see `bulk_update_props` (mode "replace")."""
+        return self.bulk_update_props(labels, key, rows, "replace", batch_size)
+
+    def remove_props(
+        self,
+        labels: Optional[Union[str, set[str]]],
+        key: Optional[str],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        batch_size: int = defaults.batch_size,
+    ) -> Dict[str, int]:
+        """Remove properties of nodes, see `bulk_update_props` (mode "remove")."""
+        return self.bulk_update_props(labels, key, rows, "remove", batch_size)
+
+    def update_props(
+        self,
+        labels: Optional[Union[str, set[str]]],
+        key: Optional[str],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        batch_size: int = defaults.batch_size,
+    ) -> Dict[str, int]:
+        """Add or update properties of nodes, see `bulk_update_props` (mode "merge")."""
+        return self.bulk_update_props(labels, key, rows, "merge", batch_size)
 
     def add_node_label(self, label: str, props: dict):
         """Add a label to a node."""
-        where = self.__get_where_part_by_props("n", props)
+        c = compile_element(Node(set(), props), "n")
         cypher = f"""MATCH (n)
-            WHERE {where}
-            SET n:{label}"""
-        self.session.run(cypher)
+            WHERE {c.where}
+            SET n{get_labels_template((label,))}"""
+        self.session.run(cypher, parameters=c.params)
+        self.__add_tokens([label])
 
     def merge_node(self, node: Node):
         """Creates a node with props if not exists"""
-        cypher = (
-            f"""MERGE (n:{node.cypher_labels} {node.cypher_props}) return ID(n) as id"""
-        )
-        try:
-            return self.session.run(cypher).data()[0]["id"]
-        except:
-            print(cypher)
-            os.system.exit()
-
+        c = compile_element(node, "n")
+        cypher = f"""MERGE (n{c.labels} {c.props}) return ID(n) as id"""
+        self.__record_lookup(node)
+        nid = self.session.run(cypher, parameters=c.params).data()[0]["id"]
+        self.__add_tokens(node.labels)
+        return nid
+
+    @invalidates(*graph_metadata)
     def merge_edge(self, subj: Node, rel: Edge, obj: Node):
         """MERGE finds or creates a relationship between the nodes."""
+        s, r, o = (
+            compile_element(subj, "subject"),
+            compile_element(rel, "relation"),
+            compile_element(obj, "object"),
+        )
         cypher = f"""
-            MERGE (subject:{subj.cypher_labels} {subj.cypher_props})
-            MERGE (object:{obj.cypher_labels} {obj.cypher_props})
-            MERGE (subject)-[relation:{rel.cypher_labels} {rel.cypher_props}]->(object)
+            MERGE (subject{s.labels} {s.props})
+            MERGE (object{o.labels} {o.props})
+            MERGE (subject)-[relation{r.labels} {r.props}]->(object)
             RETURN subject, relation, object"""
-        return self.session.run(cypher)
+        self.__record_lookup(subj)
+        self.__record_lookup(obj)
+        return self.session.run(cypher, parameters=dict(**s.params, **r.params, **o.params))
+
+    @invalidates(*graph_metadata)
+    def bulk_merge_edges(
+        self,
+        triples_or_df: Union[Iterable[tuple[Node, Edge, Node]], pd.DataFrame],
+        subj_key: str,
+        obj_key: str,
+        batch_size: int = defaults.batch_size,
+        ensure_index: bool = False,
+    ) -> List[Dict[str, int]]:
+        """Merge edges between existing nodes in parameterized batches.
+
+        Edges are grouped by (subject labels, relationship type, object labels)
+        and each full group batch is written with one query::
+
+            UNWIND $rows AS row
+            MATCH (a:Subject {subj_key: row.subj})
+            MATCH (b:Object {obj_key: row.obj})
+            MERGE (a)-[r:TYPE]->(b) SET r += row.props
+
+        Edges with a subject or object not found in the database are skipped.
+
+        Parameters
+        ----------
+        triples_or_df : Union[Iterable[tuple[Node, Edge, Node]], pd.DataFrame]
+            Iterable of (subject, edge, object) triples, nodes are identified by
+            the `subj_key`/`obj_key` property. Alternatively a DataFrame with the
+            columns `subj_labels`, `subj` (value of `subj_key`), `rel_type`,
+            `obj_labels`, `obj` (value of `obj_key`); all other columns are
+            used as edge properties.
+        subj_key : str
+            Property name identifying the subject nodes
+        obj_key : str
+            Property name identifying the object nodes
+        batch_size : int, optional
+            Maximum number of edges per query, by default `defaults.batch_size`
+        ensure_index : bool, optional
+            Create missing indexes on the subject and object labels and keys
+            before the first batch of a group, by default False
+
+        Returns
+        -------
+        List[Dict[str, int]]
+            Update counters per batch
+        """
+        batches = iter_edge_batches(triples_or_df, subj_key, obj_key, batch_size)
+        return self.__merge_edge_batches(batches, subj_key, obj_key, ensure_index)
+
+    def __merge_edge_batches(
+        self,
+        batches: Iterable[Tuple[tuple, List[dict]]],
+        subj_key: str,
+        obj_key: str,
+        ensure_index: bool = False,
+    ) -> List[Dict[str, int]]:
+        """Write (group, rows) batches of `iter_edge_batches`, see `bulk_merge_edges`."""
+        counters = []
+        indexed = set()
+        for group, rows in batches:
+            subj_labels = get_labels_from_template(group[0])
+            obj_labels = get_labels_from_template(group[2])
+            if ensure_index:
+                for labels, key in ((subj_labels, subj_key), (obj_labels, obj_key)):
+                    if labels and (labels, key) not in indexed:
+                        self.ensure_index(labels, [key])
+                        indexed.add((labels, key))
+            self.advisor.record(subj_labels, [subj_key], len(rows))
+            self.advisor.record(obj_labels, [obj_key], len(rows))
+            cypher = get_bulk_merge_edges_cypher(group, subj_key, obj_key)
+            counters.append(self.execute_write(cypher, {"rows": rows}))
+        return counters
+
+    def write_df_nodes(
+        self,
+        df: pd.DataFrame,
+        labels: Union[str, set[str]],
+        key: Optional[Union[str, List[str]]] = None,
+        batch_size: int = defaults.batch_size,
+        standardize_names: bool = True,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> List[BatchResult]:
+        """Create (`key` is None) or merge the rows of a DataFrame as nodes.
+
+        The frame is converted column by column (`get_param_frame`,
+        `get_frame_rows`) instead of value by value; missing values are not
+        set as properties.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            One node per row, columns are properties
+        labels : Union[str, set[str]]
+            Label(s) of the nodes
+        key : Optional[Union[str, List[str]]], optional
+            Property name(s) (after renaming) to merge on, by default None
+        batch_size : int, optional
+            Number of nodes per query, by default `defaults.batch_size`
+        standardize_names : bool, optional
+            Rename columns with `get_standard_name`, by default True
+        dtypes : Optional[Dict[str, Any]], optional
+            Types to cast columns (by original name) to, e.g. {"zip": str}
+
+        Returns
+        -------
+        List[BatchResult]
+            Element IDs and update counters per batch
+        """
+        df = get_param_frame(df, standardize_names, dtypes)
+        if key is None:
+            return self.bulk_create_nodes(labels, df, batch_size=batch_size)
+        keys = [key] if isinstance(key, str) else list(key)
+        missing_key = df[keys].isna().any(axis=1)
+        if missing_key.any():
+            logger.warning(f"Skipped {int(missing_key.sum())} rows without all of {keys}")
+            df = df[~missing_key]
+        return self.bulk_merge_nodes(labels, df, key=keys, batch_size=batch_size)
+
+    def write_df_edges(
+        self,
+        df: pd.DataFrame,
+        src_col: str,
+        dst_col: str,
+        rel_type: str,
+        src_label: str,
+        dst_label: str,
+        src_key: Optional[str] = None,
+        dst_key: Optional[str] = None,
+        batch_size: int = defaults.batch_size,
+        standardize_names: bool = True,
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, int]]:
+        """Merge the rows of a DataFrame as edges between existing nodes.
+
+        Like `write_df_nodes` the frame is converted column by column and
+        written with the query of `bulk_merge_edges`. Labels and type are the
+        same for all rows, so no per-row grouping is needed. Rows with a
+        missing source or destination are skipped.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            One edge per row, all columns except `src_col` and `dst_col` are
+            properties
+        src_col : str
+            Column with the key of the source node
+        dst_col : str
+            Column with the key of the destination node
+        rel_type : str
+            Relationship type
+        src_label : str
+            Label of the source nodes
+        dst_label : str
+            Label of the destination nodes
+        src_key : Optional[str], optional
+            Property identifying the source node, by default `src_col` (renamed
+            like the properties)
+        dst_key : Optional[str], optional
+            Property identifying the destination node, by default `dst_col`
+            (renamed like the properties)
+
+        See `write_df_nodes` for the other parameters.
+
+        Returns
+        -------
+        List[Dict[str, int]]
+            Update counters per batch
+        """
+        rename = get_standard_name if standardize_names else str
+        src_key = src_key or rename(src_col)
+        dst_key = dst_key or rename(dst_col)
+        if dtypes:
+            df = df.astype(dtypes)
+        missing = df[src_col].isna() | df[dst_col].isna()
+        if missing.any():
+            logger.warning(f"Skipped {int(missing.sum())} rows without {src_col} or {dst_col}")
+            df = df[~missing]
+        for col in (src_col, dst_col):
+            # ids read as float because of missing values
+            if df[col].dtype.kind == "f" and (df[col] % 1 == 0).all():
+                df = df.astype({col: "int64"})
+        props = get_param_frame(df.drop(columns=[src_col, dst_col]), standardize_names)
+        group = (
+            get_cypher_labels(Node(src_label).labels),
+            get_cypher_labels(Edge(rel_type).labels),
+            get_cypher_labels(Node(dst_label).labels),
+        )
+
+        def get_edge_batches():
+            for i in range(0, len(df), batch_size):
+                chunk = df.iloc[i : i + batch_size]
+                rows = [
+                    {"subj": subj, "obj": obj, "props": edge_props}
+                    for subj, obj, edge_props in zip(
+                        get_frame_values(chunk[src_col]),
+                        get_frame_values(chunk[dst_col]),
+                        get_frame_rows(props.iloc[i : i + batch_size]),
+                    )
+                ]
+                yield group, rows
+
+        return self.__merge_edge_batches(get_edge_batches(), src_key, dst_key)
 
     def merge_path(self):
         """MERGE finds or creates paths attached to the node."""
         cypher = """MATCH (a:Person {name: $value1})
             MERGE (a)-[r:KNOWS]->(b:Person {name: $value3})"""
 
-    def delete_edges(self, edge: Edge):
-        """Delete edges by Edge class."""
-        where = f"WHERE {edge.get_where('r')}" if edge.props else ""
-        cypher = f"""MATCH ()-[r:{edge.cypher_labels}]->() {where} DELETE r RETURN count(r) AS num"""
-        return self.session.run(cypher).data()[0]["num"]
+    @invalidates(*graph_metadata)
+    def __delete_in_batches(
+        self,
+        match: str,
+        var: str,
+        params: dict,
+        batch_size: int,
+        concurrency: int,
+        desc: str,
+    ) -> int:
+        """Delete the nodes (`var` "n") or relationships of `match` in batches.
+
+        One auto-commit query scans `match` once and deletes `batch_size`
+        elements per transaction with `CALL { } IN TRANSACTIONS`, with
+        `concurrency` > 1 in concurrent transactions. Returns the number of
+        deleted elements.
+        """
+        is_node = var == "n"
+        delete = f"DETACH DELETE {var}" if is_node else f"DELETE {var}"
+        counter = "nodes_deleted" if is_node else "relationships_deleted"
+        concurrent = f"{int(concurrency)} CONCURRENT " if concurrency > 1 else ""
+        cypher = f"""{match}
+            CALL {{ WITH {var} {delete} }}
+            IN {concurrent}TRANSACTIONS OF {int(batch_size)} ROWS"""
+        progress = tqdm(desc=desc, unit=" nodes" if is_node else " relationships")
+        try:
+            result = self.session.run(cypher, parameters=params)
+            total = get_counters(result.consume())[counter]
+            progress.update(total)
+        finally:
+            progress.close()
+        return total
+
+    def __delete_nodes(
+        self,
+        node: Optional[Node],
+        batch_size: int,
+        concurrency: int,
+        dry_run: bool,
+        supernode_degree: Optional[int] = defaults.supernode_degree,
+        no_edges: bool = False,
+        prefix: str = "",
+    ) -> DeleteCount:
+        """Delete nodes matching `node`, relationships of supernodes first.
+
+        Both deletions are single server-side scans, so the degree of a node
+        and the filter are evaluated once per node.
+        """
+        c = compile_element(node or Node(set()), "n")
+        if node:
+            self.__record_lookup(node)
+        conditions = [c.where] if c.where else []
+        if no_edges:
+            conditions.append("NOT (n)--()")
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        match = f"{prefix}MATCH (n{c.labels}) {where}"
+        if dry_run:
+            cypher = f"{match} RETURN count(n) AS nodes, sum(COUNT {{ (n)--() }}) AS relationships"
+            data = self.session.run(cypher, parameters=c.params).data()[0]
+            return DeleteCount(data["nodes"], data["relationships"] or 0)
+
+        relationships = 0
+        if supernode_degree and not no_edges:
+            # delete the relationships of nodes with many relationships in slices,
+            # so one batch of nodes never holds the relationships of a supernode
+            supernode_where = " AND ".join(conditions + ["COUNT { (n)--() } > $supernode_degree"])
+            relationships = self.__delete_in_batches(
+                f"{prefix}MATCH (n{c.labels}) WHERE {supernode_where} "
+                "MATCH (n)-[r]-() WITH DISTINCT r",
+                "r",
+                dict(c.params, supernode_degree=supernode_degree),
+                batch_size,
+                1,
+                "Deleting relationships of supernodes",
+            )
+        nodes = self.__delete_in_batches(
+            match, "n", c.params, batch_size, concurrency, "Deleting nodes"
+        )
+        return DeleteCount(nodes, relationships)
+
+    def __delete_edges(
+        self, edge: Optional[Edge], batch_size: int, concurrency: int, dry_run: bool
+    ) -> int:
+        c = compile_element(edge or Edge(set()), "r")
+        where = f"WHERE {c.where}" if c.where else ""
+        match = f"MATCH ()-[r{c.labels}]->() {where}"
+        if dry_run:
+            cypher = f"{match} RETURN count(r) AS num"
+            return self.session.run(cypher, parameters=c.params).data()[0]["num"]
+        return self.__delete_in_batches(
+            match, "r", c.params, batch_size, concurrency, "Deleting relationships"
+        )
+
+    @invalidates(*graph_metadata)
+    def delete_edges(
+        self,
+        edge: Edge,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+        dry_run: bool = False,
+    ) -> int:
+        """Delete edges by Edge class in batches.
+
+        Parameters
+        ----------
+        edge : Edge
+            Type and properties of the deleted edges
+        batch_size : int, optional
+            Number of edges deleted per transaction, by default `defaults.delete_batch_size`
+        concurrency : int, optional
+            Number of concurrent transactions on the server, by default 1
+            (batches are deleted one after another)
+        dry_run : bool, optional
+            Only count the edges which would be deleted, by default False
+
+        Returns
+        -------
+        int
+            Number of (to be) deleted edges
+        """
+        return self.__delete_edges(edge, batch_size, concurrency, dry_run)
 
+    @invalidates(*graph_metadata)
     def delete_edge_by_id(self, edge_id: int):
         """Delete an edge by id."""
-        cypher = f"""MATCH ()-[r]->()
-            WHERE r.id = {edge_id}
+        cypher = """MATCH ()-[r]->()
+            WHERE r.id = $edge_id
             DELETE r"""
+        return self.session.run(cypher, parameters={"edge_id": edge_id})
 
-    def delete_all_edges(self):
-        """Delete all edges."""
-        return self.session.run("MATCH ()-[r]->() DELETE r")
+    @invalidates(*graph_metadata)
+    def delete_all_edges(
+        self,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+        dry_run: bool = False,
+    ) -> int:
+        """Delete all edges in batches, see `delete_edges`."""
+        return self.__delete_edges(None, batch_size, concurrency, dry_run)
+
+    @invalidates(*graph_metadata)
+    def delete_nodes(
+        self,
+        node: Node,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+        dry_run: bool = False,
+    ) -> int:
+        """Delete all nodes (and connected edges) with a specific label in batches.
 
-    def delete_nodes(self, node: Node):
-        """Delete all nodes (and connected edges) with a specific label."""
-        where = f"WHERE {node.get_where('n')}" if node.props else ""
-        cypher = (
-            f"""MATCH (n:{node.cypher_labels}) {where} DETACH DELETE n """
-            "RETURN count(n) AS num"
-        )
-        return self.session.run(cypher).data()[0]["num"]
+        See `delete_all_nodes` for the parameters.
 
+        Returns
+        -------
+        int
+            Number of (to be) deleted nodes
+        """
+        return self.__delete_nodes(node, batch_size, concurrency, dry_run).nodes
+
+    @invalidates(*graph_metadata)
     def delete_node_and_connected_edges(self, id: int):
         """Delete a node and all relationships/edges connected to it."""
-        cypher = f"""MATCH (n)
-            WHERE n.id = {id}
+        cypher = """MATCH (n)
+            WHERE n.id = $id
             DETACH DELETE n"""
-        return self.session.run(cypher)
+        return self.session.run(cypher, parameters={"id": id})
 
+    @invalidates(*graph_metadata)
     def delete_node_edge(self, node_id: int, edge_id: int):
         """Delete a node and a relationship.
         This will throw an error if the node is attached
         to more than one relationship."""
-        cypher = f"""MATCH (n)-[r]-()
-            WHERE ID(r) = {edge_id} AND ID(n) = {node_id}
+        cypher = """MATCH (n)-[r]-()
+            WHERE ID(r) = $edge_id AND ID(n) = $node_id
             DELETE n, r"""
-        return self.session.run(cypher)
+        return self.session.run(
+            cypher, parameters={"edge_id": edge_id, "node_id": node_id}
+        )
 
     def empty_database(self):
         self.recreate_database()
 
+    @invalidates("databases", *graph_metadata)
     def recreate_database(self):
         self.session.run(f"DROP DATABASE {self.database} IF EXISTS")
         self.session.run(f"CREATE DATABASE {self.database}")
 
+    @invalidates("databases", *graph_metadata)
     def create_database(self):
         self.session.run(f"CREATE DATABASE {self.database} IF NOT EXISTS")
 
+    @invalidates("databases", *graph_metadata)
     def drop_database(self):
         self.session.run(f"DROP DATABASE {self.database} IF EXISTS")
 
+    @invalidates(*graph_metadata)
     def delete_all(self) -> int:
         """Delete all nodes and relationships from the database."""
         warnings.warn(
@@ -520,140 +2378,226 @@ class Db:
             "MATCH (n) DETACH DELETE n return count(n) AS num"
         ).data()[0]["num"]
 
+    @invalidates(*graph_metadata)
     def delete_all_nodes(
-        self, node: Optional[Node] = None, transition_size=10000, add_auto=False
-    ):
+        self,
+        node: Optional[Node] = None,
+        transition_size: int = defaults.delete_batch_size,
+        add_auto: bool = False,
+        concurrency: int = 1,
+        supernode_degree: Optional[int] = defaults.supernode_degree,
+        dry_run: bool = False,
+    ) -> DeleteCount:
         """Delete all nodes and relationships from the database.
 
+        Relationships of nodes with more than `supernode_degree`
+        relationships are deleted in slices first, then the nodes are
+        detach deleted in batches of `transition_size`.
+
         Parameters
         ----------
         node : Optional[Node], optional
             Use the Node class to specify the Node type (including properties), by default None
         transition_size : int, optional
-            Number of node and edges deleted in one transaction, by default 10000
+            Number of nodes or relationships deleted in one transaction, by
+            default `defaults.delete_batch_size`
         add_auto: bool
-            adds ':auto ' at the beginning of each Cypher query if 'True'[default]
-        """ """"""
-        auto_str = ":auto " if add_auto else ""
+            adds ':auto ' at the beginning of each Cypher query if 'True'
+        concurrency : int, optional
+            Number of transactions the server runs concurrently
+            (`IN CONCURRENT TRANSACTIONS`), by default 1. With 1 batches are
+            deleted one after another.
+        supernode_degree : Optional[int], optional
+            Number of relationships from which a node is handled as
+            supernode, by default `defaults.supernode_degree`; None disables
+            the pre-deletion
+        dry_run : bool, optional
+            Only count nodes and relationships which would be deleted, by
+            default False. Relationships between two deleted nodes are
+            counted twice.
 
-        if node:
-            where = node.get_where("n")
-            cypher_where = f" WHERE {where}" if where else ""
-            cypher_edges = f"""{auto_str}MATCH (n:{node.cypher_labels})-[r]-() {cypher_where}
-                CALL {{ WITH r
-                    DELETE r
-                }} IN TRANSACTIONS OF {transition_size} ROWS"""
-            cypher_nodes = f"""{auto_str}MATCH (n:{node.cypher_labels}) {cypher_where}
-                CALL {{ WITH n
-                    DETACH DELETE n
-                }} IN TRANSACTIONS OF {transition_size} ROWS"""
-        else:
-            cypher_edges = f"{auto_str}MATCH (n)-[r]-() CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF {transition_size} ROWS"
-            cypher_nodes = f"{auto_str}MATCH (n) CALL {{ WITH n DETACH DELETE n}} IN TRANSACTIONS OF {transition_size} ROWS"
-
-        self.session.run(cypher_edges)
-        self.session.run(cypher_nodes)
-
-        return
-
-    def delete_nodes_with_no_edges(self, node: Node):
-        cypher_where = ""
-        if node.props:
-            where = node.get_where("n")
-            if where:
-                cypher_where = " AND " + where
-        cypher = f"""MATCH (n: {node.cypher_labels})
-            WHERE NOT (n)-[]-() {cypher_where}
-            DELETE n RETURN count(n) AS number_of_deleted_nodes"""
-        return self.session.run(cypher).data()[0]["number_of_deleted_nodes"]
-
-    def delete_all_nodes_with_no_edges(self):
-        cypher = """MATCH (n)
-            WHERE NOT (n)-[]-()
-            DELETE n RETURN count(n) AS number_of_deleted_nodes"""
-        return self.session.run(cypher).data()[0]["number_of_deleted_nodes"]
+        Returns
+        -------
+        DeleteCount
+            Number of (to be) deleted nodes and relationships; relationships
+            deleted together with their nodes are not counted
+        """
+        prefix = ":auto " if add_auto else ""
+        return self.__delete_nodes(
+            node, transition_size, concurrency, dry_run, supernode_degree, prefix=prefix
+        )
+
+    @invalidates(*graph_metadata)
+    def delete_nodes_with_no_edges(
+        self,
+        node: Node,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+        dry_run: bool = False,
+    ) -> int:
+        """Delete nodes without edges in batches, see `delete_all_nodes`."""
+        return self.__delete_nodes(
+            node, batch_size, concurrency, dry_run, no_edges=True
+        ).nodes
+
+    @invalidates(*graph_metadata)
+    def delete_all_nodes_with_no_edges(
+        self,
+        batch_size: int = defaults.delete_batch_size,
+        concurrency: int = 1,
+        dry_run: bool = False,
+    ) -> int:
+        """Delete all nodes without edges in batches, see `delete_all_nodes`."""
+        return self.__delete_nodes(
+            None, batch_size, concurrency, dry_run, no_edges=True
+        ).nodes
 
     def get_number_of_nodes(self, node: Optional[Node] = None) -> int:
-        where, label = "", ""
+        c = compile_element(node or Node(set()), "n")
+        where = f" WHERE {c.where}" if c.where else ""
+        cypher = f"MATCH (n{c.labels}) {where} RETURN count(n) AS num"
         if node:
-            where_str = node.get_where("n")
-            where = f" WHERE {where_str}" if where_str else ""
-            label = f":`{node.cypher_labels}`"
-        cypher = f"MATCH (n{label}) {where} RETURN count(n) AS num" ""
-        return self.session.run(cypher).data()[0]["num"]
+            self.__record_lookup(node)
+        return self.session.run(cypher, parameters=c.params).data()[0]["num"]
 
     def node_labels_with_no_relationships(self):
         self.session.run("match ")
 
-    def get_node_label_statistics(self):
-        data = []
-        for label in self.node_labels:
-            data.append((label, self.get_number_of_nodes(node=Node(label))))
-        df = pd.DataFrame(data, columns=["label", "number_of_nodes"])
-        return df.set_index("label").sort_values(
-            by=["number_of_nodes"], ascending=False
+    def __load_statistics(self, relationship_labels: bool) -> Statistics:
+        try:
+            data = self.exec_data(graph_counts_cypher)
+            rows = get_graph_counts_rows(data[0]["data"] if data else {}, relationship_labels)
+        except ClientError:
+            # db.stats.retrieve is missing or not allowed for the user
+            rows = self.__load_count_store_rows(relationship_labels)
+        df = pd.DataFrame(rows, columns=["kind", "label", "type", "direction", "num"])
+        return Statistics(
+            df[df.kind == "label"][["label", "num"]]
+            .rename(columns={"num": "number_of_nodes"})
+            .set_index("label")
+            .sort_values(by=["number_of_nodes"], ascending=False),
+            df[df.kind == "type"][["type", "num"]]
+            .rename(columns={"num": "number_of_relationships"})
+            .set_index("type")
+            .sort_values(by=["number_of_relationships"], ascending=False),
+            df[df.kind == "label_type"][["label", "type", "direction", "num"]]
+            .rename(columns={"num": "number_of_relationships"})
+            .sort_values(by=["number_of_relationships"], ascending=False)
+            .reset_index(drop=True),
         )
 
-    def get_relationship_type_statistics(self):
-        data = []
-        for r_type in self.relationship_types:
-            data.append((r_type, self.get_number_of_edges(edge=Edge(r_type))))
-        df = pd.DataFrame(data, columns=["type", "number_of_relationships"])
-        return df.set_index("type").sort_values(
-            by=["number_of_relationships"], ascending=False
-        )
+    def __load_count_store_rows(self, relationship_labels: bool) -> List[tuple]:
+        """Read the counts with one UNION ALL query after listing labels and types."""
+        cypher_tokens = """CALL db.labels() YIELD label
+            WITH collect(label) AS labels
+            CALL db.relationshipTypes() YIELD relationshipType
+            RETURN labels, collect(relationshipType) AS types"""
+        tokens = self.exec_data(cypher_tokens)
+        labels, types = (tokens[0]["labels"], tokens[0]["types"]) if tokens else ([], [])
+        label_types = []
+        if relationship_labels and types:
+            for subj, rel_type, obj in self.schema[0]["relationships"]:
+                label_types.append((subj["name"], rel_type, "out"))
+                label_types.append((obj["name"], rel_type, "in"))
+        label_types = [
+            (labels.index(label), types.index(rel_type), direction)
+            for label, rel_type, direction in dict.fromkeys(label_types)
+            if label in labels and rel_type in types
+        ]
+        if not labels and not types:
+            return []
+        cypher = get_count_store_cypher(labels, types, label_types)
+        data = self.exec_data(cypher, {"labels": labels, "types": types})
+        return [
+            (x["kind"], x["label"], x["type"], x["direction"], x["num"]) for x in data
+        ]
+
+    def get_statistics(
+        self, relationship_labels: bool = True, ttl: Optional[float] = None
+    ) -> Statistics:
+        """Get node and relationship counts from the count store.
+
+        All counts are read from the count store with one round trip
+        (`db.stats.retrieve('GRAPH COUNTS')`). If the procedure is not
+        available to the user, labels and types are listed first and counted
+        with one query of `MATCH (n:Label) RETURN count(n)` like parts, which
+        Neo4J also answers from the count store (O(1) per label/type).
 
-    def get_label_statistics(self):
-        data = []
-        for label in self.node_labels:
-            data.append((label, self.get_number_of_nodes(node=Node(label))))
-        df = pd.DataFrame(data, columns=["label", "number_of_nodes"])
-        return df.set_index("label").sort_values(
-            by=["number_of_nodes"], ascending=False
+        Parameters
+        ----------
+        relationship_labels : bool, optional
+            Also count relationships per (label, type, direction) for all
+            combinations in the schema, by default True. The count store only
+            knows the label of one side of a relationship, so the counts are
+            for `(:Label)-[:TYPE]->()` (out) and `()-[:TYPE]->(:Label)` (in).
+        ttl : Optional[float], optional
+            Return cached statistics if younger than `ttl` seconds, by default
+            None (always query)
+
+        Returns
+        -------
+        Statistics
+            DataFrames `labels` (number_of_nodes by label),
+            `relationship_types` (number_of_relationships by type) and
+            `relationship_labels` (number_of_relationships by label, type and
+            direction)
+        """
+        return self.__statistics_cache.get(
+            ("statistics", relationship_labels),
+            lambda: self.__load_statistics(relationship_labels),
+            ttl=ttl,
         )
 
+    def get_node_label_statistics(self, ttl: Optional[float] = None):
+        return self.get_statistics(relationship_labels=False, ttl=ttl).labels
+
+    def get_relationship_type_statistics(self, ttl: Optional[float] = None):
+        return self.get_statistics(relationship_labels=False, ttl=ttl).relationship_types
+
+    def get_label_statistics(self, ttl: Optional[float] = None):
+        return self.get_node_label_statistics(ttl=ttl)
+
     def get_number_of_edges(self, edge: Optional[Edge] = None) -> int:
-        where, label = "", ""
-        if edge:
-            where_str = edge.get_where("e")
-            where = f" WHERE {where_str}" if where_str else ""
-            label = f":`{edge.cypher_labels}`"
-        cypher = f"MATCH ()-[e{label}]->() {where} RETURN count(e) AS num" ""
-        return self.session.run(cypher).data()[0]["num"]
+        c = compile_element(edge or Edge(set()), "e")
+        where = f" WHERE {c.where}" if c.where else ""
+        cypher = f"MATCH ()-[e{c.labels}]->() {where} RETURN count(e) AS num"
+        return self.session.run(cypher, parameters=c.params).data()[0]["num"]
 
+    @invalidates(*graph_metadata)
     def remove_node_label(self, labels: Union[set[str], str], node_id):
         """Remove a label(s) from a node."""
-        node = Node(labels)
-        cypher = f"""MATCH (n:{node.cypher_labels})
-            WHERE ID(n) = {node_id}
-            REMOVE n:{node.cypher_labels}"""
-        return self.session.run(cypher)
+        c = compile_element(Node(labels), "n")
+        cypher = f"""MATCH (n{c.labels})
+            WHERE ID(n) = $node_id
+            REMOVE n{c.labels}"""
+        return self.session.run(cypher, parameters={"node_id": node_id})
 
     def remove_node_prop_by_id(self, node_id: int, prop_name: str):
         """Remove a node property by ID."""
         cypher = f"""MATCH (n)
-            WHERE ID(n) = {node_id}
-            REMOVE n.{prop_name}"""
-        return self.session.run(cypher)
+            WHERE ID(n) = $node_id
+            REMOVE n.{quote_name(prop_name)}"""
+        return self.session.run(cypher, parameters={"node_id": node_id})
 
     def remove_node_prop_by_label(self, labels: Union[set[str], str], prop_name: str):
         """Remove a node property by label."""
-        node = Node(labels)
-        cypher = f"""MATCH (n: {node.cypher_labels})
-            REMOVE n.{prop_name}"""
+        c = compile_element(Node(labels), "n")
+        cypher = f"""MATCH (n{c.labels})
+            REMOVE n.{quote_name(prop_name)}"""
         return self.session.run(cypher)
 
     def remove_all_node_prop_by_id(self, node_id: int, prop_name: str):
         """Remove all node properties by ID."""
-        cypher = f"""MATCH (n)
-            WHERE ID(n) = {node_id}
-            REMOVE n = {{}}"""
-        return self.session.run(cypher)
+        cypher = """MATCH (n)
+            WHERE ID(n) = $node_id
+            SET n = {}"""
+        return self.session.run(cypher, parameters={"node_id": node_id})
 
     def remove_all_node_prop_by_label(self, label: str, prop_name: str):
         """Remove a node property by label."""
-        cypher = f"""MATCH (n: {label})
-            REMOVE n = {{}}"""
+        c = compile_element(Node(label), "n")
+        cypher = f"""MATCH (n{c.labels})
+            SET n = {{}}"""
         return self.session.run(cypher)
 
     def list_labels(self):
@@ -669,7 +2613,10 @@ class Db:
         List[str]
             List of all node labels
         """
-        return [x["label"] for x in self.exec_data("CALL db.labels() YIELD label")]
+        return self.__metadata_cache.get(
+            "node_labels",
+            lambda: [x["label"] for x in self.exec_data("CALL db.labels() YIELD label")],
+        )
 
     @property
     def relationship_types(self) -> List[str]:
@@ -680,35 +2627,103 @@ class Db:
         List[str]
             List of all edge/relationship types
         """
-        return [
-            x["relationshipType"] for x in self.exec_data("CALL db.relationshipTypes")
-        ]
+        return self.__metadata_cache.get(
+            "relationship_types",
+            lambda: [
+                x["relationshipType"]
+                for x in self.exec_data("CALL db.relationshipTypes")
+            ],
+        )
 
     def list_all_columns(self):
         return self.exec_data("CALL db.labels() YIELD *")
 
+    @contextmanager
+    def __staged_file(self, file_path: str):
+        """Symlink `file_path` with a unique name into the import folder.
+
+        Yields the `file:///` URL of the link, which is removed afterwards, so
+        concurrent loads do not overwrite each other's files.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Not able to find {file_path}.")
+        extension = os.path.splitext(file_path)[1]
+        import_file = f"neo4j_tools_{uuid.uuid4().hex}{extension}"
+        sym_link = os.path.join(self.__config.import_folder, import_file)
+        os.symlink(os.path.abspath(file_path), sym_link)
+        try:
+            yield f"file:///{import_file}"
+        finally:
+            os.remove(sym_link)
+
+    def __load_csv(
+        self,
+        file_path: str,
+        write_cypher: str,
+        field_terminator: str,
+        batch_size: int,
+        where: str = "",
+    ) -> Dict[str, int]:
+        """Run `write_cypher` for each CSV line in batched transactions."""
+        with self.__staged_file(file_path) as url:
+            cypher = f"""LOAD CSV WITH HEADERS FROM $url
+                AS line FIELDTERMINATOR '{get_cypher_string(field_terminator)}'
+                {where}
+                CALL {{ WITH line
+                    {write_cypher}
+                }} IN TRANSACTIONS OF {int(batch_size)} ROWS"""
+            result = self.session.run(cypher, parameters={"url": url})
+            return get_counters(result.consume())
+
+    @invalidates(*graph_metadata)
     def load_nodes_from_csv(
         self,
         label: str,
         file_path: str,
         use_cols: Optional[list[str]] = [],
         field_terminator=",",
-    ):
-        """Load nodes from CSV file."""
-
-        import_file = "import_file.csv"
-        sym_link = self.__config.import_folder + import_file
-
-        if os.path.exists(sym_link):
-            os.remove(sym_link)
+        dtypes: Optional[Dict[str, Union[type, str]]] = None,
+        key: Optional[Union[str, List[str]]] = None,
+        batch_size: int = defaults.csv_batch_size,
+        infer_dtypes: bool = False,
+    ) -> Dict[str, int]:
+        """Load nodes from CSV file in the import folder of the server.
+
+        The file is linked with a unique name into the import folder and
+        loaded server side with `LOAD CSV` in batched transactions
+        (`CALL { ... } IN TRANSACTIONS OF n ROWS`). Property names are the
+        lower case column names.
 
-        if os.path.exists(file_path):
-            os.symlink(file_path, sym_link)
+        Parameters
+        ----------
+        label : str
+            Label of the nodes
+        file_path : str
+            Path of the CSV file (with header)
+        use_cols : Optional[list[str]], optional
+            Columns to import, by default [] (all); None imports no properties
+        field_terminator : str, optional
+            Field delimiter, by default ","
+        dtypes : Optional[Dict[str, Union[type, str]]], optional
+            Types by column name: `bool`, `float` or `int` (cast with
+            `py_neo_cast_map`) or the name of a Cypher function like "date".
+            Other columns are loaded as strings, by default None (all).
+        key : Optional[Union[str, List[str]]], optional
+            Column(s) to MERGE nodes on instead of CREATE, by default None.
+            Lines with an empty key or a key not castable to its type are skipped.
+        batch_size : int, optional
+            Number of lines per transaction, by default `defaults.csv_batch_size`
+        infer_dtypes : bool, optional
+            Infer the types of columns not in `dtypes` from the first 1000
+            lines with `infer_csv_dtypes`, by default False. Later values
+            which cannot be cast are loaded as null.
 
-        with open(file_path) as f:
-            cols = [
-                x.strip() for x in f.readline().split(field_terminator) if x.strip()
-            ]
+        Returns
+        -------
+        Dict[str, int]
+            Update counters
+        """
+        cols = read_csv_header(file_path, field_terminator)
 
         if use_cols == []:  # if use_cols is an empty list import all available
             use_cols = cols
@@ -716,39 +2731,512 @@ class Db:
             use_cols = [col for col in use_cols if col in cols]
         # if use_cols is None import no props
 
-        import_cols = ""
-        if use_cols != None:
-            import_cols = (
-                "{" + ", ".join([f"{x.lower()}: line.{x}" for x in use_cols]) + "}"
+        dtypes = dict(
+            infer_csv_dtypes(file_path, field_terminator) if infer_dtypes else {},
+            **(dtypes or {}),
+        )
+
+        props = get_csv_props_cypher(use_cols or [], dtypes)
+        cypher_labels = get_cypher_labels(Node(label).labels)
+        where = ""
+        if key:
+            keys = [key] if isinstance(key, str) else list(key)
+            merge_props = get_csv_props_cypher(keys, dtypes)
+            write_cypher = f"MERGE (n{cypher_labels} {merge_props}) SET n += {props}"
+            where = "WITH line WHERE " + " AND ".join(
+                [f"{get_csv_value_cypher(k, dtypes.get(k))} IS NOT NULL" for k in keys]
             )
+        else:
+            write_cypher = f"CREATE (n{cypher_labels}) SET n += {props}"
+        return self.__load_csv(file_path, write_cypher, field_terminator, batch_size, where)
 
-        cypher = f"""LOAD CSV WITH HEADERS FROM
-            'file:///{import_file}'
-            AS line FIELDTERMINATOR '{field_terminator}'
-            CREATE (:{label} {import_cols})"""
-        return self.session.run(cypher)
+    @invalidates(*graph_metadata)
+    def load_edges_from_csv(
+        self,
+        rel_type: str,
+        file_path: str,
+        subj_label: str,
+        subj_col: str,
+        obj_label: str,
+        obj_col: str,
+        subj_key: Optional[str] = None,
+        obj_key: Optional[str] = None,
+        use_cols: Optional[list[str]] = [],
+        field_terminator=",",
+        dtypes: Optional[Dict[str, Union[type, str]]] = None,
+        batch_size: int = defaults.csv_batch_size,
+        infer_dtypes: bool = False,
+    ) -> Dict[str, int]:
+        """Load edges between existing nodes from CSV file.
+
+        Like `load_nodes_from_csv` the file is loaded server side in batched
+        transactions. For each line the subject and object node are matched
+        and the edge is merged::
+
+            MATCH (a:SubjLabel {subj_key: line.subj_col})
+            MATCH (b:ObjLabel {obj_key: line.obj_col})
+            MERGE (a)-[r:TYPE]->(b) SET r += {...}
+
+        Parameters
+        ----------
+        rel_type : str
+            Relationship type
+        file_path : str
+            Path of the CSV file (with header)
+        subj_label : str
+            Label of the subject nodes
+        subj_col : str
+            Column with the key of the subject node
+        obj_label : str
+            Label of the object nodes
+        obj_col : str
+            Column with the key of the object node
+        subj_key : Optional[str], optional
+            Property identifying the subject node, by default `subj_col` in lower case
+        obj_key : Optional[str], optional
+            Property identifying the object node, by default `obj_col` in lower case
+        use_cols : Optional[list[str]], optional
+            Columns imported as edge properties, by default [] (all except
+            `subj_col` and `obj_col`); None imports no properties
+        field_terminator : str, optional
+            Field delimiter, by default ","
+        dtypes : Optional[Dict[str, Union[type, str]]], optional
+            Types by column name, see `load_nodes_from_csv`
+        batch_size : int, optional
+            Number of lines per transaction, by default `defaults.csv_batch_size`
+        infer_dtypes : bool, optional
+            Infer column types, see `load_nodes_from_csv`, by default False
+
+        Returns
+        -------
+        Dict[str, int]
+            Update counters
+        """
+        cols = read_csv_header(file_path, field_terminator)
+        if use_cols == []:
+            use_cols = [col for col in cols if col not in (subj_col, obj_col)]
+        elif use_cols:
+            use_cols = [col for col in use_cols if col in cols]
+
+        dtypes = dict(
+            infer_csv_dtypes(file_path, field_terminator) if infer_dtypes else {},
+            **(dtypes or {}),
+        )
+
+        subj_key = subj_key or subj_col.lower()
+        obj_key = obj_key or obj_col.lower()
+        subj_value = get_csv_value_cypher(subj_col, dtypes.get(subj_col))
+        obj_value = get_csv_value_cypher(obj_col, dtypes.get(obj_col))
+        write_cypher = f"""MATCH (a{get_cypher_labels([subj_label])} {{{quote_name(subj_key)}: {subj_value}}})
+                    MATCH (b{get_cypher_labels([obj_label])} {{{quote_name(obj_key)}: {obj_value}}})
+                    MERGE (a)-[r{get_cypher_labels([rel_type])}]->(b)
+                    SET r += {get_csv_props_cypher(use_cols or [], dtypes)}"""
+        where = (
+            f"WITH line WHERE line.{quote_name(subj_col)} IS NOT NULL"
+            f" AND line.{quote_name(obj_col)} IS NOT NULL"
+        )
+        return self.__load_csv(file_path, write_cypher, field_terminator, batch_size, where)
+
+    def __load_file(
+        self,
+        file_path: str,
+        write: Callable[[pd.DataFrame], Iterable[Dict[str, int]]],
+        file_format: Optional[str],
+        chunksize: int,
+        queue_size: int,
+        read_kwargs: dict,
+        batch_size: int,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> Dict[str, int]:
+        """Read file chunks in the calling thread and `write` them in a worker thread.
+
+        Each chunk is passed to `write` in frames of `batch_size` rows, which
+        are written in one transaction each, and the checkpoint is saved after
+        every frame.
+        """
+        total: Dict[str, int] = {}
+        chunks = read_file_chunks(file_path, file_format, chunksize, **read_kwargs)
+        if checkpoint:
+            chunks = checkpoint.skip(chunks)
+        progress = tqdm(
+            unit=" rows",
+            desc=os.path.basename(file_path),
+            initial=checkpoint.rows if checkpoint else 0,
+        )
+
+        def consume(chunk: pd.DataFrame):
+            for i in range(0, len(chunk), batch_size):
+                batch = chunk.iloc[i : i + batch_size]
+                for counters in write(batch):
+                    add_counters(total, counters)
+                if checkpoint:
+                    checkpoint.commit(len(batch))
+                progress.update(len(batch))
+
+        try:
+            consume_in_background(
+                chunks, consume, queue_size=queue_size, on_exit=self.__close_thread_session
+            )
+        finally:
+            progress.close()
+        if checkpoint:
+            checkpoint.remove()
+        return total
 
-    def __get_chunks(self, list_a, chunk_size=1000):
-        for i in range(0, len(list_a), chunk_size):
-            yield list_a[i : i + chunk_size]
+    def load_nodes_from_file(
+        self,
+        labels: Union[str, set[str]],
+        file_path: str,
+        key: Optional[Union[str, List[str]]] = None,
+        file_format: Optional[str] = None,
+        chunksize: int = defaults.file_chunksize,
+        batch_size: int = defaults.batch_size,
+        queue_size: int = 2,
+        checkpoint: Optional[str] = None,
+        **read_kwargs,
+    ) -> Dict[str, int]:
+        """Load nodes from a local CSV, JSONL or Parquet file over Bolt.
+
+        In contrast to `load_nodes_from_csv` the file is read by the client, so
+        no access to the import folder of the server is needed. The file is
+        parsed in chunks while the previous chunks are written in UNWIND
+        batches by a worker thread; memory is bounded by `chunksize` *
+        `queue_size`. Columns are used as property names.
+
+        Parameters
+        ----------
+        labels : Union[str, set[str]]
+            Label(s) of the nodes
+        file_path : str
+            Path of the file
+        key : Optional[Union[str, List[str]]], optional
+            Property name(s) to MERGE nodes on, by default None (CREATE)
+        file_format : Optional[str], optional
+            "csv", "jsonl" or "parquet", by default by file extension
+        chunksize : int, optional
+            Number of rows read at once, by default `defaults.file_chunksize`
+        batch_size : int, optional
+            Number of nodes written per query, by default `defaults.batch_size`
+        queue_size : int, optional
+            Maximum number of read chunks waiting to be written, by default 2
+        checkpoint : Optional[str], optional
+            Path of a checkpoint file to resume an interrupted load, see
+            `import_nodes_from_mysql`, by default None
+        **read_kwargs
+            Passed to `pd.read_csv`/`pd.read_json`, e.g. `sep`, `usecols` or `dtype`
+
+        Returns
+        -------
+        Dict[str, int]
+            Summed update counters
+        """
+
+        def write(chunk: pd.DataFrame):
+            if key is None:
+                results = self.bulk_create_nodes(labels, chunk, batch_size=batch_size)
+            else:
+                results = self.bulk_merge_nodes(labels, chunk, key=key, batch_size=batch_size)
+            return [result.counters for result in results]
+
+        if checkpoint:
+            checkpoint = Checkpoint(
+                checkpoint, f"load_nodes_from_file:{sorted(Node(labels).labels)}:{os.path.abspath(file_path)}:{key}"
+            )
+        return self.__load_file(
+            file_path,
+            write,
+            file_format,
+            chunksize,
+            queue_size,
+            read_kwargs,
+            batch_size,
+            checkpoint,
+        )
+
+    def load_edges_from_file(
+        self,
+        rel_type: str,
+        file_path: str,
+        subj_label: str,
+        subj_col: str,
+        obj_label: str,
+        obj_col: str,
+        subj_key: Optional[str] = None,
+        obj_key: Optional[str] = None,
+        file_format: Optional[str] = None,
+        chunksize: int = defaults.file_chunksize,
+        batch_size: int = defaults.batch_size,
+        queue_size: int = 2,
+        checkpoint: Optional[str] = None,
+        **read_kwargs,
+    ) -> Dict[str, int]:
+        """Merge edges between existing nodes from a local CSV, JSONL or Parquet file.
+
+        Client-side counterpart of `load_edges_from_csv`, the file is read and
+        written like in `load_nodes_from_file` with `bulk_merge_edges`. All
+        columns except `subj_col` and `obj_col` are used as edge properties.
+
+        Parameters
+        ----------
+        rel_type : str
+            Relationship type
+        file_path : str
+            Path of the file
+        subj_label : str
+            Label of the subject nodes
+        subj_col : str
+            Column with the key of the subject node
+        obj_label : str
+            Label of the object nodes
+        obj_col : str
+            Column with the key of the object node
+        subj_key : Optional[str], optional
+            Property identifying the subject node, by default `subj_col`
+        obj_key : Optional[str], optional
+            Property identifying the object node, by default `obj_col`
+
+        See `load_nodes_from_file` for the other parameters.
+
+        Returns
+        -------
+        Dict[str, int]
+            Summed update counters
+        """
+
+        def write(chunk: pd.DataFrame):
+            return self.write_df_edges(
+                chunk,
+                subj_col,
+                obj_col,
+                rel_type,
+                subj_label,
+                obj_label,
+                subj_key,
+                obj_key,
+                batch_size=batch_size,
+                standardize_names=False,
+            )
+
+        if checkpoint:
+            checkpoint = Checkpoint(
+                checkpoint, f"load_edges_from_file:{rel_type}:{os.path.abspath(file_path)}"
+            )
+        return self.__load_file(
+            file_path,
+            write,
+            file_format,
+            chunksize,
+            queue_size,
+            read_kwargs,
+            batch_size,
+            checkpoint,
+        )
 
     def import_nodes_from_mysql(
-        self, label, dict_cursor, sql, database="", merge=False
+        self,
+        label,
+        dict_cursor,
+        sql,
+        database="",
+        merge=False,
+        key: Optional[Union[str, List[str]]] = None,
+        batch_size: int = defaults.batch_size,
+        queue_size: int = 4,
+        checkpoint: Optional[str] = None,
+        ensure_index: bool = False,
     ):
+        """Import the result of a SQL query as nodes.
+
+        Rows are fetched with `fetchmany` and written in parameterized UNWIND
+        batches by a separate thread, so fetching and writing overlap. With an
+        unbuffered cursor peak memory depends on `batch_size` * `queue_size`
+        instead of the table size. The default pymysql cursors (`Cursor`,
+        `DictCursor`) load the whole result set on `execute`, use
+        `pymysql.cursors.SSDictCursor` for large tables:
+
+        >>> connection = pymysql.connect(..., cursorclass=pymysql.cursors.SSDictCursor)
+        >>> db.import_nodes_from_mysql("Person", connection.cursor(), "SELECT * FROM person")
+
+        Parameters
+        ----------
+        label : str
+            Label of the imported nodes
+        dict_cursor : DB-API cursor
+            Cursor of any DB-API connection (pymysql, sqlite3, ...). Rows can
+            be dictionaries or tuples. A buffered pymysql cursor logs a warning.
+        sql : str
+            SQL query selecting the node properties
+        database : str, optional
+            SQL database to use before executing `sql`, by default ""
+        merge : bool, optional
+            MERGE instead of CREATE nodes, by default False
+        key : Optional[Union[str, List[str]]], optional
+            Property name(s) nodes are merged on, by default all columns
+            which are not NULL in a row
+        batch_size : int, optional
+            Number of rows fetched and written at once, by default `defaults.batch_size`
+        queue_size : int, optional
+            Maximum number of fetched batches waiting to be written, by default 4
+        checkpoint : Optional[str], optional
+            Path of a checkpoint file, by default None. After every written
+            batch the number of imported rows is saved; rerunning the same
+            import skips these rows (`sql` must return rows in a stable order,
+            e.g. with ORDER BY). The file is removed when the import finished.
+        ensure_index : bool, optional
+            With `merge`, create an index on `label` and `key` before the
+            first batch if there is none, by default False
+        """
+        if is_buffered_cursor(dict_cursor):
+            logger.warning(
+                "pymysql cursor loads the whole result set into memory, "
+                "use pymysql.cursors.SSDictCursor to stream it"
+            )
         if database:
             dict_cursor.execute(f"use {database}")
         dict_cursor.execute(sql)
-        chunks = self.__get_chunks(dict_cursor.fetchall())
-        for rows in tqdm(chunks):
-            cyphers = [f"(:{label} {get_cypher_props(row)})" for row in rows]
-            if merge:
-                for cypher in cyphers:
-                    self.session.run(f"MERGE {cypher}")
+        if merge and ensure_index:
+            self.ensure_index(label, key or [column[0] for column in dict_cursor.description])
+
+        batches = fetch_batches(dict_cursor, batch_size)
+        if checkpoint:
+            checkpoint = Checkpoint(
+                checkpoint, f"import_nodes_from_mysql:{label}:{database}:{sql}"
+            )
+            batches = checkpoint.skip(batches)
+        progress = tqdm(unit=" rows", initial=checkpoint.rows if checkpoint else 0)
+
+        def write(rows: List[dict]):
+            if merge and key is None:
+                rows_by_columns: Dict[tuple, List[dict]] = {}
+                for row in map(get_param_props, rows):
+                    rows_by_columns.setdefault(tuple(row), []).append(row)
+                rows_by_columns.pop((), None)
+                for columns, column_rows in rows_by_columns.items():
+                    self.bulk_merge_nodes(
+                        label, column_rows, key=list(columns), batch_size=batch_size
+                    )
+            elif merge:
+                self.bulk_merge_nodes(label, rows, key=key, batch_size=batch_size)
             else:
-                nodes = ",".join(cyphers)
-                cypher = f"CREATE {nodes}"
-                self.session.run(cypher)
+                self.bulk_create_nodes(label, rows, batch_size=batch_size)
+            if checkpoint:
+                last_key = rows[-1].get(key) if isinstance(key, str) else None
+                checkpoint.commit(len(rows), last_key)
+            progress.update(len(rows))
+
+        try:
+            consume_in_background(
+                batches, write, queue_size=queue_size, on_exit=self.__close_thread_session
+            )
+        finally:
+            progress.close()
+        if checkpoint:
+            checkpoint.remove()
+
+    def advise_indexes(self, missing_only: bool = True) -> pd.DataFrame:
+        """Return the label/property lookups of this `Db` ranked by calls.
+
+        Lookups are recorded by the MATCH/MERGE methods (e.g. `merge_node`,
+        `get_node`, `bulk_merge_nodes`, `bulk_merge_edges`) and compared with
+        `show_indexes` (which includes the indexes backing constraints).
 
+        Parameters
+        ----------
+        missing_only : bool, optional
+            Only lookups without usable index, by default True
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns `entity`, `labels`, `properties`, `calls` and `index`
+        """
+        return self.advisor.report(self.show_indexes(as_df=False), missing_only)
+
+    @invalidates("indexes", "constraints")
+    def ensure_index(
+        self,
+        labels: Union[str, Iterable[str]],
+        properties: Union[str, List[str]],
+        unique: bool = False,
+        entity: str = "NODE",
+        wait: bool = True,
+        timeout: int = defaults.index_timeout,
+    ) -> str:
+        """Create an index (or unique constraint) if no usable index exists.
+
+        Parameters
+        ----------
+        labels : Union[str, Iterable[str]]
+            Label(s) or relationship type; the index is created on the first
+            label (sorted) if none of them has a usable index
+        properties : Union[str, List[str]]
+            Property name(s), more than one create a composite index
+        unique : bool, optional
+            Create a unique constraint (node key) instead of an index, by default False
+        entity : str, optional
+            "NODE" or "RELATIONSHIP", by default "NODE"
+        wait : bool, optional
+            Wait until the new or an existing populating index is online
+            (`db.awaitIndex`), by default True
+        timeout : int, optional
+            Seconds to wait, by default `defaults.index_timeout`
+
+        Returns
+        -------
+        str
+            Name of the existing or created index/constraint
+        """
+        labels = get_labels_key([labels] if isinstance(labels, str) else labels)
+        properties = [properties] if isinstance(properties, str) else list(properties)
+        shape = (entity, labels, tuple(sorted(properties)))
+        indexes = self.show_indexes(as_df=False)
+        existing = get_covering_index(Shape(*shape), indexes)
+        if existing:
+            state = next(x.get("state") for x in indexes if x.get("name") == existing)
+            if wait and state != "ONLINE":
+                self.__await_index(existing, timeout)
+            return existing
+        label = labels[0]
+        name = f"{'uid' if unique else 'ix'}_{label}__{'_'.join(properties)}"
+        if entity == "NODE":
+            pattern = f"(e:{quote_name(label)})"
+        else:
+            pattern = f"()-[e:{quote_name(label)}]-()"
+        props = ", ".join([f"e.{quote_name(x)}" for x in properties])
+        if unique:
+            cypher = f"CREATE CONSTRAINT {quote_name(name)} IF NOT EXISTS FOR {pattern} REQUIRE ({props}) IS UNIQUE"
+        else:
+            cypher = f"CREATE INDEX {quote_name(name)} IF NOT EXISTS FOR {pattern} ON ({props})"
+        self.session.run(cypher).consume()
+        if wait:
+            self.__await_index(name, timeout)
+        return name
+
+    def __await_index(self, name: str, timeout: int):
+        cypher = "CALL db.awaitIndex($name, $timeout)"
+        self.session.run(cypher, parameters={"name": name, "timeout": timeout}).consume()
+
+    def create_missing_indexes(self, min_calls: int = 1, wait: bool = True) -> List[str]:
+        """Create indexes for all lookups of `advise_indexes` with at least `min_calls`.
+
+        Returns
+        -------
+        List[str]
+            Names of the created indexes
+        """
+        names = []
+        for row in self.advise_indexes().itertuples():
+            if row.calls >= min_calls:
+                names.append(
+                    self.ensure_index(row.labels, row.properties, entity=row.entity, wait=False)
+                )
+        if wait and names:
+            self.session.run(
+                "CALL db.awaitIndexes($timeout)", parameters={"timeout": defaults.index_timeout}
+            ).consume()
+        return names
+
+    @invalidates("indexes")
     def create_node_index(
         self, label: str, prop_name: str, index_name: Optional[str] = None
     ):
@@ -757,6 +3245,7 @@ class Db:
         cypher = f"CREATE INDEX {index_name} IF NOT EXISTS FOR (p:{label}) ON (p.{prop_name})"
         return self.session.run(cypher)
 
+    @invalidates("indexes")
     def create_edge_index(
         self, label: str, prop_name: str, index_name: Optional[str] = None
     ):
@@ -765,14 +3254,17 @@ class Db:
         cypher = f"CREATE INDEX {index_name} IF NOT EXISTS FOR ()-[k:{label}]-() ON (k.{prop_name})"
         return self.session.run(cypher)
 
+    @invalidates("indexes")
     def drop_node_index(self, index_name: str):
         cypher = f"DROP INDEX {index_name} IF EXISTS"
         return self.session.run(cypher)
 
+    @invalidates("indexes", "constraints")
     def drop_constraint(self, constraint_name):
         cypher = f"DROP CONSTRAINT {constraint_name} IF EXISTS"
         return self.session.run(cypher)
 
+    @invalidates("indexes", "constraints")
     def create_unique_constraint(
         self, label: str, prop_name: str, constraint_name: Optional[str] = None
     ):
@@ -781,6 +3273,7 @@ class Db:
         cypher = f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop_name} IS UNIQUE"
         return self.session.run(cypher)
 
+    @invalidates("indexes", "constraints")
     def delete_unique_constraint(
         self, label, prop_name, constraint_name: Optional[str] = None
     ):
@@ -794,23 +3287,27 @@ class Db:
         return self.exec_df(cypher)
 
     def terminate_transactions(self, transaction_ids: Iterable[int]):
-        transaction_ids_str = ", ".join([str(x) for x in transaction_ids])
-        cypher = "TERMINATE TRANSACTIONS {transaction_ids_str}"
-        return self.session.run(cypher)
+        cypher = "TERMINATE TRANSACTIONS $ids"
+        return self.session.run(
+            cypher, parameters={"ids": [str(x) for x in transaction_ids]}
+        )
 
     def get_node(self, node: Node):
-        cypher = f"MATCH (n:{node.cypher_labels}) where {node.get_where('n')} return n"
-        return [x["n"] for x in self.exec_data(cypher)]
+        c = compile_element(node, "n")
+        where = f"where {c.where}" if c.where else ""
+        cypher = f"MATCH (n{c.labels}) {where} return n"
+        self.__record_lookup(node)
+        return [x["n"] for x in self.exec_data(cypher, c.params)]
 
     def get_node_by_id(self, node_id: int):
-        cypher = f"MATCH (n) WHERE ID(n) = {node_id} RETURN n LIMIT 1"
-        values = self.session.run(cypher).values()
+        cypher = "MATCH (n) WHERE ID(n) = $node_id RETURN n LIMIT 1"
+        values = self.session.run(cypher, parameters={"node_id": node_id}).values()
         if values:
             return values[0][0]
 
     def get_edge_by_id(self, edge_id: int):
-        cypher = f"MATCH (n)-[r]->(m) WHERE ID(r) = {edge_id} RETURN n,r,m LIMIT 1"
-        values = self.session.run(cypher).values()
+        cypher = "MATCH (n)-[r]->(m) WHERE ID(r) = $edge_id RETURN n,r,m LIMIT 1"
+        values = self.session.run(cypher, parameters={"edge_id": edge_id}).values()
         if values:
             return values[0]
 
@@ -818,17 +3315,16 @@ class Db:
         return self.session.run("CALL dbms.procedures()").to_df()
 
     def get_edge_types_by_prefix(self, prefix: str):
-        cypher = (
-            f"MATCH ()-[r]->() where type(r)=~'^{prefix}__.*' RETURN distinct type(r)"
-        )
-        return [x[0] for x in self.session.run(cypher).values()]
+        cypher = "MATCH ()-[r]->() where type(r) STARTS WITH $prefix RETURN distinct type(r)"
+        values = self.session.run(cypher, parameters={"prefix": f"{prefix}__"}).values()
+        return [x[0] for x in values]
 
     def count_nodes(self, node: Node):
-        cypher = f"match (n:{node.cypher_labels}) return count(n) as num"
+        cypher = f"match (n{get_cypher_labels(node.labels)}) return count(n) as num"
         return self.session.run(cypher).data()[0]["num"]
 
     def count_edges(self, edge: Edge):
-        cypher = f"match ()-[r:{edge.cypher_labels}]->() return count(r) as num"
+        cypher = f"match ()-[r{get_cypher_labels(edge.labels)}]->() return count(r) as num"
         return self.session.run(cypher).data()[0]["num"]
 
     def exec_large_cypher(
@@ -0,0 +1,274 @@
+"""Parallel partitioned bulk loading with one session per worker."""
+import logging
+import time
+from queue import Queue
+from threading import Thread, Event
+from typing import Optional, List, Dict, Iterable, Union, Tuple
+
+import numpy as np
+import pandas as pd
+from typing_extensions import LiteralString
+
+from neo4j_tools import defaults
+from neo4j_tools.compiler import get_param_value
+from neo4j_tools.neo4j_tools import (
+    Db,
+    Edge,
+    Node,
+    get_batches,
+    get_bulk_create_nodes_cypher,
+    get_bulk_merge_edges_cypher,
+    get_bulk_merge_nodes_cypher,
+    get_rows_with_keys,
+    iter_edge_rows,
+    run_with_retry,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_hashable(value):
+    """Return a parameter value with lists (list properties) as tuples."""
+    value = get_param_value(value)
+    if isinstance(value, list):
+        return tuple(get_hashable(x) for x in value)
+    return value
+
+
+class WorkerStats:
+    """Throughput statistics of one loader worker."""
+
+    def __init__(self, worker: int):
+        self.worker = worker
+        self.rows = 0
+        self.batches = 0
+        self.retries = 0
+        self.busy_seconds = 0.0
+        self.latencies: List[float] = []
+        self.counters: Dict[str, int] = {}
+
+    def add(self, rows: int, seconds: float, retries: int, counters: Dict[str, int]):
+        self.rows += rows
+        self.batches += 1
+        self.retries += retries
+        self.busy_seconds += seconds
+        self.latencies.append(seconds)
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        percentiles = (
+            np.percentile(self.latencies, [50, 90, 99]) * 1000
+            if self.latencies
+            else [np.nan] * 3
+        )
+        return {
+            "worker": self.worker,
+            "rows": self.rows,
+            "batches": self.batches,
+            "retries": self.retries,
+            "busy_seconds": self.busy_seconds,
+            "rows_per_s": self.rows / self.busy_seconds if self.busy_seconds else 0.0,
+            "latency_p50_ms": percentiles[0],
+            "latency_p90_ms": percentiles[1],
+            "latency_p99_ms": percentiles[2],
+        }
+
+
+class ThroughputReport:
+    """Result of a parallel load.
+
+    Attributes
+    ----------
+    workers : pd.DataFrame
+        Rows, batches, retries, rows/s and batch latency percentiles per worker
+    seconds : float
+        Wall clock time of the load
+    """
+
+    def __init__(self, stats: List[WorkerStats], seconds: float):
+        self.workers = pd.DataFrame([x.as_dict() for x in stats]).set_index("worker")
+        self.seconds = seconds
+        self.counters: Dict[str, int] = {}
+        for worker_stats in stats:
+            for name, value in worker_stats.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def rows(self) -> int:
+        return int(self.workers["rows"].sum())
+
+    @property
+    def retries(self) -> int:
+        return int(self.workers["retries"].sum())
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"<neo4j_tools:ThroughputReport {{rows: {self.rows}, seconds: {self.seconds:.1f}, "
+            f"rows/s: {self.rows_per_s:.0f}, retries: {self.retries}}}>"
+        )
+
+
+class ParallelLoader:
+    """Write nodes and edges with several worker threads.
+
+    Rows are partitioned by a hash of the merge key (nodes) or of the subject
+    key (edges), so the same node is always written by the same worker, which
+    limits lock contention between concurrent transactions. Each worker uses
+    its own session from the driver pool and retries batches failing with
+    transient errors like deadlocks.
+
+    Example
+    -------
+    >>> loader = ParallelLoader(Db(), workers=8)
+    >>> report = loader.load_nodes("Person", rows, key="id")
+    >>> report.workers
+    """
+
+    def __init__(
+        self,
+        db: Db,
+        workers: int = defaults.workers,
+        batch_size: int = defaults.batch_size,
+        max_retries: int = defaults.max_retries,
+        backoff: float = defaults.retry_backoff,
+        queue_size: int = 2,
+    ):
+        self.db = db
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.queue_size = queue_size
+
+    def __run(self, partitioned_rows: Iterable[Tuple[int, LiteralString, dict]]):
+        """Write (partition, cypher, row) items, return the throughput report."""
+        queues = [Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        stats = [WorkerStats(i) for i in range(self.workers)]
+        errors = []
+        failed = Event()
+        done = object()
+
+        def worker(i: int):
+            with self.db.driver.session(database=self.db.database) as session:
+                while True:
+                    item = queues[i].get()
+                    if item is done:
+                        break
+                    if failed.is_set():
+                        continue
+                    cypher, rows = item
+                    start = time.perf_counter()
+                    try:
+                        counters, retries = run_with_retry(
+                            session,
+                            cypher,
+                            {"rows": rows},
+                            self.max_retries,
+                            self.backoff,
+                        )
+                    except BaseException as e:
+                        errors.append(e)
+                        failed.set()
+                        continue
+                    stats[i].add(len(rows), time.perf_counter() - start, retries, counters)
+
+        threads = [Thread(target=worker, args=(i,), daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        buffers: Dict[Tuple[int, LiteralString], List[dict]] = {}
+        try:
+            for partition, cypher, row in partitioned_rows:
+                if failed.is_set():
+                    break
+                rows = buffers.setdefault((partition, cypher), [])
+                rows.append(row)
+                if len(rows) >= self.batch_size:
+                    queues[partition].put((cypher, buffers.pop((partition, cypher))))
+            for (partition, cypher), rows in buffers.items():
+                if failed.is_set():
+                    break
+                queues[partition].put((cypher, rows))
+        finally:
+            for q in queues:
+                q.put(done)
+            for thread in threads:
+                thread.join()
+        self.db.refresh()
+        if errors:
+            raise errors[0]
+        return ThroughputReport(stats, time.perf_counter() - start)
+
+    def load_nodes(
+        self,
+        labels: Union[str, set[str]],
+        rows: Union[Iterable[dict], pd.DataFrame],
+        key: Optional[Union[str, List[str]]] = None,
+    ) -> ThroughputReport:
+        """Create (`key` is None) or merge nodes in parallel.
+
+        Parameters
+        ----------
+        labels : Union[str, set[str]]
+            Label(s) of the nodes
+        rows : Union[Iterable[dict], pd.DataFrame]
+            Properties of the nodes
+        key : Optional[Union[str, List[str]]], optional
+            Property name(s) nodes are merged on and partitioned by. If None,
+            nodes are created and distributed round robin.
+
+        Returns
+        -------
+        ThroughputReport
+            Throughput per worker
+        """
+        keys = [key] if isinstance(key, str) else key
+
+        def partition():
+            if keys is None:
+                cypher = get_bulk_create_nodes_cypher(labels)
+                i = 0
+                for batch in get_batches(rows, self.batch_size):
+                    for row in batch:
+                        yield i % self.workers, cypher, row
+                        i += 1
+                return
+            cypher = get_bulk_merge_nodes_cypher(labels, keys)
+            for batch in get_batches(rows, self.batch_size):
+                for row in get_rows_with_keys(batch, keys):
+                    key_values = tuple(get_hashable(row[k]) for k in keys)
+                    yield hash(key_values) % self.workers, cypher, row
+
+        return self.__run(partition())
+
+    def load_edges(
+        self,
+        triples_or_df: Union[Iterable[tuple[Node, Edge, Node]], pd.DataFrame],
+        subj_key: str,
+        obj_key: str,
+    ) -> ThroughputReport:
+        """Merge edges between existing nodes in parallel.
+
+        Edges are partitioned by their subject node. See
+        `Db.bulk_merge_edges` for the accepted input.
+
+        Returns
+        -------
+        ThroughputReport
+            Throughput per worker
+        """
+
+        def partition():
+            for group, row in iter_edge_rows(
+                triples_or_df, subj_key, obj_key, self.batch_size
+            ):
+                cypher = get_bulk_merge_edges_cypher(group, subj_key, obj_key)
+                yield hash((group[0], get_hashable(row["subj"]))) % self.workers, cypher, row
+
+        return self.__run(partition())
@@ -0,0 +1,146 @@
+"""In-process stand-in for the Neo4J driver, used by the tests and benchmarks.
+
+The fake driver records every query in `driver.queries` and answers with
+the records returned by `driver.responder(query, params)`: a list of
+dictionaries, a `FakeResult` or a tuple of `FakeResult` arguments.
+
+Example
+-------
+>>> neo4j_tools.GraphDatabase = FakeGraphDatabase
+>>> db = Db()
+>>> db.driver.responder = lambda query, params: [{"num": 1}]
+"""
+from neo4j import Record, SummaryCounters
+from neo4j.exceptions import SessionError
+
+
+class FakeSummary:
+    def __init__(self, counters: dict, plan=None, profile=None):
+        self.counters = SummaryCounters(counters)
+        self.plan = plan
+        self.profile = profile
+
+
+class FakeResult:
+    def __init__(self, records, counters=None, summary=None):
+        self._records = [Record(r.items()) for r in records]
+        self._counters = counters or {}
+        self._summary = summary or {}
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def keys(self):
+        return self._records[0].keys() if self._records else []
+
+    def data(self):
+        return [r.data() for r in self._records]
+
+    def values(self):
+        return [r.values() for r in self._records]
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return FakeSummary(self._counters, **self._summary)
+
+
+class FakeTransaction:
+    def __init__(self, session):
+        self.session = session
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.session.run(query, parameters, **kwargs)
+
+
+class FakeSession:
+    def __init__(self, driver, **config):
+        self.driver = driver
+        self.config = config
+        self.closed = False
+
+    def run(self, query, parameters=None, **kwargs):
+        if self.closed:
+            raise SessionError("Session closed")
+        params = dict(parameters or {}, **kwargs)
+        self.driver.queries.append((query, params))
+        answer = self.driver.responder(query, params)
+        if isinstance(answer, FakeResult):
+            return answer
+        if isinstance(answer, tuple):
+            return FakeResult(*answer)
+        return FakeResult(answer or [])
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(FakeTransaction(self), *args, **kwargs)
+
+    execute_read = execute_write
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeDriver:
+    def __init__(self, uri=None, auth=None, **config):
+        self.uri = uri
+        self.auth = auth
+        self.config = config
+        self.queries = []
+        self.responder = lambda query, params: []
+        self.closed = False
+
+    def session(self, **config):
+        return FakeSession(self, **config)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeGraphDatabase:
+    @staticmethod
+    def driver(uri, auth=None, **config):
+        return FakeDriver(uri, auth, **config)
+
+
+class FakeAsyncResult(FakeResult):
+    async def data(self):
+        return super().data()
+
+    async def consume(self):
+        return super().consume()
+
+
+class FakeAsyncSession(FakeSession):
+    async def run(self, query, parameters=None, **kwargs):
+        result = super().run(query, parameters, **kwargs)
+        return FakeAsyncResult([r.data() for r in result], result._counters)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class FakeAsyncDriver(FakeDriver):
+    def session(self, **config):
+        return FakeAsyncSession(self, **config)
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncGraphDatabase:
+    @staticmethod
+    def driver(uri, auth=None, **config):
+        return FakeAsyncDriver(uri, auth, **config)
@@ -0,0 +1,46 @@
+"""Shared fixtures for neo4j_tools tests.
+
+The fixtures replace the Neo4J driver by the in-process stand-in of
+`neo4j_tools.testing`, which records every query and answers with records
+produced by a configurable responder.
+"""
+
+import pytest
+
+from neo4j_tools import neo4j_tools, async_db
+from neo4j_tools.testing import FakeAsyncGraphDatabase, FakeGraphDatabase
+
+
+@pytest.fixture(autouse=True)
+def driver_registry():
+    """Do not share drivers between tests."""
+    yield neo4j_tools.drivers
+    neo4j_tools.drivers.close_all()
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text(
+        "[NEO4J]\n"
+        "uri = bolt://localhost:7687\n"
+        "user = neo4j\n"
+        "password = secret\n"
+        f"import_folder = {tmp_path}/\n"
+        "database = neo4j\n"
+    )
+    return str(path)
+
+
+@pytest.fixture
+def db(monkeypatch, config_file):
+    """A `Db` talking to an in-process stand-in driver."""
+    monkeypatch.setattr(neo4j_tools, "GraphDatabase", FakeGraphDatabase)
+    return neo4j_tools.Db(config_file)
+
+
+@pytest.fixture
+def adb(monkeypatch, config_file):
+    """An `AsyncDb` talking to an in-process stand-in async driver."""
+    monkeypatch.setattr(async_db, "AsyncGraphDatabase", FakeAsyncGraphDatabase)
+    return async_db.AsyncDb(config_file)
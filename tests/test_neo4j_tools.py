@@ -2,11 +2,29 @@
 
 """Tests for `neo4j_tools` package."""
 
+import asyncio
+import gzip
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+
 import pytest
+import pandas as pd
 
 from click.testing import CliRunner
 
-from neo4j_tools import neo4j_tools
+from neo4j.exceptions import ClientError, TransientError
+from neo4j.graph import Graph, Node as GraphNode
+
+from neo4j_tools import admin_import, neo4j_tools, parallel
+from neo4j_tools import metrics as metrics_module
+from neo4j_tools.neo4j_tools import Node, Edge
+from neo4j_tools.compiler import compile_element
+from neo4j_tools.testing import FakeGraphDatabase
+
 from neo4j_tools import cli
 
 
@@ -35,3 +53,817 @@ def test_command_line_interface():
     help_result = runner.invoke(cli.main, ['--help'])
     assert help_result.exit_code == 0
     assert '--help  Show this message and exit.' in help_result.output
+
+
+def test_bulk_create_nodes(db):
+    """Test batched node creation with rows passed as parameters."""
+    db.driver.responder = lambda query, params: (
+        [{"eid": str(i)} for i, _ in enumerate(params["rows"])],
+        {"nodes-created": len(params["rows"])},
+    )
+    rows = ({"name": f"n{i}", "score": float("nan")} for i in range(5))
+    results = db.bulk_create_nodes("Person", rows, batch_size=2)
+
+    assert [len(r.element_ids) for r in results] == [2, 2, 1]
+    assert sum(r.counters["nodes_created"] for r in results) == 5
+    query, params = db.driver.queries[0]
+    assert query.startswith("UNWIND $rows AS row CREATE (n:`Person`)")
+    assert params["rows"] == [{"name": "n0"}, {"name": "n1"}]
+
+
+def test_bulk_merge_nodes_groups_by_key(db):
+    """Test that rows are merged on the key and rows missing a key property skipped."""
+    rows = pd.DataFrame({"id": [1, 2, None], "name": ["a", "b", "c"]})
+    db.bulk_merge_nodes("Person", rows, key="id")
+
+    assert len(db.driver.queries) == 1
+    query, params = db.driver.queries[0]
+    assert "MERGE (n:`Person` {`id`: row.`id`})" in query
+    assert [row["id"] for row in params["rows"]] == [1, 2]
+
+    rows = [{"country": "DE", "id": 1}, {"country": "DE"}, {"id": 2}]
+    db.bulk_merge_nodes("City", rows, key=["country", "id"])
+    assert len(db.driver.queries) == 2
+    query, params = db.driver.queries[1]
+    assert "MERGE (n:`City` {`country`: row.`country`, `id`: row.`id`})" in query
+    assert params["rows"] == [{"country": "DE", "id": 1}]
+
+
+def test_import_nodes_from_mysql_streams_batches(db):
+    """Test streaming import from any DB-API cursor (here sqlite3)."""
+    connection = sqlite3.connect(":memory:")
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE person (id INTEGER, name TEXT)")
+    cursor.executemany(
+        "INSERT INTO person VALUES (?, ?)", [(i, f"p{i}") for i in range(25)]
+    )
+    sessions = []
+    session = db.driver.session
+    db.driver.session = lambda **config: sessions.append(session(**config)) or sessions[-1]
+    db.import_nodes_from_mysql(
+        "Person", cursor, "SELECT * FROM person", merge=True, key="id", batch_size=10
+    )
+    assert len(sessions) == 1 and sessions[0].closed
+
+    assert [len(params["rows"]) for _, params in db.driver.queries] == [10, 10, 5]
+    query, params = db.driver.queries[0]
+    assert "MERGE (n:`Person` {`id`: row.`id`})" in query
+    assert params["rows"][0] == {"id": 0, "name": "p0"}
+
+    db.driver.queries.clear()
+    cursor.execute("CREATE TABLE city (name TEXT, zip TEXT)")
+    cursor.executemany("INSERT INTO city VALUES (?, ?)", [("a", "1"), ("b", None), (None, "3")])
+    db.import_nodes_from_mysql("City", cursor, "SELECT * FROM city", merge=True)
+    rows = {query.split("{")[1].split("}")[0]: params["rows"] for query, params in db.driver.queries}
+    assert rows == {
+        "`name`: row.`name`, `zip`: row.`zip`": [{"name": "a", "zip": "1"}],
+        "`name`: row.`name`": [{"name": "b"}],
+        "`zip`: row.`zip`": [{"zip": "3"}],
+    }
+
+
+def test_buffered_pymysql_cursor_is_detected():
+    """Test that only pymysql cursors buffering the whole result are flagged."""
+    cursors = pytest.importorskip("pymysql.cursors")
+    assert neo4j_tools.is_buffered_cursor(cursors.DictCursor(None))
+    assert not neo4j_tools.is_buffered_cursor(cursors.SSDictCursor(None))
+    assert not neo4j_tools.is_buffered_cursor(sqlite3.connect(":memory:").cursor())
+
+
+def test_bulk_merge_edges_groups_by_labels_and_type(db):
+    """Test that edges are written with one query per group and batch."""
+    triples = [
+        (Node("Person", {"id": 1}), Edge("KNOWS", {"since": 2020}), Node("Person", {"id": 2})),
+        (Node("Person", {"id": 1}), Edge("LIKES"), Node("Movie", {"id": 7})),
+        (Node("Person", {"id": 2}), Edge("KNOWS"), Node("Person", {"id": 3})),
+    ]
+    db.bulk_merge_edges(triples, subj_key="id", obj_key="id")
+
+    assert len(db.driver.queries) == 2
+    query, params = db.driver.queries[0]
+    assert "MERGE (a)-[r:`KNOWS`]->(b)" in query
+    assert params["rows"] == [
+        {"subj": 1, "obj": 2, "props": {"since": 2020}},
+        {"subj": 2, "obj": 3, "props": {}},
+    ]
+
+
+def test_async_db_gather_and_bulk_create(adb):
+    """Test AsyncDb coroutines against a stand-in async driver."""
+    adb.driver.responder = lambda query, params: (
+        [{"num": 3}] if "count" in query else
+        [{"eid": row["name"]} for row in params.get("rows", [])]
+    )
+
+    async def run():
+        counts = await adb.gather(
+            [adb.count_nodes(Node(label)) for label in ["A", "B", "C"]], limit=2
+        )
+        results = await adb.bulk_create_nodes(
+            "Person", ({"name": str(i)} for i in range(5)), batch_size=2, concurrency=2
+        )
+        return counts, results
+
+    counts, results = asyncio.run(run())
+    assert counts == [3, 3, 3]
+    assert [r.element_ids for r in results] == [["0", "1"], ["2", "3"], ["4"]]
+
+
+def test_parallel_loader_partitions_and_retries(db, monkeypatch):
+    """Test that nodes are partitioned by key and deadlocks are retried."""
+    monkeypatch.setattr(parallel.time, "sleep", lambda seconds: None)
+    failures = [TransientError("Neo.TransientError.Transaction.DeadlockDetected")]
+
+    written = []
+
+    def responder(query, params):
+        if failures:
+            raise failures.pop()
+        written.append((threading.current_thread().name, params["rows"]))
+        return [], {"nodes-created": len(params["rows"])}
+
+    db.driver.responder = responder
+    loader = parallel.ParallelLoader(db, workers=3, batch_size=10)
+    rows = [{"id": i % 50, "name": f"n{i}"} for i in range(100)]
+    report = loader.load_nodes("Person", rows, key="id")
+
+    assert report.rows == 100
+    assert report.retries == 1
+    assert report.counters["nodes_created"] == 100
+    workers_by_id = {}
+    for thread_name, rows in written:
+        for row in rows:
+            workers_by_id.setdefault(row["id"], set()).add(thread_name)
+    assert all(len(workers) == 1 for workers in workers_by_id.values())
+
+    report = loader.load_nodes("Tag", [{"path": ["a", "b"]}, {"path": ["a", "b"]}], key="path")
+    assert report.rows == 2
+
+
+def test_iter_nodes_streams_one_query(db):
+    """Test that iter_nodes reads all pages from one query with a fetch size."""
+    sessions = []
+    session = db.driver.session
+    db.driver.session = lambda **config: sessions.append(config) or session(**config)
+    db.driver.responder = lambda query, params: [{"n": {"id": i}} for i in range(5)]
+    nodes = db.iter_nodes("Person", page_size=2)
+    assert next(nodes) == {"id": 0}
+    assert [x["id"] for x in nodes] == [1, 2, 3, 4]
+    assert [query for query, _ in db.driver.queries] == ["MATCH (n:`Person`) RETURN n"]
+    assert sessions[-1]["fetch_size"] == 2
+
+
+def test_exec_df_columnar_chunks_and_dtypes(db):
+    """Test building frames column-wise, in chunks and with declared dtypes."""
+    db.driver.responder = lambda query, params: [
+        {"n": {"name": f"n{i}", "age": i} if i % 2 else {"name": f"n{i}"}}
+        for i in range(5)
+    ]
+    df = db.exec_df("MATCH (n) RETURN n", dtypes={"age": "Int64"})
+    assert list(df.columns) == ["Label in Cypher", "name", "age"]
+    assert str(df["age"].dtype) == "Int64"
+    assert df["age"].isna().sum() == 3
+
+    chunks = list(db.exec_df("MATCH (n) RETURN n", chunksize=2))
+    assert [len(x) for x in chunks] == [2, 2, 1]
+
+    node = GraphNode(Graph(), "4:x:1", 1, ["Person"], {"name": "Ada"})
+    db.driver.responder = lambda query, params: [{"nodes": [node], "m": {"n": node}}]
+    df = db.exec_df("MATCH (n) RETURN collect(n) AS nodes, {n: n} AS m")
+    assert df.loc[0, "nodes"] == [{"name": "Ada"}]
+    assert df.loc[0, "m"] == {"n": {"name": "Ada"}}
+
+
+def test_get_statistics_in_constant_round_trips(db):
+    """Test that all counts are read from the count store in one round trip."""
+    graph_counts = {
+        "nodes": [{"count": 7}, {"label": "Person", "count": 5}, {"label": "Movie", "count": 2}],
+        "relationships": [
+            {"count": 3},
+            {"relationshipType": "ACTED_IN", "count": 3},
+            {"relationshipType": "ACTED_IN", "startLabel": "Person", "count": 3},
+            {"relationshipType": "ACTED_IN", "endLabel": "Movie", "count": 3},
+        ],
+    }
+    db.driver.responder = lambda query, params: [{"data": graph_counts}]
+    stats = db.get_statistics(ttl=60)
+    assert len(db.driver.queries) == 1
+    assert stats.labels["number_of_nodes"].to_dict() == {"Person": 5, "Movie": 2}
+    assert stats.relationship_types["number_of_relationships"].to_dict() == {"ACTED_IN": 3}
+    assert stats.relationship_labels[["label", "direction"]].values.tolist() == [
+        ["Person", "out"],
+        ["Movie", "in"],
+    ]
+    db.get_statistics(ttl=60)
+    assert len(db.driver.queries) == 1
+
+
+def test_get_statistics_without_stats_procedure(db):
+    """Test counting with one UNION ALL query if db.stats.retrieve is not allowed."""
+    counts = {"`Person`": 5, "`Movie`": 2, "`ACTED_IN`": 3}
+
+    def responder(query, params):
+        if query.startswith("CALL db.stats.retrieve"):
+            raise ClientError("Neo.ClientError.Security.Forbidden")
+        if query.startswith("CALL db.labels()"):
+            return [{"labels": ["Person", "Movie"], "types": ["ACTED_IN"]}]
+        if query.startswith("CALL db.schema"):
+            rel = ({"name": "Person"}, "ACTED_IN", {"name": "Movie"})
+            return [{"nodes": [], "relationships": [rel]}]
+        rows = []
+        for part in query.split(" UNION ALL "):
+            kind = part.split("RETURN '")[1].split("'")[0]
+            name = [x for x in counts if x in part]
+            rows.append(
+                {"kind": kind, "label": None, "type": None, "direction": None,
+                 "num": counts[name[0]]}
+            )
+        return rows
+
+    db.driver.responder = responder
+    stats = db.get_statistics()
+    assert len(db.driver.queries) == 4
+    assert stats.labels["number_of_nodes"].tolist() == [5, 2]
+    assert len(stats.relationship_labels) == 2
+
+
+def test_metadata_cache_invalidated_by_writes(db):
+    """Test that labels are cached and refreshed by writes with new labels."""
+    labels = ["Person"]
+    db.driver.responder = lambda query, params: (
+        [{"label": x} for x in labels] if "db.labels" in query else [{"nid": 1}]
+    )
+    assert db.node_labels == ["Person"]
+    assert db.node_labels == ["Person"]
+    assert len(db.driver.queries) == 1
+
+    db.create_node(Node("Person", {"name": "a"}))
+    assert db.node_labels == ["Person"]
+    assert len(db.driver.queries) == 2
+
+    labels.append("Movie")
+    db.create_node(Node("Movie", {"title": "b"}))
+    assert db.node_labels == ["Person", "Movie"]
+    db.refresh()
+    db.node_labels
+    assert len(db.driver.queries) == 5
+
+
+def test_compile_element_gives_stable_templates():
+    """Test that values end up in parameters, not in the query text."""
+    a = compile_element(Node("Person", {"name": "Ada", "age": 36}), "n")
+    b = compile_element(Node("Person", {"name": 'Bob "B"', "age": 7}), "n")
+    assert (a.labels, a.props, a.where) == (b.labels, b.props, b.where)
+    assert a.where == "n.`name` = $n_0 AND n.`age` = $n_1"
+    assert b.params == {"n_0": 'Bob "B"', "n_1": 7}
+
+    c = compile_element(Node("Person", {"name": "Ada", "age": None}), "n")
+    assert c.props == "{`name`: $n_0}"
+    assert c.where == "n.`name` = $n_0 AND n.`age` IS NULL"
+
+
+def test_db_methods_bind_parameters(db):
+    """Test that Db methods send values as parameters."""
+    db.driver.responder = lambda query, params: [{"num": 1}]
+    db.get_number_of_nodes(Node("Person", {"name": "Ada"}))
+    db.get_number_of_nodes(Node("Person", {"name": "Bob"}))
+    (query_a, params_a), (query_b, params_b) = db.driver.queries
+    assert query_a == query_b
+    assert "Ada" not in query_a
+    assert params_b == {"n_0": "Bob"}
+
+    db.delete_edge_by_id(7)
+    assert db.driver.queries[-1][1] == {"edge_id": 7}
+
+    def responder(query, params):
+        raise TransientError("Neo.TransientError.Transaction.DeadlockDetected")
+
+    db.driver.responder = responder
+    with pytest.raises(TransientError):
+        db.merge_node(Node("Person", {"name": "Ada"}))
+
+
+def test_load_nodes_from_csv_batched_and_typed(db, tmp_path):
+    """Test CSV staging names, transaction batching and column casts."""
+    csv_file = tmp_path / "people.csv"
+    csv_file.write_text("Id,Name\n1,Ada\n2,Bob\n")
+    urls = []
+
+    def responder(query, params):
+        urls.append(params["url"])
+        assert (tmp_path / params["url"][len("file:///") :]).is_symlink()
+        return [], {"nodes-created": 2}
+
+    db.driver.responder = responder
+    counters = db.load_nodes_from_csv(
+        "Person", str(csv_file), key="Id", batch_size=500, infer_dtypes=True
+    )
+    db.load_nodes_from_csv("Person", str(csv_file))
+    query = db.driver.queries[0][0]
+    assert "`id`: line.`Id`" in db.driver.queries[1][0]
+    assert counters["nodes_created"] == 2
+    assert "IN TRANSACTIONS OF 500 ROWS" in query
+    assert "MERGE (n:`Person` {`id`: toIntegerOrNull(line.`Id`)})" in query
+    assert "WHERE toIntegerOrNull(line.`Id`) IS NOT NULL" in query
+    assert "`name`: line.`Name`" in query
+    assert urls[0] != urls[1]
+
+    csv_file.write_text("id,zip,score,flag\n1,01234,1.5,true\n,02000,2,FALSE\n3,12345,,true\n")
+    assert neo4j_tools.infer_csv_dtypes(str(csv_file)) == {"id": int, "score": float, "flag": bool}
+    assert not list(tmp_path.glob("neo4j_tools_*"))
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_load_nodes_from_file_streams_chunks(db, tmp_path, suffix):
+    """Test client-side file loading in chunks and parameter batches."""
+    df = pd.DataFrame({"id": range(25), "score": [1.5, None] * 12 + [2.0]})
+    path = tmp_path / f"nodes{suffix}"
+    if suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_json(path, orient="records", lines=True)
+    db.driver.responder = lambda query, params: (
+        [{"eid": str(row["id"])} for row in params["rows"]],
+        {"nodes-created": len(params["rows"])},
+    )
+    counters = db.load_nodes_from_file("Item", str(path), chunksize=10, batch_size=4)
+    rows = [row for _, params in db.driver.queries for row in params["rows"]]
+    assert counters["nodes_created"] == 25
+    assert max(len(params["rows"]) for _, params in db.driver.queries) == 4
+    assert rows[0] == {"id": 0, "score": 1.5}
+    assert rows[1] == {"id": 1}
+    assert type(rows[0]["id"]) is int
+
+
+def test_admin_import_writes_typed_sharded_files(tmp_path):
+    """Test neo4j-admin import headers, shards and command."""
+    exporter = admin_import.AdminImport(str(tmp_path), shard_size=3, workers=2, batch_size=2)
+    people = pd.DataFrame({"id": [1, 2, 3, 4, 5], "name": list("abcde"), "age": [1.5] * 5})
+    nodes = exporter.write_nodes("Person", people, id_key="id", id_space="Person")
+    edges = exporter.write_relationships(
+        "KNOWS",
+        [(Node("Person", {"id": 1}), Edge("KNOWS", {"tags": ["x", "y"]}), Node("Person", {"id": 2}))],
+        start_space="Person",
+        end_space="Person",
+        subj_key="id",
+        obj_key="id",
+    )
+    with open(nodes[0]) as f:
+        assert f.read().strip() == "id:ID(Person),:LABEL,name:string,age:double"
+    with open(edges[0]) as f:
+        assert f.read().strip() == ":START_ID(Person),:END_ID(Person),:TYPE,tags:string[]"
+    with gzip.open(edges[1], "rt") as f:
+        assert f.read().strip() == "1,2,KNOWS,x;y"
+    shard_rows = []
+    for path in nodes[1:]:
+        with gzip.open(path, "rt") as f:
+            shard_rows.append(f.read().splitlines())
+    assert max(len(rows) for rows in shard_rows) <= 3
+    assert sorted(row for rows in shard_rows for row in rows)[0] == "1,Person,a,1.5"
+    args = exporter.command("neo4j").split(" \\\n    ")
+    assert args[:4] == ["neo4j-admin", "database", "import", "full"]
+    assert f"--nodes={','.join(nodes)}" in args
+    assert args[-1] == "neo4j"
+
+
+def test_write_df_nodes_and_edges(db):
+    """Test renaming, NaN dropping and batching of DataFrame writers."""
+    db.driver.responder = lambda query, params: [{"eid": "1"}] * len(params["rows"])
+    df = pd.DataFrame({"PersonId": [1, 2, None], "FirstName": ["Ada", None, "Eve"]})
+    db.write_df_nodes(df, "Person", key="person_id", dtypes={"PersonId": "Int64"})
+    query, params = db.driver.queries[0]
+    assert "MERGE (n:`Person` {`person_id`: row.`person_id`})" in query
+    assert params["rows"] == [{"person_id": 1, "first_name": "Ada"}, {"person_id": 2}]
+    assert type(params["rows"][0]["person_id"]) is int
+
+    db.driver.queries.clear()
+    edges = pd.DataFrame({"From": [1, 2], "To": [2, None], "Since": [2020, 2021], "Obj": ["x", "y"]})
+    db.write_df_edges(edges, "From", "To", "KNOWS", "Person", "Person", dst_key="person_id")
+    query, params = db.driver.queries[0]
+    assert "MATCH (a:`Person` {`from`: row.subj})" in query
+    assert "MATCH (b:`Person` {`person_id`: row.obj})" in query
+    assert params["rows"] == [{"subj": 1, "obj": 2, "props": {"since": 2020, "obj": "x"}}]
+    assert type(params["rows"][0]["obj"]) is int
+
+
+def test_import_resumes_from_checkpoint(db, tmp_path, monkeypatch):
+    """Test retries of managed transactions and resuming after a failure."""
+    monkeypatch.setattr(neo4j_tools.time, "sleep", lambda seconds: None)
+    connection = sqlite3.connect(":memory:")
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE person (id INTEGER)")
+    cursor.executemany("INSERT INTO person VALUES (?)", [(i,) for i in range(25)])
+    checkpoint = str(tmp_path / "import.json")
+    calls = []
+    errors = [TransientError("deadlock"), ValueError("server gone")]
+
+    def responder(query, params):
+        calls.append(params["rows"][0]["id"])
+        if len(calls) > 1 and errors:
+            raise errors.pop(0)
+        return []
+
+    db.driver.responder = responder
+    sql = "SELECT id FROM person ORDER BY id"
+    with pytest.raises(ValueError):
+        db.import_nodes_from_mysql("Person", cursor, sql, batch_size=10, checkpoint=checkpoint)
+    assert calls == [0, 10, 10]
+    with open(checkpoint) as f:
+        assert json.load(f)["rows"] == 10
+
+    calls.clear()
+    db.import_nodes_from_mysql("Person", cursor, sql, batch_size=10, checkpoint=checkpoint)
+    assert calls == [10, 20]
+    assert not os.path.exists(checkpoint)
+
+
+def test_file_load_checkpoints_every_batch(db, tmp_path):
+    """Test that a failure inside a chunk resumes after the last written batch."""
+    csv_file = tmp_path / "people.csv"
+    csv_file.write_text("id\n" + "".join(f"{i}\n" for i in range(25)))
+    checkpoint = str(tmp_path / "load.json")
+    calls = []
+
+    def responder(query, params):
+        calls.append(params["rows"][0]["id"])
+        if calls == [0, 10]:
+            raise ValueError("server gone")
+        return []
+
+    db.driver.responder = responder
+    with pytest.raises(ValueError):
+        db.load_nodes_from_file("Person", str(csv_file), chunksize=20, batch_size=10, checkpoint=checkpoint)
+    with open(checkpoint) as f:
+        assert json.load(f)["rows"] == 10
+
+    calls.clear()
+    db.load_nodes_from_file("Person", str(csv_file), chunksize=20, batch_size=10, checkpoint=checkpoint)
+    assert calls == [10, 20]
+
+
+def test_driver_config_and_thread_local_sessions(monkeypatch, config_file):
+    """Test pool settings from the config file and one session per thread."""
+    with open(config_file, "a") as f:
+        f.write("max_connection_pool_size = 50\nconnection_acquisition_timeout = 2.5\n")
+    monkeypatch.setattr(neo4j_tools, "GraphDatabase", FakeGraphDatabase)
+    db = neo4j_tools.Db(config_file)
+    assert db.driver.config["max_connection_pool_size"] == 50
+    assert db.driver.config["connection_acquisition_timeout"] == 2.5
+
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(db.session))
+    thread.start()
+    thread.join()
+    assert db.session is db.session
+    assert sessions[0] is not db.session
+
+
+def test_delete_nodes_in_batches(db):
+    """Test batched deletion with supernode pre-deletion, concurrency and dry run."""
+
+    def responder(query, params):
+        if "RETURN count(n)" in query:
+            return [{"nodes": 5, "relationships": 3}]
+        if "DELETE r" in query:
+            return [], {"relationships-deleted": 3}
+        return [], {"nodes-deleted": 5}
+
+    db.driver.responder = responder
+    node = Node("Person", {"name": "Ada"})
+    assert db.delete_all_nodes(node, dry_run=True) == (5, 3)
+    assert db.delete_all_nodes(node, transition_size=2, supernode_degree=1) == (5, 3)
+    queries = [query for query, _ in db.driver.queries[1:]]
+    assert len(queries) == 2
+    assert "COUNT { (n)--() } > $supernode_degree" in queries[0]
+    assert "CALL { WITH n DETACH DELETE n }" in queries[1]
+    assert queries[1].endswith("IN TRANSACTIONS OF 2 ROWS")
+
+    assert db.delete_nodes(node, concurrency=4) == 5
+    assert "IN 4 CONCURRENT TRANSACTIONS OF 10000 ROWS" in db.driver.queries[-1][0]
+
+
+def test_async_db_deletes_in_batches(adb):
+    """Test AsyncDb deletes with the same batched query as Db."""
+    adb.driver.responder = lambda query, params: (
+        [], {"relationships-deleted": 3} if "DELETE r" in query else {"nodes-deleted": 5}
+    )
+
+    async def run():
+        nodes = await adb.delete_nodes(Node("Person", {"name": "Ada"}), batch_size=2)
+        edges = await adb.delete_edges(Edge("KNOWS"), concurrency=4)
+        return nodes, edges
+
+    assert asyncio.run(run()) == (5, 3)
+    nodes_query, edges_query = [query for query, _ in adb.driver.queries]
+    assert "CALL { WITH n DETACH DELETE n }" in nodes_query
+    assert nodes_query.endswith("IN TRANSACTIONS OF 2 ROWS")
+    assert edges_query.endswith("IN 4 CONCURRENT TRANSACTIONS OF 10000 ROWS")
+
+
+def test_bulk_update_props_modes(db):
+    """Test merge, replace and remove updates in UNWIND batches."""
+    db.driver.responder = lambda query, params: ([], {"properties-set": len(params["rows"])})
+    rows = [{"id": 1, "age": 36}, {"id": 2, "age": None}, {"age": 3}]
+    assert db.update_props("Person", "id", rows)["properties_set"] == 2
+    query, params = db.driver.queries[-1]
+    assert query == (
+        "UNWIND $rows AS row MATCH (n:`Person` {`id`: row.key}) SET n += row.props"
+    )
+    assert params["rows"] == [
+        {"key": 1, "props": {"id": 1, "age": 36}},
+        {"key": 2, "props": {"id": 2}},
+    ]
+
+    db.set_props(None, None, [{"element_id": "4:x:1", "name": "Ada"}])
+    query, params = db.driver.queries[-1]
+    assert "WHERE elementId(n) = row.key SET n = row.props" in query
+    assert params["rows"] == [{"key": "4:x:1", "props": {"name": "Ada"}}]
+
+    db.remove_props("Person", "id", [{"id": 1, "age": 0, "tmp": None}])
+    assert db.driver.queries[-1][0].endswith("REMOVE n.`age`, n.`tmp`")
+    db.remove_props("Person", "id", pd.DataFrame({"id": [1, None], "tmp": [None, 1.0]}))
+    query, params = db.driver.queries[-1]
+    assert query.endswith("REMOVE n.`tmp`")
+    assert params["rows"] == [{"key": 1, "props": {}}]
+    with pytest.raises(ValueError):
+        db.bulk_update_props("Person", "id", rows, mode="delete")
+
+
+def test_metrics_per_method_and_query(db):
+    """Test latency, rows, counters and exports of instrumented queries."""
+    events = []
+    metrics = db.enable_metrics(hooks=[events.append])
+    db.driver.responder = lambda query, params: [{"num": 1}, {"num": 2}]
+    db.exec_data("MATCH (n) RETURN n.num AS num")
+    db.driver.responder = lambda query, params: ([{"eid": "1"}], {"nodes-created": 1})
+    db.bulk_create_nodes("Person", [{"name": "Ada"}])
+
+    snapshot = metrics.snapshot()
+    assert snapshot["methods"]["exec_data"]["rows"] == 2
+    assert snapshot["methods"]["bulk_create_nodes"]["counters"] == {"nodes_created": 1}
+    assert "MATCH (n) RETURN n.num AS num" in snapshot["queries"]
+    assert [event.method for event in events] == ["exec_data", "bulk_create_nodes"]
+    prometheus = metrics.to_prometheus()
+    assert 'neo4j_tools_query_seconds_count{method="exec_data"} 1' in prometheus
+    assert "RETURN n.num" not in prometheus
+    query_hash = metrics_module.get_query_hash("MATCH (n) RETURN n.num AS num")
+    assert f'neo4j_tools_query_seconds_count{{query_hash="{query_hash}"}} 1' in prometheus
+    assert metrics_module.get_query_hash("MATCH (n {id: 1})") == metrics_module.get_query_hash(
+        "MATCH (n {id: 22})"
+    )
+    assert json.loads(metrics.to_json())["methods"]["exec_data"]["count"] == 1
+
+    db.disable_metrics()
+    db.exec_data("MATCH (n) RETURN n")
+    assert metrics.snapshot()["methods"]["exec_data"]["count"] == 1
+
+
+def test_metrics_record_unconsumed_results(db):
+    """Test results returned unconsumed by Db methods still reach the metrics."""
+    events = []
+    db.enable_metrics(hooks=[events.append])
+    db.create_node_index("Person", "name")
+    assert [(event.method, event.rows, event.error) for event in events] == [
+        ("create_node_index", 0, None)
+    ]
+
+    result = db.drop_node_index("ix_Person__name")
+    assert len(events) == 1
+    result.consume()
+    del result
+    assert [event.method for event in events] == ["create_node_index", "drop_node_index"]
+
+
+def test_profile_flattens_plan_and_flags_anti_patterns(db):
+    """Test plan DataFrame of PROFILE with anti-pattern warnings."""
+    profile = {
+        "operatorType": "ProduceResults@neo4j",
+        "identifiers": ["n"],
+        "args": {"EstimatedRows": 10.0},
+        "rows": 1,
+        "dbHits": 0,
+        "children": [
+            {
+                "operatorType": "Filter@neo4j",
+                "identifiers": ["n"],
+                "args": {"Details": "n.name = $name"},
+                "rows": 1,
+                "dbHits": 200,
+                "children": [
+                    {
+                        "operatorType": "NodeByLabelScan@neo4j",
+                        "identifiers": ["n"],
+                        "rows": 100,
+                        "dbHits": 101,
+                        "pageCacheHits": 5,
+                        "pageCacheMisses": 1,
+                        "children": [],
+                    }
+                ],
+            }
+        ],
+    }
+    db.driver.responder = lambda query, params: ([], {}, {"profile": profile})
+    plan = db.profile("MATCH (n:Person {name: $name}) RETURN n", {"name": "Ada"})
+    assert db.driver.queries[0][0].startswith("PROFILE MATCH")
+    assert plan["operator"].tolist() == ["ProduceResults", "Filter", "NodeByLabelScan"]
+    assert plan["parent_id"].tolist()[1:] == [0, 1]
+    assert plan.loc[2, "db_hits"] == 101
+    assert plan["warning"].notna().tolist() == [False, False, True]
+
+    db.driver.responder = lambda query, params: ([], {}, {"plan": {"operatorType": "AllNodesScan@neo4j"}})
+    plan = db.explain("EXPLAIN MATCH (n) RETURN n")
+    assert db.driver.queries[-1][0] == "EXPLAIN MATCH (n) RETURN n"
+    assert plan.loc[0, "warning"] == neo4j_tools.plan_warnings["AllNodesScan"]
+    db.explain("  profile MATCH (n) RETURN n")
+    assert db.driver.queries[-1][0] == "EXPLAIN MATCH (n) RETURN n"
+    assert neo4j_tools.get_plan_warning("Eager", "Create") == neo4j_tools.plan_warnings["Eager"]
+    assert neo4j_tools.get_plan_warning("EagerAggregation", "ProduceResults") is None
+
+
+def test_index_advisor_reports_and_creates_missing_indexes(db):
+    """Test recorded lookup shapes are compared with SHOW INDEXES."""
+    indexes = [
+        {
+            "name": "ix_person__name",
+            "type": "RANGE",
+            "entityType": "NODE",
+            "labelsOrTypes": ["Person"],
+            "properties": ["name"],
+            "state": "ONLINE",
+        },
+        {
+            "name": "ix_drug__name",
+            "type": "RANGE",
+            "entityType": "NODE",
+            "labelsOrTypes": ["Drug"],
+            "properties": ["name"],
+            "state": "POPULATING",
+        },
+    ]
+    db.driver.responder = lambda query, params: (
+        indexes if query == "SHOW INDEXES"
+        else [{"id": 1}] if query.startswith("MERGE")
+        else [{"subj_id": 1, "edge_id": 2, "obj_id": 3}] if query.startswith("CREATE (")
+        else []
+    )
+    db.create_edge(Node("Compound", {"cid": 1}), Edge("TREATS"), Node("Disease", {"doid": 2}))
+    db.merge_node(Node("Person", {"name": "Ada"}))
+    db.get_node(Node("Person", {"name": "Ada"}))
+    db.bulk_merge_nodes("Gene", [{"symbol": "A"}, {"symbol": "B"}], key="symbol")
+    db.bulk_merge_edges(
+        [(Node("Gene", {"symbol": "A"}), Edge("REGULATES"), Node("Protein", {"acc": "P1"}))],
+        subj_key="symbol",
+        obj_key="acc",
+    )
+
+    report = db.advise_indexes(missing_only=False)
+    assert report["labels"].tolist()[0] == ["Gene"]
+    assert report["calls"].tolist()[0] == 3
+    indexed = report.set_index(report["labels"].str[0])["index"].notna().to_dict()
+    assert indexed == {"Gene": False, "Person": True, "Protein": False}
+
+    db.driver.queries.clear()
+    assert db.ensure_index("Person", "name") == "ix_person__name"
+    assert db.ensure_index("Drug", "name") == "ix_drug__name"
+    assert db.ensure_index("Gene", ["symbol", "taxid"], unique=True) == "uid_Gene__symbol_taxid"
+    queries = [(q, p.get("name")) for q, p in db.driver.queries if q != "SHOW INDEXES"]
+    assert queries == [
+        ("CALL db.awaitIndex($name, $timeout)", "ix_drug__name"),
+        (
+            "CREATE CONSTRAINT `uid_Gene__symbol_taxid` IF NOT EXISTS FOR (e:`Gene`) "
+            "REQUIRE (e.`symbol`, e.`taxid`) IS UNIQUE",
+            None,
+        ),
+        ("CALL db.awaitIndex($name, $timeout)", "uid_Gene__symbol_taxid"),
+    ]
+    assert db.create_missing_indexes(wait=False) == ["ix_Gene__symbol", "ix_Protein__acc"]
+
+
+def test_benchmarks_run_offline_and_compare_with_baseline(tmp_path):
+    """Test benchmark results, baseline file and regression check."""
+    from benchmarks import bench_neo4j_tools as bench
+
+    results = bench.run_benchmarks([50], ["exec_df", "bulk_merge_nodes"], repeat=1)
+    assert [(r.benchmark, r.rows) for r in results] == [("exec_df", 50), ("bulk_merge_nodes", 50)]
+    assert all(r.rows_per_second > 0 and r.peak_mib > 0 for r in results)
+
+    path = str(tmp_path / "baseline.json")
+    bench.save_results(results, path)
+    baseline = bench.load_results(path)
+    assert bench.compare(results, baseline) == []
+    slower = [r._replace(rows_per_second=r.rows_per_second / 2) for r in results]
+    assert len(bench.compare(slower, baseline, tolerance=0.25)) == 2
+
+
+def get_import(module: str):
+    """Return the modules loaded by importing `module` and its cumulative import time in µs."""
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+    )
+    times = [line.split("|") for line in out.stderr.splitlines() if line.startswith("import time:")]
+    cumulative = [int(t[1]) for t in times if t[2].strip() == module]
+    return set(out.stdout.split()), cumulative[-1]
+
+
+def test_import_is_lazy_and_fast():
+    """Test heavy and notebook-only dependencies are loaded on first use."""
+    modules, microseconds = get_import("neo4j_tools.cli")
+    assert not modules & {"neo4j", "pandas", "numpy", "networkx", "yfiles_jupyter_graphs", "IPython"}
+    assert microseconds < 500000
+
+    modules, _ = get_import("neo4j_tools.neo4j_tools")
+    assert not modules & {"networkx", "yfiles_jupyter_graphs", "IPython"}
+
+
+def test_db_shares_lazy_driver_by_uri_and_user(monkeypatch, config_file, driver_registry):
+    """Test one driver per (uri, user), lazy connection and reference counting."""
+    monkeypatch.setattr(neo4j_tools, "GraphDatabase", FakeGraphDatabase)
+    db = neo4j_tools.Db(config_file)
+    assert driver_registry.references("bolt://localhost:7687", "neo4j") == 0
+
+    other = neo4j_tools.Db(config_file, database="other")
+    view = db.use("logs")
+    view.exec_data("MATCH (n) RETURN n")
+    assert view.driver is db.driver is other.driver
+    assert driver_registry.references("bolt://localhost:7687", "neo4j") == 3
+    assert view.driver.queries[-1][0] == "MATCH (n) RETURN n"
+    assert view.session.config["database"] == "logs"
+
+    driver = db.driver
+    for closed in (view, other):
+        closed.close()
+        assert not driver.closed
+    db.close()
+    assert driver.closed
+    assert driver_registry.references("bolt://localhost:7687", "neo4j") == 0
+
+
+def test_db_does_not_share_driver_with_other_settings(monkeypatch, config_file, tmp_path, driver_registry):
+    """Test a Db with another password or driver config gets its own driver."""
+    monkeypatch.setattr(neo4j_tools, "GraphDatabase", FakeGraphDatabase)
+    settings = open(config_file).read()
+    other_password = tmp_path / "password.ini"
+    other_password.write_text(settings.replace("password = secret", "password = other"))
+    pool_size = tmp_path / "pool.ini"
+    pool_size.write_text(settings + "max_connection_pool_size = 5\n")
+
+    db = neo4j_tools.Db(config_file)
+    drivers = [neo4j_tools.Db(str(path)).driver for path in (other_password, pool_size)]
+    assert len({id(db.driver), *map(id, drivers)}) == 3
+    assert neo4j_tools.Db(config_file).driver is db.driver
+    assert driver_registry.references("bolt://localhost:7687", "neo4j") == 4
+
+
+def test_db_query_after_close_opens_new_session(db):
+    """Test closing a Db drops its sessions and a later query reconnects."""
+    db.exec_data("MATCH (n) RETURN n")
+    session, driver = db.session, db.driver
+    db.close()
+    assert session.closed and driver.closed
+
+    db.exec_data("MATCH (n) RETURN n")
+    assert db.session is not session and not db.session.closed
+    assert db.driver is not driver
+
+
+def test_subgraph_export_to_networkx_and_arrays(db):
+    """Test streamed subgraph export to NetworkX and NumPy index arrays."""
+    nodes = [
+        {"eid": "4:x:1", "labels": ["Gene"], "props": {"symbol": "A"}},
+        {"eid": "4:x:2", "labels": ["Gene"], "props": {"symbol": "B"}},
+        {"eid": "4:x:3", "labels": ["Gene"], "props": {"symbol": "C", "labels": "tf"}},
+    ]
+    rels = [
+        {"eid": "5:x:1", "src": "4:x:1", "dst": "4:x:2", "type": "REGULATES", "props": {}, "weight": 2.0},
+        {"eid": "5:x:2", "src": "4:x:1", "dst": "4:x:2", "type": "BINDS", "props": {}, "weight": None},
+        {"eid": "5:x:3", "src": "4:x:2", "dst": "4:x:1", "type": "BINDS", "props": {}, "weight": 0.5},
+    ]
+    db.driver.responder = lambda query, params: (
+        nodes if query.lstrip().startswith("MATCH (a:`Gene`) WHERE") else rels
+    )
+
+    graph = db.to_networkx(neo4j_tools.Node("Gene", {"taxid": 9606}), ["REGULATES", "BINDS"], multigraph=True)
+    node_query, rel_query = [q for q, _ in db.driver.queries]
+    assert "a.`taxid` = $a_0" in node_query and "properties(a) AS props" in node_query
+    assert "-[r:`REGULATES`|`BINDS`]->(b:`Gene`) WHERE a.`taxid` = $a_0 AND b.`taxid` = $b_0" in rel_query
+    assert graph.number_of_nodes() == 3 and graph.number_of_edges() == 3
+    assert graph.nodes["4:x:1"] == {"labels": ["Gene"], "symbol": "A"}
+    assert graph.nodes["4:x:3"] == {"labels": ["Gene"], "symbol": "C"}
+    assert graph.edges["4:x:1", "4:x:2", "5:x:1"]["type"] == "REGULATES"
+
+    db.driver.queries.clear()
+    edges = db.to_edge_arrays("Gene", weight="weight")
+    assert "r.`weight` AS weight" in db.driver.queries[0][0]
+    assert edges.src.tolist() == [0, 0, 1] and edges.dst.tolist() == [1, 1, 0]
+    assert edges.weights.tolist() == [2.0, 1.0, 0.5]
+    assert edges.node_ids == ["4:x:1", "4:x:2"] and edges.node_index["4:x:2"] == 1
+
+    pytest.importorskip("scipy")
+    adjacency = db.to_sparse_adjacency("Gene", weight="weight", directed=False)
+    assert adjacency.matrix.toarray().tolist() == [[0.0, 3.5], [3.5, 0.0]]